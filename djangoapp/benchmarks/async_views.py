@@ -0,0 +1,156 @@
+# Compares concurrent-request throughput of the sync DRF views against their
+# native async versions under /async/, both served by the ASGI handler.
+#
+#   python -m benchmarks.async_views --requests 2000 --concurrency 100
+#
+# Runs against a throwaway test database built from the configured DB_ENGINE
+# and prints the results as JSON. The feed page cache is disabled unless
+# --cache is given, so every request reaches the database.
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "minitwitter.settings")
+# One log line per request would flood the report
+os.environ.setdefault("REQUEST_LOG_LEVEL", "WARNING")
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import AsyncClient, override_settings  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.utils import timezone  # noqa: E402
+from posts.models import PostModel  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+from users.models import Follow  # noqa: E402
+
+ENDPOINTS = {
+    "feed": ("/feed/", "/async/feed/"),
+    "post_list": ("/post/", "/async/post/"),
+    "post_detail": ("/post/{post_id}/", "/async/post/{post_id}/"),
+}
+
+
+def seed(users, posts_per_user, follows_per_user):
+    User = get_user_model()
+    User.objects.bulk_create(
+        [User(username=f"bench_user_{i}") for i in range(users)]
+    )
+    accounts = list(User.objects.filter(username__startswith="bench_user_"))
+
+    now = timezone.now()
+    PostModel.objects.bulk_create(
+        [
+            PostModel(
+                poster_user=user,
+                text_content=f"benchmark post {i}",
+                created_at=now - timezone.timedelta(minutes=i),
+            )
+            for user in accounts
+            for i in range(posts_per_user)
+        ]
+    )
+
+    # One by one, so the follow signals backfill the timelines
+    rng = random.Random(0)
+    for user in accounts:
+        others = [other for other in accounts if other != user]
+        for followee in rng.sample(others, min(follows_per_user, len(others))):
+            Follow.objects.create(follower=user, followee=followee)
+
+    return [
+        {
+            "token": str(AccessToken.for_user(user)),
+            "post_id": PostModel.objects.filter(poster_user=user).first().pk,
+        }
+        for user in accounts
+    ]
+
+
+async def run(path, clients, requests, concurrency):
+    client = AsyncClient()
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        rng = random.Random()
+        for _ in remaining:
+            account = rng.choice(clients)
+            started = time.perf_counter()
+            response = await client.get(
+                path.format(post_id=account["post_id"]),
+                headers={"Authorization": f"Bearer {account['token']}"},
+            )
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--posts-per-user", type=int, default=20)
+    parser.add_argument("--follows-per-user", type=int, default=20)
+    parser.add_argument("--endpoint", choices=ENDPOINTS, action="append")
+    parser.add_argument("--cache", action="store_true")
+    args = parser.parse_args()
+
+    caches = {} if args.cache else {
+        "CACHES": {
+            "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+        }
+    }
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        with override_settings(**caches):
+            clients = seed(args.users, args.posts_per_user, args.follows_per_user)
+            results = {}
+            for name in args.endpoint or ENDPOINTS:
+                sync_path, async_path = ENDPOINTS[name]
+                results[name] = {
+                    "sync": asyncio.run(
+                        run(sync_path, clients, args.requests, args.concurrency)
+                    ),
+                    "async": asyncio.run(
+                        run(async_path, clients, args.requests, args.concurrency)
+                    ),
+                }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
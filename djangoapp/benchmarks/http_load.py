@@ -0,0 +1,191 @@
+# Measures requests per second and p99 latency of the HTTP server modes from
+# scripts/commands.sh, against the configured (already migrated) database
+# seeded by manage.py seed:
+#
+#   python manage.py seed --users 1000
+#   python -m benchmarks.http_load --modes dev,wsgi,asgi,wsgi-pool
+#
+# Requests are sent as the seeded user with the most posts; nothing is
+# written, and it refuses to run on a database without seeded users.
+# "dev" is the old setup (runserver, a new connection per request) and is
+# the baseline; the gunicorn modes keep persistent or pooled connections.
+# Each server is started on a free local port, loaded with keep-alive
+# clients from a thread pool, then stopped. Results are printed as JSON.
+# The gunicorn modes need a shared cache (CACHE_BACKEND=redis, see settings).
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "minitwitter.settings")
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+MODES = {
+    "dev": (
+        ["manage.py", "runserver", "--noreload"],
+        {"DB_CONN_MAX_AGE": "0"},
+    ),
+    "wsgi": (
+        ["-m", "gunicorn", "minitwitter.wsgi:application"],
+        {"SERVER_MODE": "wsgi"},
+    ),
+    "asgi": (
+        ["-m", "gunicorn", "minitwitter.asgi:application"],
+        {"SERVER_MODE": "asgi"},
+    ),
+    "wsgi-pool": (
+        ["-m", "gunicorn", "minitwitter.wsgi:application"],
+        {"SERVER_MODE": "wsgi", "DB_POOL": "1"},
+    ),
+}
+
+
+def get_token(prefix):
+    user = (
+        get_user_model()
+        .objects.filter(username__startswith=prefix)
+        .order_by("-profile__posts_count", "id")
+        .first()
+    )
+    if user is None:
+        raise SystemExit(
+            f"No users named {prefix}* in this database; seed a benchmark "
+            "database with manage.py seed first."
+        )
+    return str(AccessToken.for_user(user))
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, port, workers, threads):
+    args, env = MODES[mode]
+    env = {
+        **os.environ,
+        **env,
+        "ALLOWED_HOSTS": "127.0.0.1",
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        "GUNICORN_WORKERS": str(workers),
+        "GUNICORN_THREADS": str(threads),
+        "GUNICORN_ACCESS_LOG": "",
+    }
+    if mode == "dev":
+        args = [*args, f"127.0.0.1:{port}"]
+
+    server = subprocess.Popen(
+        [sys.executable, *args],
+        cwd=BASE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"{mode} server exited with {server.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+
+    server.terminate()
+    raise RuntimeError(f"{mode} server did not start on port {port}")
+
+
+def run(port, path, token, requests, concurrency):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    remaining = iter(range(requests))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def worker():
+        nonlocal errors
+        # Reconnects by itself when the server closes the connection
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                failed = response.status != 200
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                failed = True
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                errors += failed
+        connection.close()
+
+    workers = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modes", default="dev,wsgi,asgi")
+    parser.add_argument("--path", default="/post/")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument(
+        "--prefix", default="seed_user_", help="Username prefix of the seeded users."
+    )
+    args = parser.parse_args()
+
+    token = get_token(args.prefix)
+    results = {}
+    for mode in args.modes.split(","):
+        port = get_free_port()
+        server = start_server(mode, port, args.workers, args.threads)
+        try:
+            # Warm up workers and their database connections first
+            run(port, args.path, token, args.concurrency * 2, args.concurrency)
+            results[mode] = run(
+                port, args.path, token, args.requests, args.concurrency
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+# Mixed read/write workload over a synthetic power-law social graph,
+# driving the WSGI app in-process through Django's test client:
+#
+#   python -m benchmarks.load_test --users 2000 --requests 5000 \
+#       --mix feed=60,post_list=20,like=15,follow=5 --output results.json
+#
+# Seeds a throwaway test database built from the configured DB_ENGINE (see
+# utils.seeding), then reports per endpoint p50/p95/p99 latency,
+# throughput and SQL queries per request. The JSON output only depends on
+# the code and the arguments (apart from timings), so two releases can be
+# compared with a plain diff.
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "minitwitter.settings")
+# One log line per request would flood the report
+os.environ.setdefault("REQUEST_LOG_LEVEL", "WARNING")
+django.setup()
+
+from django.db import connection, connections  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from rest_framework_simplejwt.settings import api_settings  # noqa: E402
+from posts.models import PostModel  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+from users.models import Follow, Profile  # noqa: E402
+from utils.seeding import PowerLaw, SocialGraphSeeder  # noqa: E402
+
+DEFAULT_MIX = "feed=60,post_list=20,like=15,follow=5"
+MAX_PICK_ATTEMPTS = 100
+
+
+class Workload:
+    def __init__(self, alpha, seed):
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.user_ids = list(
+            Profile.objects.order_by("user_id").values_list("user_id", flat=True)
+        )
+        self.post_ids = list(
+            PostModel.objects.order_by("id").values_list("id", flat=True)
+        )
+        self.follows = set(Follow.objects.values_list("follower_id", "followee_id"))
+        self.likes = set(
+            PostModel.liked_by.through.objects.values_list("user_id", "postmodel_id")
+        )
+        self.popular_users = PowerLaw(self.user_ids, alpha, random.Random(seed))
+        self.tokens = {}
+
+    def get_token(self, user_id):
+        if user_id not in self.tokens:
+            token = AccessToken()
+            token[api_settings.USER_ID_CLAIM] = user_id
+            self.tokens[user_id] = str(token)
+        return self.tokens[user_id]
+
+    # Returns (kind, user_id, method, path, data) for the next request of a
+    # kind. Writes pick edges that do not exist yet, so they are expected to
+    # succeed; once MAX_PICK_ATTEMPTS users in a row already have the edge
+    # (the graph is saturated) a feed read is sent instead.
+    def next_request(self, kind):
+        with self.lock:
+            user_id = self.rng.choice(self.user_ids)
+            if kind == "feed":
+                return kind, user_id, "get", "/feed/", None
+            if kind == "post_list":
+                return kind, user_id, "get", "/post/", None
+            if kind == "like":
+                post_id = self.rng.choice(self.post_ids)
+                liker_id = self.pick_user(
+                    lambda liker_id: (liker_id, post_id) in self.likes
+                )
+                if liker_id is None:
+                    return "feed", user_id, "get", "/feed/", None
+                self.likes.add((liker_id, post_id))
+                return kind, liker_id, "post", "/post/like/", {"post_id": post_id}
+            if kind == "follow":
+                followee_id = self.popular_users.sample()
+                follower_id = self.pick_user(
+                    lambda follower_id: follower_id == followee_id
+                    or (follower_id, followee_id) in self.follows
+                )
+                if follower_id is None:
+                    return "feed", user_id, "get", "/feed/", None
+                self.follows.add((follower_id, followee_id))
+                return (
+                    kind,
+                    follower_id,
+                    "post",
+                    "/user/follow/",
+                    {"id_user_to_follow": followee_id},
+                )
+        raise ValueError(f"Unknown request kind: {kind}")
+
+    def pick_user(self, excluded):
+        for _ in range(MAX_PICK_ATTEMPTS):
+            user_id = self.rng.choice(self.user_ids)
+            if not excluded(user_id):
+                return user_id
+        return None
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        kind, weight = part.split("=")
+        weights[kind.strip()] = float(weight)
+    return weights
+
+
+def run(workload, mix, requests, concurrency, seed):
+    kinds = list(mix)
+    rng = random.Random(seed)
+    plan = rng.choices(kinds, weights=[mix[kind] for kind in kinds], k=requests)
+    remaining = iter(plan)
+    lock = threading.Lock()
+    samples = defaultdict(list)
+
+    def worker():
+        client = Client(raise_request_exception=False)
+        try:
+            for kind in remaining:
+                kind, user_id, method, path, data = workload.next_request(kind)
+                token = workload.get_token(user_id)
+                extra = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+                if data is not None:
+                    extra.update(data=data, content_type="application/json")
+
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = getattr(client, method)(path, **extra)
+                    elapsed = time.perf_counter() - started
+
+                with lock:
+                    samples[kind].append(
+                        (elapsed, len(queries), response.status_code < 400)
+                    )
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    results = {kind: summarize(samples[kind], elapsed) for kind in sorted(samples)}
+    results["total"] = summarize(
+        [sample for kind in samples for sample in samples[kind]], elapsed
+    )
+    return results
+
+
+def percentile(values, percent):
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(sample[0] * 1000 for sample in samples)
+    queries = [sample[1] for sample in samples]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if not sample[2]),
+        "throughput_rps": round(len(samples) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "queries_per_request": round(statistics.mean(queries), 2),
+        "max_queries": max(queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mixed read/write load test over a power-law social graph."
+    )
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--posts-per-user", type=int, default=10)
+    parser.add_argument("--follows-per-user", type=int, default=30)
+    parser.add_argument("--likes-per-user", type=int, default=20)
+    parser.add_argument("--alpha", type=float, default=1.0)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        concurrency = args.concurrency
+        if connection.vendor == "sqlite" and concurrency > 1:
+            # SQLite serializes writers; concurrent ones fail with "locked"
+            print("SQLite database: running with concurrency 1", file=sys.stderr)
+            concurrency = 1
+
+        started = time.perf_counter()
+        seed_summary = SocialGraphSeeder(
+            users=args.users,
+            posts_per_user=args.posts_per_user,
+            follows_per_user=args.follows_per_user,
+            likes_per_user=args.likes_per_user,
+            alpha=args.alpha,
+            seed=args.seed,
+        ).run()
+        seed_summary["seconds"] = round(time.perf_counter() - started, 2)
+
+        workload = Workload(args.alpha, args.seed)
+        run(workload, mix, args.warmup, concurrency, args.seed + 1)
+        endpoints = run(workload, mix, args.requests, concurrency, args.seed)
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    results = {
+        "config": {
+            **vars(args),
+            "concurrency": concurrency,
+            "database": connection.vendor,
+        },
+        "seed": seed_summary,
+        "endpoints": endpoints,
+    }
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class FeedConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'feed'
+
+    def ready(self) -> None:
+        import feed.signals  # noqa: F401
+        super().ready()
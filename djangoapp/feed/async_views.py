@@ -0,0 +1,43 @@
+from asgiref.sync import sync_to_async
+from posts.serializers import PostSerializer
+from utils.async_views import AsyncAPIView
+from utils.conditional import check_validators
+
+from feed.cache import (
+    get_cached_feed_etag,
+    get_cached_feed_page,
+    get_feed_page_key,
+    set_cached_feed_page,
+)
+from feed.pagination import FeedPagination
+from feed.timeline import get_feed_queryset
+
+
+# Async version of FeedView: same cache, ETags and cursor pages, with the
+# timeline read through the async ORM. Page-number mode is not supported.
+class AsyncFeedView(AsyncAPIView):
+    http_method_names = ["get"]
+
+    async def get(self, request, *args, **kwargs):
+        # The cache helpers may query the follow graph on a version miss
+        key = await sync_to_async(get_feed_page_key)(
+            request.user, request.build_absolute_uri()
+        )
+
+        etag = await sync_to_async(get_cached_feed_etag)(key)
+        response, _ = check_validators(request, etag, None)
+        if response is not None:
+            return response
+
+        cached_page = await sync_to_async(get_cached_feed_page)(key)
+        if cached_page is None:
+            paginator = FeedPagination()
+            page = await paginator.apaginate_queryset(
+                get_feed_queryset(request.user), request, view=self
+            )
+            serializer = PostSerializer(page, many=True, context={"request": request})
+            data = paginator.get_paginated_response(serializer.data).data
+            cached_page = await sync_to_async(set_cached_feed_page)(key, data)
+
+        _, headers = check_validators(request, cached_page["etag"], None)
+        return self.render(cached_page["data"], headers=headers)
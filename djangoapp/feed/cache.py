@@ -0,0 +1,107 @@
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from utils.conditional import make_etag
+
+from feed.timeline import get_pull_author_ids
+
+TIMELINE_VERSION_KEY = "feed:version:{user_id}"
+AUTHOR_VERSION_KEY = "feed:author:{author_id}"
+FEED_PAGE_KEY = "feed:page:{user_id}:{digest}"
+HITS_KEY = "feed:stats:hits"
+MISSES_KEY = "feed:stats:misses"
+
+
+# A user's timeline version is a random token stored with the IDs of the pull
+# authors they follow. Bumping a version just deletes it, so a bump costs one
+# delete_many no matter how many followers are invalidated. Versions are
+# bumped by the worker that handles the write and read by all the others, so
+# the cache has to be shared: the settings refuse a per-process cache in the
+# multi-worker server modes.
+def get_timeline_version(user):
+    key = TIMELINE_VERSION_KEY.format(user_id=user.pk)
+    version = cache.get(key)
+    if version is None:
+        version = {
+            "token": uuid.uuid4().hex,
+            "pull_author_ids": list(get_pull_author_ids(user)),
+        }
+        cache.set(key, version, settings.FEED_CACHE_VERSION_TIMEOUT)
+    return version
+
+
+def bump_timeline_versions(user_ids):
+    cache.delete_many(
+        [TIMELINE_VERSION_KEY.format(user_id=user_id) for user_id in user_ids]
+    )
+
+
+# Pull authors are never fanned out, so their followers' versions can not be
+# bumped one by one; instead each follower's page key includes their token
+def bump_author_version(author_id):
+    cache.set(
+        AUTHOR_VERSION_KEY.format(author_id=author_id),
+        uuid.uuid4().hex,
+        settings.FEED_CACHE_VERSION_TIMEOUT,
+    )
+
+
+def get_feed_page_key(user, url):
+    version = get_timeline_version(user)
+    author_keys = [
+        AUTHOR_VERSION_KEY.format(author_id=author_id)
+        for author_id in version["pull_author_ids"]
+    ]
+    author_versions = cache.get_many(author_keys)
+
+    parts = [version["token"], url] + [
+        f"{key}={author_versions.get(key, '')}" for key in author_keys
+    ]
+    digest = hashlib.sha256("|".join(parts).encode()).hexdigest()
+    return FEED_PAGE_KEY.format(user_id=user.pk, digest=digest)
+
+
+# Pages are cached with a strong ETag of their content, so conditional
+# requests are answered from the cache entry alone
+def get_cached_feed_page(key):
+    entry = cache.get(key)
+    record_lookup(hit=entry is not None)
+    return entry
+
+
+def get_cached_feed_etag(key):
+    entry = cache.get(key)
+    return entry["etag"] if entry else None
+
+
+def set_cached_feed_page(key, data):
+    entry = {
+        "data": data,
+        "etag": make_etag(json.dumps(data, sort_keys=True, default=str)),
+    }
+    cache.set(key, entry, settings.FEED_CACHE_TIMEOUT)
+    return entry
+
+
+def record_lookup(hit):
+    key = HITS_KEY if hit else MISSES_KEY
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, None)
+
+
+def get_cache_stats():
+    stats = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = stats.get(HITS_KEY, 0), stats.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": hits / lookups if lookups else None,
+    }
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from feed.cache import bump_timeline_versions
+from feed.timeline import get_authors_to_push, switch_to_push
+
+
+# Run it regularly (cron): pull authors who lost followers stay pulled until
+# then, so their followers keep seeing their posts
+class Command(BaseCommand):
+    help = "Fan out the posts of pull authors who lost followers again."
+
+    def handle(self, *args, **options):
+        author_ids = list(get_authors_to_push())
+        for author_id in author_ids:
+            bump_timeline_versions(switch_to_push(author_id))
+        self.stdout.write(f"Switched {len(author_ids)} authors to push.")
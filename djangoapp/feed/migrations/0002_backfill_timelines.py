@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count
+
+
+# Runs after users.0003_follow, so the edges it rebuilt from both sides of the
+# old graph get their timeline rows too. Pull authors are read at request
+# time and are skipped.
+def backfill_timelines(apps, schema_editor):
+    Follow = apps.get_model("users", "Follow")
+    PostModel = apps.get_model("posts", "PostModel")
+    TimelineEntry = apps.get_model("feed", "TimelineEntry")
+
+    push_author_ids = (
+        Follow.objects.values("followee_id")
+        .annotate(followers_count=Count("id"))
+        .filter(followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS)
+        .values_list("followee_id", flat=True)
+    )
+    for author_id in push_author_ids.order_by("followee_id").iterator():
+        follower_ids = list(
+            Follow.objects.filter(followee_id=author_id).values_list(
+                "follower_id", flat=True
+            )
+        )
+        recent_posts = PostModel.objects.filter(poster_user_id=author_id).order_by(
+            "-created_at", "-id"
+        )[: settings.FEED_TIMELINE_BACKFILL]
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(owner_id=owner_id, post_id=post_id, created_at=created_at)
+                for post_id, created_at in recent_posts.values_list("id", "created_at")
+                for owner_id in follower_ids
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0001_timelineentry'),
+        ('users', '0003_follow'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from posts.models import PostModel
+
+User = get_user_model()
+
+
+# Materialized timeline: one row per (follower, post) pushed at write time
+class TimelineEntry(models.Model):
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+    post = models.ForeignKey(
+        PostModel, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+    # Copied from the post so the timeline can be ordered without a join
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "post"], name="unique_timeline_entry"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["owner", "-created_at", "-post"], name="timeline_owner_recent_idx"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.owner_id} <- {self.post_id}"  # type: ignore
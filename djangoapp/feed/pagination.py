@@ -0,0 +1,60 @@
+from posts.models import PostModel
+from utils.pagination import KeysetPagination
+
+from feed.timeline import get_pull_author_ids, get_timeline_queryset
+
+
+# Walks the materialized timeline through its (owner, created_at, post) index
+# and merges in posts from pull authors, which are never fanned out
+class FeedPagination(KeysetPagination):
+    timeline_ordering = ("-created_at", "-post_id")
+
+    def fetch_page(self, queryset, position, reverse, ordering=None):
+        user = self.request.user
+
+        entries = super().fetch_page(
+            get_timeline_queryset(user), position, reverse, self.timeline_ordering
+        )
+        pulled_posts = []
+        pull_author_ids = list(get_pull_author_ids(user))
+        if pull_author_ids:
+            pulled_posts = super().fetch_page(
+                self.get_pulled_posts(user, pull_author_ids), position, reverse
+            )
+
+        return self.merge(entries, pulled_posts, reverse)
+
+    async def afetch_page(self, queryset, position, reverse, ordering=None):
+        user = self.request.user
+
+        entries = await super().afetch_page(
+            get_timeline_queryset(user), position, reverse, self.timeline_ordering
+        )
+        pulled_posts = []
+        pull_author_ids = [
+            author_id async for author_id in get_pull_author_ids(user)
+        ]
+        if pull_author_ids:
+            pulled_posts = await super().afetch_page(
+                self.get_pulled_posts(user, pull_author_ids), position, reverse
+            )
+
+        return self.merge(entries, pulled_posts, reverse)
+
+    def get_pulled_posts(self, user, pull_author_ids):
+        return PostModel.objects.filter(
+            poster_user__in=pull_author_ids
+        ).with_liked_by_me(user)
+
+    def merge(self, entries, pulled_posts, reverse):
+        posts = []
+        for entry in entries:
+            entry.post.liked_by_me = entry.liked_by_me
+            posts.append(entry.post)
+
+        if pulled_posts:
+            # Authors who crossed the threshold still have pushed entries
+            posts = list({post.pk: post for post in posts + pulled_posts}.values())
+            posts.sort(key=self.get_position, reverse=not reverse)
+
+        return posts[: self.page_size + 1]
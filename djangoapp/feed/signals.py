@@ -0,0 +1,66 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from posts.models import PostModel
+from posts.signals import post_liked, post_unliked
+from users.models import Follow
+from users.signals import users_followed
+
+from feed.cache import bump_author_version, bump_timeline_versions
+from feed.timeline import (
+    backfill_timeline,
+    backfill_timelines,
+    fan_out_post,
+    get_push_follower_ids,
+    remove_author_from_timeline,
+)
+
+
+# Edits leave the timelines as they are, so they look up no followers; a
+# cached page shows an edit within FEED_CACHE_TIMEOUT seconds
+@receiver(post_save, sender=PostModel)
+def push_post_to_timelines(sender, instance, created, **kwargs):
+    if created:
+        update_timelines(instance, fan_out=True)
+
+
+# The post's timeline rows go with the CASCADE on TimelineEntry.post
+@receiver(post_delete, sender=PostModel)
+def remove_post_from_timelines(sender, instance, **kwargs):
+    update_timelines(instance, fan_out=False)
+
+
+def update_timelines(post, fan_out):
+    follower_ids = get_push_follower_ids(post.poster_user_id)
+    if follower_ids is None:
+        bump_author_version(post.poster_user_id)
+        return
+
+    if fan_out:
+        fan_out_post(post, follower_ids)
+    bump_timeline_versions(follower_ids)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline_on_follow(sender, instance, created, **kwargs):
+    if created:
+        backfill_timeline(instance.follower_id, instance.followee_id)
+        bump_timeline_versions([instance.follower_id])
+
+
+@receiver(users_followed)
+def backfill_timeline_on_bulk_follow(sender, follower_id, followee_ids, **kwargs):
+    backfill_timelines(follower_id, followee_ids)
+    bump_timeline_versions([follower_id])
+
+
+@receiver(post_delete, sender=Follow)
+def clean_timeline_on_unfollow(sender, instance, **kwargs):
+    remove_author_from_timeline(instance.follower_id, instance.followee_id)
+    bump_timeline_versions([instance.follower_id])
+
+
+# liked_by_me is part of the cached page
+@receiver(post_liked)
+@receiver(post_unliked)
+def bump_timeline_on_like(sender, user_id, **kwargs):
+    bump_timeline_versions([user_id])
@@ -1,9 +1,23 @@
+import base64
+import io
 import json
+import os
+import subprocess
+import sys
 from datetime import datetime
 
+from django.conf import settings
+from django.core.management import call_command
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from feed.cache import get_cache_stats
+from feed.models import TimelineEntry
 from minitwitter.settings import REST_FRAMEWORK
 from rest_framework.routers import reverse
 from tests_base.base_test import BaseTest
+from users.models import Follow, Profile
 
 
 class TestsFeed(BaseTest):
@@ -46,13 +60,11 @@ class TestsFeed(BaseTest):
         content = json.loads(response.content.decode("utf-8"))
 
         # Get ids of all posts returned
-        all_post_user_ids = []
-        for i in range(0, content.get("count")):
-            all_post_user_ids.append(content.get("results")[i].get("poster_user"))
+        all_post_user_ids = [post.get("poster_user") for post in content.get("results")]
 
-        followed_user_ids = []
-        for user in user_a.profile.following.all():  # type: ignore
-            followed_user_ids.append(user.id)
+        followed_user_ids = list(
+            Follow.objects.filter(follower=user_a).values_list("followee_id", flat=True)
+        )
 
         for user_id in all_post_user_ids:
             self.assertIn(user_id, followed_user_ids)
@@ -125,9 +137,7 @@ class TestsFeed(BaseTest):
         content = json.loads(response.content.decode("utf-8"))
 
         # Extract the timestamps of the posts
-        post_timestamps = []
-        for i in range(0, content.get("count")):
-            post_timestamps.append(content.get("results")[i].get("created_at"))
+        post_timestamps = [post.get("created_at") for post in content.get("results")]
 
         # Converting to datetime
         datetimes = [datetime.fromisoformat(ts) for ts in post_timestamps]
@@ -166,3 +176,341 @@ class TestsFeed(BaseTest):
         )
 
         self.assertEqual(nums_of_page, len(response.data.get("results")))  # type: ignore
+
+    def test_feed_cursor_pagination_walks_all_posts_without_count(self):
+        user_a = self.create_user(
+            username="user_a", email="user_a@email.com", password="Abcd123!"
+        )
+        user_b = self.create_user(
+            username="user_b", email="user_b@email.com", password="Abcd123!"
+        )
+        token_user_a = self.create_token(user_a)
+
+        for i in range(25):
+            self.create_post(user_b, content=f"Post number: {i}")
+        self.follow(user_a, user_b)
+
+        seen_post_ids = []
+        url = reverse("feed:user-feed")
+        while url:
+            response = self.client.get(url, HTTP_AUTHORIZATION=f"Bearer {token_user_a}")
+            self.assertNotIn("count", response.data)  # type: ignore
+            seen_post_ids += [post.get("id") for post in response.data.get("results")]  # type: ignore
+            url = response.data.get("next")  # type: ignore
+
+        self.assertEqual(25, len(seen_post_ids))
+        self.assertEqual(sorted(seen_post_ids, reverse=True), seen_post_ids)
+
+    def test_feed_previous_cursor_returns_previous_page(self):
+        for i in range(15):
+            self.create_post(self.user_b, content=f"Post number: {i}")
+        self.follow(self.user_a, self.user_b)
+
+        first_page = self.client.get(
+            reverse("feed:user-feed"), HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}"
+        )
+        second_page = self.client.get(
+            first_page.data.get("next"),  # type: ignore
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+        previous_page = self.client.get(
+            second_page.data.get("previous"),  # type: ignore
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        self.assertEqual(
+            first_page.data.get("results"), previous_page.data.get("results")  # type: ignore
+        )
+
+    def test_feed_page_number_mode_is_opt_in(self):
+        self.follow(self.user_a, self.user_b)
+
+        response = self.client.get(
+            f"{reverse('feed:user-feed')}?pagination=page",
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        self.assertEqual(1, response.data.get("count"))  # type: ignore
+
+    def test_feed_status_404_for_invalid_cursor(self):
+        response = self.client.get(
+            f"{reverse('feed:user-feed')}?cursor=not-a-cursor",
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        self.assertEqual(404, response.status_code)
+
+    def test_feed_status_404_for_malformed_cursor_payload(self):
+        payloads = ['[]', '{"p": []}', '{"r": 0, "p": 1}', '{"r": 0, "p": ["x", "1"]}']
+        for payload in payloads:
+            with self.subTest(payload=payload):
+                cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+                response = self.client.get(
+                    f"{reverse('feed:user-feed')}?cursor={cursor}",
+                    HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+                )
+
+                self.assertEqual(404, response.status_code)
+
+
+class TestsFeedTimeline(BaseTest):
+    def setUp(self):
+        super().setUp()
+
+    def get_feed_post_ids(self, token):
+        response = self.client.get(
+            reverse("feed:user-feed"),
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        return [post.get("id") for post in response.data.get("results")]  # type: ignore
+
+    def test_new_post_is_pushed_to_followers_timeline(self):
+        self.follow(self.user_a, self.user_b)
+
+        post = self.create_post(self.user_b, "fresh post from user b")
+
+        self.assertTrue(
+            TimelineEntry.objects.filter(owner=self.user_a, post=post).exists()
+        )
+        self.assertIn(post.id, self.get_feed_post_ids(self.token_user_a))  # type: ignore
+
+    def test_following_backfills_recent_posts(self):
+        self.follow(self.user_a, self.user_b)
+
+        self.assertTrue(
+            TimelineEntry.objects.filter(owner=self.user_a, post=self.post_b).exists()
+        )
+
+    def test_unfollowing_removes_author_posts_from_timeline(self):
+        self.follow(self.user_a, self.user_b)
+        self.unfollow(self.user_a, self.user_b)
+
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.user_a).exists())
+        self.assertEqual([], self.get_feed_post_ids(self.token_user_a))
+
+    def test_deleted_post_is_removed_from_timeline(self):
+        self.follow(self.user_a, self.user_b)
+        post = self.create_post(self.user_b, "post to delete")
+
+        post.delete()
+
+        self.assertNotIn(post.pk, self.get_feed_post_ids(self.token_user_a))
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=0)
+    def test_posts_from_pull_authors_are_read_at_request_time(self):
+        self.follow(self.user_a, self.user_b)
+        post = self.create_post(self.user_b, "celebrity post")
+
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertIn(post.id, self.get_feed_post_ids(self.token_user_a))  # type: ignore
+
+    def test_post_edit_looks_up_no_followers(self):
+        self.follow(self.user_a, self.user_b)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.post_b.text_content = "edited post"
+            self.post_b.save()
+
+        follow_queries = [query for query in queries if "users_" in query["sql"]]
+        self.assertEqual([], follow_queries)
+
+    def is_pull_author(self, user):
+        return Profile.objects.get(user=user).pull_author
+
+    def switch_to_push(self):
+        output = io.StringIO()
+        call_command("switch_to_push", stdout=output)
+        return output.getvalue()
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=1, FEED_FANOUT_PUSH_FOLLOWERS=1)
+    def test_posts_of_pull_author_stay_in_feed_after_switch_to_push(self):
+        self.follow(self.user_a, self.user_b)
+        self.follow(self.user_c, self.user_b)
+        post = self.create_post(self.user_b, "post while pulled")
+        self.assertIn(post.id, self.get_feed_post_ids(self.token_user_a))  # type: ignore
+
+        # The unfollow writes no timeline rows; the author stays pulled
+        self.unfollow(self.user_c, self.user_b)
+        self.assertTrue(self.is_pull_author(self.user_b))
+        self.assertIn(post.id, self.get_feed_post_ids(self.token_user_a))  # type: ignore
+
+        self.assertIn("Switched 1 authors to push.", self.switch_to_push())
+        self.assertFalse(self.is_pull_author(self.user_b))
+        self.assertTrue(
+            TimelineEntry.objects.filter(owner=self.user_a, post=post).exists()
+        )
+        self.assertIn(post.id, self.get_feed_post_ids(self.token_user_a))  # type: ignore
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=1, FEED_FANOUT_PUSH_FOLLOWERS=0)
+    def test_author_near_the_limit_stays_pulled(self):
+        self.follow(self.user_a, self.user_b)
+        self.follow(self.user_c, self.user_b)
+
+        # Back to the limit, but not down to FEED_FANOUT_PUSH_FOLLOWERS
+        self.unfollow(self.user_c, self.user_b)
+        self.follow(self.user_c, self.user_b)
+        self.unfollow(self.user_c, self.user_b)
+
+        self.assertIn("Switched 0 authors to push.", self.switch_to_push())
+        self.assertTrue(self.is_pull_author(self.user_b))
+
+    def test_feed_merges_pushed_and_pulled_posts_in_order(self):
+        for i in range(8):
+            self.create_post(self.user_b, f"pushed post {i}")
+            self.create_post(self.user_c, f"pulled post {i}")
+        self.follow(self.user_a, self.user_b)
+
+        with override_settings(FEED_FANOUT_MAX_FOLLOWERS=0):
+            self.follow(self.user_a, self.user_c)
+
+            seen_post_ids = []
+            url = reverse("feed:user-feed")
+            while url:
+                response = self.client.get(
+                    url, HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}"
+                )
+                seen_post_ids += [post.get("id") for post in response.data.get("results")]  # type: ignore
+                url = response.data.get("next")  # type: ignore
+
+        self.assertEqual(18, len(seen_post_ids))
+        self.assertEqual(sorted(seen_post_ids, reverse=True), seen_post_ids)
+
+
+class TestsFeedCache(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.follow(self.user_a, self.user_b)
+
+    def get_feed(self):
+        return self.client.get(
+            reverse("feed:user-feed"), HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}"
+        )
+
+    def get_feed_post_ids(self):
+        return [post["id"] for post in self.get_feed().data["results"]]  # type: ignore
+
+    def test_unchanged_feed_is_served_from_cache(self):
+        self.get_feed()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.get_feed()
+
+        post_queries = [query for query in queries if "posts_postmodel" in query["sql"]]
+        self.assertEqual([], post_queries)
+        self.assertEqual(1, get_cache_stats()["hits"])
+        self.assertEqual(1, get_cache_stats()["misses"])
+
+    def test_post_from_followed_author_invalidates_feed(self):
+        self.get_feed()
+
+        post = self.create_post(self.user_b, "new post")
+
+        self.assertIn(post.id, self.get_feed_post_ids())  # type: ignore
+
+    def test_deleted_post_invalidates_feed(self):
+        self.get_feed()
+
+        self.post_b.delete()
+
+        self.assertEqual([], self.get_feed_post_ids())
+
+    def test_follow_and_unfollow_invalidate_feed(self):
+        self.get_feed()
+        self.follow(self.user_a, self.user_c)
+        self.assertIn(self.post_c.id, self.get_feed_post_ids())  # type: ignore
+
+        self.unfollow(self.user_a, self.user_c)
+        self.assertNotIn(self.post_c.id, self.get_feed_post_ids())  # type: ignore
+
+    def test_own_like_invalidates_feed(self):
+        self.get_feed()
+
+        self.client.post(
+            reverse("posts:posts-api-like-post"),
+            data={"post_id": self.post_b.id},  # type: ignore
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        self.assertTrue(self.get_feed().data["results"][0]["liked_by_me"])  # type: ignore
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=0)
+    def test_post_from_pull_author_invalidates_feed(self):
+        self.get_feed()
+
+        post = self.create_post(self.user_b, "celebrity post")
+
+        self.assertIn(post.id, self.get_feed_post_ids())  # type: ignore
+
+    def test_cache_stats_are_staff_only(self):
+        staff = self.create_super_user("staff", "staff@email.com", "Abcd123!")
+
+        response = self.client.get(
+            reverse("feed:feed-cache-stats"),
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+        self.assertEqual(403, response.status_code)
+
+        response = self.client.get(
+            reverse("feed:feed-cache-stats"),
+            HTTP_AUTHORIZATION=f"Bearer {self.create_token(staff)}",
+        )
+        self.assertEqual(200, response.status_code)
+        self.assertIn("hit_ratio", response.data)  # type: ignore
+
+    # Versions are bumped in the cache by whichever worker handles the write,
+    # so a worker with its own cache would keep serving stale pages
+    def test_multi_worker_modes_need_a_shared_cache(self):
+        for server_mode in ("wsgi", "asgi"):
+            with self.subTest(server_mode=server_mode):
+                result = self.load_settings(SERVER_MODE=server_mode)
+                self.assertNotEqual(0, result.returncode)
+                self.assertIn("needs a shared cache", result.stderr)
+
+                result = self.load_settings(
+                    SERVER_MODE=server_mode,
+                    CACHE_BACKEND="redis",
+                    CACHE_LOCATION="redis://localhost:6379/0",
+                )
+                self.assertEqual(0, result.returncode, result.stderr)
+
+    def load_settings(self, **environ):
+        env = {**os.environ, **environ}
+        if "CACHE_BACKEND" not in environ:
+            env.pop("CACHE_BACKEND", None)
+        return subprocess.run(
+            [sys.executable, "-c", "import minitwitter.settings"],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+
+
+class TestsFeedConditionalGet(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.follow(self.user_a, self.user_b)
+
+    def get_feed(self, **headers):
+        return self.client.get(
+            reverse("feed:user-feed"),
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+            **headers,
+        )
+
+    def test_feed_status_304_when_etag_matches(self):
+        etag = self.get_feed()["ETag"]
+
+        response = self.get_feed(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(b"", response.content)
+
+    def test_feed_status_200_after_followed_author_posts(self):
+        etag = self.get_feed()["ETag"]
+        self.create_post(self.user_b, "new post")
+
+        response = self.get_feed(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response["ETag"])
@@ -0,0 +1,159 @@
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef, Q, Window
+from django.db.models.functions import RowNumber
+from posts.models import PostModel
+from users.models import Follow, Profile
+
+from feed.models import TimelineEntry
+
+
+# Authors flagged on their profile (Profile.pull_author) are not fanned out
+# on write, their posts are pulled at read time instead
+def is_pull_author(author_id):
+    return Profile.objects.filter(user_id=author_id, pull_author=True).exists()
+
+
+def get_follower_ids(author_id):
+    return Follow.objects.filter(followee_id=author_id).values_list(
+        "follower_id", flat=True
+    )
+
+
+def get_pull_author_ids(user):
+    followee_ids = Follow.objects.filter(follower=user).values("followee_id")
+    return Profile.objects.filter(
+        user_id__in=followee_ids, pull_author=True
+    ).values_list("user_id", flat=True)
+
+
+# Followers whose timelines receive the author's posts, None for pull authors
+def get_push_follower_ids(author_id):
+    if is_pull_author(author_id):
+        return None
+    return list(get_follower_ids(author_id))
+
+
+def fan_out_post(post, follower_ids):
+    entries = [
+        TimelineEntry(owner_id=follower_id, post=post, created_at=post.created_at)
+        for follower_id in follower_ids
+    ]
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=settings.FEED_FANOUT_BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def backfill_timeline(owner_id, author_id):
+    if is_pull_author(author_id):
+        return
+
+    recent_posts = PostModel.objects.filter(poster_user_id=author_id).order_by(
+        "-created_at", "-id"
+    )[: settings.FEED_TIMELINE_BACKFILL]
+    entries = [
+        TimelineEntry(owner_id=owner_id, post_id=post_id, created_at=created_at)
+        for post_id, created_at in recent_posts.values_list("id", "created_at")
+    ]
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=settings.FEED_FANOUT_BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+# backfill_timeline for many followed authors at once: one query reads the
+# newest posts of each push author, one inserts them
+def backfill_timelines(owner_id, author_ids):
+    push_author_ids = Profile.objects.filter(
+        user_id__in=author_ids, pull_author=False
+    ).values("user_id")
+    recent_posts = (
+        PostModel.objects.filter(poster_user_id__in=push_author_ids)
+        .annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=F("poster_user_id"),
+                order_by=[F("created_at").desc(), F("id").desc()],
+            )
+        )
+        .filter(position__lte=settings.FEED_TIMELINE_BACKFILL)
+    )
+    entries = [
+        TimelineEntry(owner_id=owner_id, post_id=post_id, created_at=created_at)
+        for post_id, created_at in recent_posts.values_list("id", "created_at")
+    ]
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=settings.FEED_FANOUT_BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+# A pull author goes back to push once they are down to
+# FEED_FANOUT_PUSH_FOLLOWERS followers, well below FEED_FANOUT_MAX_FOLLOWERS,
+# so an account near the threshold does not switch with every follow. The
+# posts written while pulled were never fanned out: outside of requests
+# (manage.py switch_to_push), the newest FEED_SWITCH_BACKFILL of them are
+# copied into each follower's timeline while the author is still pulled, then
+# the author is pushed again.
+def get_authors_to_push():
+    return Profile.objects.filter(
+        pull_author=True, followers_count__lte=settings.FEED_FANOUT_PUSH_FOLLOWERS
+    ).values_list("user_id", flat=True)
+
+
+# Returns the followers whose timelines changed
+def switch_to_push(author_id):
+    follower_ids = list(get_follower_ids(author_id))
+    recent_posts = list(
+        PostModel.objects.filter(poster_user_id=author_id)
+        .order_by("-created_at", "-id")
+        .values_list("id", "created_at")[: settings.FEED_SWITCH_BACKFILL]
+    )
+    batch_size = settings.FEED_FANOUT_BATCH_SIZE
+    for start in range(0, len(follower_ids), batch_size):
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(owner_id=owner_id, post_id=post_id, created_at=created_at)
+                for owner_id in follower_ids[start : start + batch_size]
+                for post_id, created_at in recent_posts
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+
+    Profile.objects.filter(user_id=author_id).update(pull_author=False)
+    # Posts written during the backfill saw the author as pulled
+    newest_id = max((post_id for post_id, _ in recent_posts), default=0)
+    new_posts = PostModel.objects.filter(poster_user_id=author_id, id__gt=newest_id)
+    for post in new_posts.only("id", "created_at"):
+        fan_out_post(post, follower_ids)
+    return follower_ids
+
+
+def remove_author_from_timeline(owner_id, author_id):
+    TimelineEntry.objects.filter(
+        owner_id=owner_id, post__poster_user_id=author_id
+    ).delete()
+
+
+def get_timeline_queryset(user):
+    return (
+        TimelineEntry.objects.filter(owner=user)
+        .select_related("post")
+        .annotate(
+            liked_by_me=Exists(
+                PostModel.liked_by.through.objects.filter(
+                    postmodel=OuterRef("post_id"), user_id=user.pk
+                )
+            )
+        )
+    )
+
+
+def get_feed_queryset(user):
+    pushed_posts = TimelineEntry.objects.filter(owner=user).values("post_id")
+
+    return (
+        PostModel.objects.filter(
+            Q(pk__in=pushed_posts) | Q(poster_user__in=get_pull_author_ids(user))
+        )
+        .with_liked_by_me(user)
+        .order_by("-created_at", "-id")
+    )
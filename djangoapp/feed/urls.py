@@ -1,7 +1,10 @@
 from django.urls import path
 
-from feed.views import FeedView
+from feed.views import FeedCacheStatsView, FeedView
 
 app_name = "feed"
 
-urlpatterns = [path("", FeedView.as_view(), name="user-feed")]
+urlpatterns = [
+    path("", FeedView.as_view(), name="user-feed"),
+    path("cache-stats/", FeedCacheStatsView.as_view(), name="feed-cache-stats"),
+]
@@ -1,36 +1,71 @@
-from posts.models import PostModel
+from django.utils.cache import quote_etag
 from posts.serializers import PostSerializer
 from rest_framework import status
 from rest_framework.generics import ListAPIView
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from utils.conditional import conditional_view
+
+from feed.cache import (
+    get_cache_stats,
+    get_cached_feed_etag,
+    get_cached_feed_page,
+    get_feed_page_key,
+    set_cached_feed_page,
+)
+from feed.pagination import FeedPagination
+from feed.timeline import get_feed_queryset
 
 
 class FeedView(ListAPIView):
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = PageNumberPagination
+    pagination_class = FeedPagination
     http_method_names = ["get"]
     
 
     def get_queryset(self):
-        user = self.request.user
-        following_users = user.profile.following.all().values_list("user", flat=True)  # type: ignore
+        return get_feed_queryset(self.request.user)
 
-        return PostModel.objects.filter(poster_user__in=following_users).order_by(
-            "-created_at"
-        )
+    def get_cache_key(self):
+        if not hasattr(self, "cache_key"):
+            self.cache_key = get_feed_page_key(
+                self.request.user, self.request.build_absolute_uri()
+            )
+        return self.cache_key
+
+    def get_validators(self, request, *args, **kwargs):
+        return get_cached_feed_etag(self.get_cache_key()), None
 
+    @conditional_view(get_validators)
     def list(self, request, *args, **kwargs):
+        cached_page = get_cached_feed_page(self.get_cache_key())
+        if cached_page is not None:
+            return Response(
+                cached_page["data"], headers={"ETag": quote_etag(cached_page["etag"])}
+            )
+
         queryset = self.get_queryset()
         
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            response = self.get_paginated_response(serializer.data)
+            cached_page = set_cached_feed_page(self.get_cache_key(), response.data)
+            response["ETag"] = quote_etag(cached_page["etag"])
+            return response
 
         return Response(
             {"detail": "No posts found from users you are following."},
             status=status.HTTP_200_OK,
-        )
\ No newline at end of file
+        )
+
+
+# Hit / miss counters of the feed page cache, to size the cache backend
+class FeedCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+    http_method_names = ["get"]
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_cache_stats())
@@ -0,0 +1,27 @@
+# Gunicorn settings for the production server modes of scripts/commands.sh.
+# Loaded automatically when gunicorn is started from this directory.
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+# wsgi: threaded sync workers; asgi: uvicorn event-loop workers. The
+# settings read it too, and refuse a per-process cache for several workers.
+os.environ.setdefault("SERVER_MODE", "wsgi")
+if os.environ["SERVER_MODE"] == "asgi":
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    worker_class = "gthread"
+
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Recycle workers now and then so a leak can not grow forever
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+
+# Set GUNICORN_ACCESS_LOG to an empty value to turn the access log off
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = "-"
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'minitwitter.settings')
+# However it is started, the ASGI app runs without persistent DB connections
+os.environ.setdefault('SERVER_MODE', 'asgi')
 
 application = get_asgi_application()
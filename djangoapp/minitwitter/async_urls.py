@@ -0,0 +1,19 @@
+from django.urls import path
+from feed.async_views import AsyncFeedView
+from posts.async_views import (
+    AsyncDislikePostView,
+    AsyncLikePostView,
+    AsyncPostDetailView,
+    AsyncPostListView,
+)
+
+app_name = "async"
+
+# Native async versions of the hottest endpoints, served under /async/
+urlpatterns = [
+    path("feed/", AsyncFeedView.as_view(), name="user-feed"),
+    path("post/", AsyncPostListView.as_view(), name="posts-list"),
+    path("post/like/", AsyncLikePostView.as_view(), name="posts-like"),
+    path("post/dislike/", AsyncDislikePostView.as_view(), name="posts-dislike"),
+    path("post/<int:pk>/", AsyncPostDetailView.as_view(), name="posts-detail"),
+]
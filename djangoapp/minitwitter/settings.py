@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR.parent / "data" / "web"
@@ -47,9 +49,12 @@ INSTALLED_APPS = [
     "users",
     "posts",
     "feed",
+    "profiling",
+    "trending",
 ]
 
 MIDDLEWARE = [
+    "utils.instrumentation.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -57,6 +62,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "profiling.middleware.ProfilerMiddleware",
 ]
 
 ROOT_URLCONF = "minitwitter.urls"
@@ -92,9 +98,71 @@ DATABASES = {
         "HOST": os.getenv("POSTGRES_HOST", "psql"),
         "PORT": os.getenv("POSTGRES_PORT", "5432"),
         "TEST": {"NAME": "test_" + os.getenv("POSTGRES_DB", "change-me")},
+        # Keep connections open between requests instead of reconnecting on
+        # every request; a stale connection is pinged before it is reused
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": bool(int(os.getenv("DB_CONN_HEALTH_CHECKS", 1))),
+    }
+}
+
+# Optional psycopg 3 connection pool, one per worker process. Pooled
+# connections are returned to the pool after each request, so the
+# persistent connections above are turned off.
+if bool(int(os.getenv("DB_POOL", 0))):
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            "timeout": int(os.getenv("DB_POOL_TIMEOUT", 10)),
+        }
+    }
+
+# Under ASGI, connections are opened per thread and async context and
+# persistent ones are never closed, so they leak; that mode always closes
+# them after each request (use DB_POOL=1 to reuse them)
+if os.getenv("SERVER_MODE") == "asgi":
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Local memory by default, which is only seen by its own process (runserver,
+# tests). CACHE_BACKEND=redis with CACHE_LOCATION=redis://host:6379/0 (or
+# any backend's dotted path) shares it between processes.
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+PROCESS_LOCAL_CACHE_BACKENDS = [
+    CACHE_BACKENDS["locmem"],
+    "django.core.cache.backends.dummy.DummyCache",
+]
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS.get(
+            os.getenv("CACHE_BACKEND", "locmem"), os.getenv("CACHE_BACKEND")
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
     }
 }
 
+# Feed timeline versions, cached users, the profiler's rate limit and the
+# trending buffer are kept in the cache, and every worker has to see the
+# same entries: the multi-worker server modes do not start without a shared
+# cache
+if (
+    os.getenv("SERVER_MODE") in ("wsgi", "asgi")
+    and CACHES["default"]["BACKEND"] in PROCESS_LOCAL_CACHE_BACKENDS
+):
+    raise ImproperlyConfigured(
+        "SERVER_MODE={} runs several worker processes and needs a shared "
+        "cache; set CACHE_BACKEND=redis and CACHE_LOCATION.".format(
+            os.getenv("SERVER_MODE")
+        )
+    )
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -138,6 +206,15 @@ MEDIA_URL = "/media/"
 # /data/web/media
 MEDIA_ROOT = DATA_DIR / "media"
 
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+    },
+    # Post images and their variants, deduplicated by content under MEDIA_ROOT
+    "post_images": {"BACKEND": "posts.storage.ContentAddressedStorage"},
+}
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -146,7 +223,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
@@ -164,6 +241,127 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Authenticated users (with their profile) are cached this many seconds
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv("AUTH_USER_CACHE_TIMEOUT", "60"))
+
+# Feed timelines are materialized on write (fan-out), except for authors with
+# more followers than FEED_FANOUT_MAX_FOLLOWERS, whose posts are pulled at read.
+# They are fanned out again once down to FEED_FANOUT_PUSH_FOLLOWERS, by
+# manage.py switch_to_push, which backfills FEED_SWITCH_BACKFILL of their
+# posts into each follower's timeline.
+FEED_FANOUT_MAX_FOLLOWERS = int(os.getenv("FEED_FANOUT_MAX_FOLLOWERS", "10000"))
+FEED_FANOUT_PUSH_FOLLOWERS = int(
+    os.getenv("FEED_FANOUT_PUSH_FOLLOWERS", str(FEED_FANOUT_MAX_FOLLOWERS // 2))
+)
+FEED_SWITCH_BACKFILL = int(os.getenv("FEED_SWITCH_BACKFILL", "20"))
+FEED_FANOUT_BATCH_SIZE = int(os.getenv("FEED_FANOUT_BATCH_SIZE", "1000"))
+# How many recent posts are copied into a timeline when following someone
+FEED_TIMELINE_BACKFILL = int(os.getenv("FEED_TIMELINE_BACKFILL", "200"))
+
+# Cached feed pages live FEED_CACHE_TIMEOUT seconds at most; they are
+# invalidated earlier through per-user timeline versions
+FEED_CACHE_TIMEOUT = int(os.getenv("FEED_CACHE_TIMEOUT", "60"))
+FEED_CACHE_VERSION_TIMEOUT = int(os.getenv("FEED_CACHE_VERSION_TIMEOUT", "3600"))
+
+# Uploaded post images are re-encoded without metadata and resized to these
+# widths (WebP plus a JPEG fallback) by POST_IMAGE_WORKERS background threads
+# per process; 0 workers processes them inline. When more than
+# POST_IMAGE_QUEUE_SIZE images are waiting, the request thread does the work.
+POST_IMAGE_VARIANT_WIDTHS = [
+    int(width)
+    for width in os.getenv("POST_IMAGE_VARIANT_WIDTHS", "150,600,1200").split(",")
+]
+POST_IMAGE_QUALITY = int(os.getenv("POST_IMAGE_QUALITY", "80"))
+POST_IMAGE_MAX_PIXELS = int(os.getenv("POST_IMAGE_MAX_PIXELS", "40000000"))
+POST_IMAGE_WORKERS = int(os.getenv("POST_IMAGE_WORKERS", "2"))
+POST_IMAGE_QUEUE_SIZE = int(os.getenv("POST_IMAGE_QUEUE_SIZE", "100"))
+# Unreferenced image files younger than this are left to collect_post_blobs
+POST_IMAGE_BLOB_GRACE = int(os.getenv("POST_IMAGE_BLOB_GRACE", "60"))
+# Uploads waiting to be processed, with their metadata; never served
+POST_IMAGE_PENDING_ROOT = DATA_DIR / "uploads"
+
+# Trending posts and hashtags rank engagement (posts and likes, weighted as
+# below) with exponential time decay; each window is the half-life of an
+# event's weight, in seconds. The best TRENDING_TOP_K items of each window are
+# kept in the cache and TRENDING_SIZE of them are served.
+TRENDING_WINDOWS = {"hour": 3600, "day": 86400, "week": 604800}
+TRENDING_DEFAULT_WINDOW = "day"
+TRENDING_POST_WEIGHT = float(os.getenv("TRENDING_POST_WEIGHT", "1"))
+TRENDING_LIKE_WEIGHT = float(os.getenv("TRENDING_LIKE_WEIGHT", "1"))
+TRENDING_TOP_K = int(os.getenv("TRENDING_TOP_K", "100"))
+TRENDING_SIZE = int(os.getenv("TRENDING_SIZE", "20"))
+TRENDING_CACHE_TIMEOUT = int(os.getenv("TRENDING_CACHE_TIMEOUT", "300"))
+# Likes and new posts are buffered in the cache and scored in batches of
+# TRENDING_FLUSH_BATCH_SIZE: by manage.py flush_trending, and by one trending
+# request at most every TRENDING_FLUSH_INTERVAL seconds
+TRENDING_FLUSH_INTERVAL = int(os.getenv("TRENDING_FLUSH_INTERVAL", "30"))
+TRENDING_FLUSH_BATCH_SIZE = int(os.getenv("TRENDING_FLUSH_BATCH_SIZE", "500"))
+TRENDING_BUFFER_TIMEOUT = int(os.getenv("TRENDING_BUFFER_TIMEOUT", "3600"))
+
+# Most accounts one POST /user/follow/bulk/ can follow
+BULK_FOLLOW_MAX_USERS = int(os.getenv("BULK_FOLLOW_MAX_USERS", "500"))
+
+# Most accounts one staff POST /user/bulk/ can create
+BULK_CREATE_MAX_USERS = int(os.getenv("BULK_CREATE_MAX_USERS", "100"))
+
+# "Who to follow" keeps the best SUGGESTIONS_SIZE accounts of each user; the
+# offline run (manage.py compute_suggestions) handles SUGGESTIONS_BATCH_SIZE
+# users per transaction
+SUGGESTIONS_SIZE = int(os.getenv("SUGGESTIONS_SIZE", "20"))
+SUGGESTIONS_BATCH_SIZE = int(os.getenv("SUGGESTIONS_BATCH_SIZE", "1000"))
+
+# Each request reports its SQL queries and timings in a Server-Timing header
+# and a log line; it logs a warning when it runs more queries than the budget
+# of its endpoint (URL name, e.g. "posts:posts-api-list", optionally prefixed
+# with the method: "POST posts:posts-api-list"). Budgets are the worst cases
+# measured, counting the on-commit callbacks the request runs: the feed with
+# pull authors' posts merged in, and (un)follow with the suggestion updates.
+REQUEST_SERVER_TIMING = bool(int(os.getenv("REQUEST_SERVER_TIMING", "1")))
+REQUEST_QUERY_BUDGET = int(os.getenv("REQUEST_QUERY_BUDGET", "10"))
+REQUEST_QUERY_BUDGETS = {
+    "POST posts:posts-api-list": 15,
+    "PATCH posts:posts-api-detail": 20,
+    "DELETE posts:posts-api-detail": 15,
+    "DELETE users:users-api-detail": 30,
+    "POST users:users-api-follow": 13,
+    "POST users:users-api-unfollow": 13,
+    "POST users:users-api-bulk-follow": 15,
+    "feed:user-feed": 6,
+    "async:user-feed": 6,
+    "posts:posts-api-likers": 4,
+    "tags:tag-posts": 3,
+    "users:users-api-mentions": 4,
+    "trending:trending": 11,
+    "users:users-api-followers": 4,
+    "users:users-api-following": 4,
+}
+
+# Staff users can profile a request by sending the PROFILER_HEADER header
+# ("inline" returns the report instead of the response). At most
+# PROFILER_RATE_LIMIT requests are profiled per PROFILER_RATE_PERIOD seconds
+# across all workers (counted in the shared cache) and the last
+# PROFILER_MAX_REPORTS reports are kept.
+PROFILER_HEADER = "X-Profile"
+PROFILER_RATE_LIMIT = int(os.getenv("PROFILER_RATE_LIMIT", "5"))
+PROFILER_RATE_PERIOD = int(os.getenv("PROFILER_RATE_PERIOD", "60"))
+PROFILER_MAX_REPORTS = int(os.getenv("PROFILER_MAX_REPORTS", "100"))
+PROFILER_REPORT_LINES = int(os.getenv("PROFILER_REPORT_LINES", "60"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "utils.instrumentation": {
+            "handlers": ["console"],
+            "level": os.getenv(
+                "REQUEST_LOG_LEVEL", "WARNING" if os.getenv("TESTING") else "INFO"
+            ),
+            "propagate": False,
+        },
+    },
+}
+
 SWAGGER_SETTINGS = {
     "SECURITY_DEFINITIONS": {
         "Bearer": {
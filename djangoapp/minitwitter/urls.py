@@ -1,11 +1,12 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from utils.media import serve_immutable
 
 # Configuração do Swagger
 schema_view = get_schema_view(
@@ -32,10 +33,20 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("user/", include(("users.urls"), namespace="users")),
     path("post/", include(("posts.urls"), namespace="posts")),
+    path("tag/", include(("posts.tag_urls"), namespace="tags")),
     path("feed/", include(("feed.urls"), namespace="feed")),
+    path("trending/", include(("trending.urls"), namespace="trending")),
+    path("async/", include(("minitwitter.async_urls"), namespace="async")),
     path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
 ]
 
 if settings.DEBUG:
+    urlpatterns += [
+        re_path(
+            rf"^{settings.MEDIA_URL.strip('/')}/(?P<path>blobs/.*)$",
+            serve_immutable,
+            {"document_root": settings.MEDIA_ROOT},
+        )
+    ]
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
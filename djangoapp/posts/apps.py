@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PostsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'posts'
+
+    def ready(self) -> None:
+        import posts.signals  # noqa: F401
+        super().ready()
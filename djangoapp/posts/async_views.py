@@ -0,0 +1,80 @@
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from rest_framework.exceptions import PermissionDenied
+from utils.async_views import AsyncAPIView
+from utils.conditional import check_validators, make_etag
+from utils.pagination import KeysetPagination
+
+from posts import likes
+from posts.models import PostModel
+from posts.serializers import DislikeSerializer, LikeSerializer, PostSerializer
+
+
+# Async versions of the PostViewSet list, retrieve, like and dislike actions.
+# Responses, permissions and validators match the sync views.
+class AsyncPostListView(AsyncAPIView):
+    http_method_names = ["get"]
+
+    async def get(self, request, *args, **kwargs):
+        queryset = PostModel.objects.all()
+        if not request.user.is_staff:
+            queryset = queryset.filter(poster_user=request.user.id)
+
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(
+            queryset.with_liked_by_me(request.user), request, view=self
+        )
+        serializer = PostSerializer(page, many=True, context={"request": request})
+        return self.render(paginator.get_paginated_response(serializer.data).data)
+
+
+class AsyncPostDetailView(AsyncAPIView):
+    http_method_names = ["get"]
+
+    async def get(self, request, *args, **kwargs):
+        post = (
+            await PostModel.objects.with_liked_by_me(request.user)
+            .filter(pk=kwargs.get("pk"))
+            .afirst()
+        )
+        if post is None:
+            raise Http404
+        if request.user.id != post.poster_user_id:
+            raise PermissionDenied("You do not have permission to perform this action.")
+
+        etag = make_etag(
+            kwargs.get("pk"),
+            post.updated_at.isoformat(),
+            post.likes_counter,
+            post.liked_by_me,
+        )
+        response, headers = check_validators(request, etag, post.updated_at)
+        if response is not None:
+            return response
+
+        serializer = PostSerializer(post, context={"request": request})
+        return self.render(serializer.data, headers=headers)
+
+
+# The like transaction runs in a worker thread: the async ORM can not be used
+# inside transaction.atomic
+class AsyncLikePostView(AsyncAPIView):
+    http_method_names = ["post"]
+    serializer_class = LikeSerializer
+    like = staticmethod(likes.like_post)
+    message = "Post liked successfully."
+
+    async def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        await sync_to_async(self.like)(
+            serializer.validated_data["post_id"], request.user.pk
+        )
+        return self.render({"message": self.message})
+
+
+class AsyncDislikePostView(AsyncLikePostView):
+    serializer_class = DislikeSerializer
+    like = staticmethod(likes.dislike_post)
+    message = "Post disliked successfully."
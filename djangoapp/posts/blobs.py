@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from posts.models import MediaBlob, PostModel
+
+
+def get_storage():
+    return PostModel._meta.get_field("image").storage
+
+
+def acquire_blobs(names):
+    for name in names:
+        # The row may be collected between the two queries; then try again
+        while True:
+            _, created = MediaBlob.objects.get_or_create(
+                name=name, defaults={"refcount": 1}
+            )
+            if created or MediaBlob.objects.filter(name=name).update(
+                refcount=F("refcount") + 1
+            ):
+                break
+
+
+def release_blobs(names):
+    if not names:
+        return
+    MediaBlob.objects.filter(name__in=names, refcount__gt=0).update(
+        refcount=F("refcount") - 1
+    )
+    names = list(names)
+    transaction.on_commit(lambda: collect_blobs(names))
+
+
+# Deletes the files that no post references any more. An upload that finds
+# its blob already stored touches the file before acquiring it, so a blob
+# modified after its row was created, within the last POST_IMAGE_BLOB_GRACE
+# seconds, is left for a later collect_post_blobs run instead.
+def collect_blobs(names):
+    storage = get_storage()
+    grace_start = timezone.now() - timezone.timedelta(
+        seconds=settings.POST_IMAGE_BLOB_GRACE
+    )
+    for name in names:
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+            if blob is not None and blob.refcount > 0:
+                continue
+            if storage.exists(name):
+                modified_at = storage.get_modified_time(name)
+                if modified_at > grace_start and (
+                    blob is None or modified_at > blob.created_at
+                ):
+                    continue
+            if blob is not None:
+                blob.delete()
+            storage.delete(name)
@@ -0,0 +1,175 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+from rest_framework.exceptions import ValidationError
+
+from posts.blobs import collect_blobs
+from posts.models import PostModel
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_FORMATS = {"JPEG", "PNG", "WEBP", "GIF"}
+VARIANT_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+VARIANTS_DIR = "posts/variants"
+
+_executor = None
+_executor_lock = threading.Lock()
+_queue_slots = None
+
+
+# Only reads the header, so it is cheap enough for the request thread.
+# Django's ImageField has already checked that Pillow can open the file.
+def validate_image(file):
+    position = file.tell()
+    try:
+        with Image.open(file) as image:
+            image_format = image.format
+            width, height = image.size
+    except Image.DecompressionBombError:
+        raise ValidationError("Image is too large.")
+    except (OSError, ValueError, TypeError):
+        raise ValidationError("Upload a valid image.")
+    finally:
+        file.seek(position)
+
+    if image_format not in ALLOWED_FORMATS:
+        raise ValidationError(f"Unsupported image format: {image_format}.")
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError("Image is too large.")
+
+
+# Background pool shared by the process, created on first use so each
+# gunicorn worker gets its own threads after the fork
+def get_executor():
+    global _executor, _queue_slots
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.POST_IMAGE_WORKERS,
+                thread_name_prefix="post-images",
+            )
+            _queue_slots = threading.BoundedSemaphore(settings.POST_IMAGE_QUEUE_SIZE)
+    return _executor
+
+
+def schedule_image_processing(post_id, name):
+    if settings.POST_IMAGE_WORKERS <= 0:
+        process_post_image(post_id, name)
+        return
+
+    executor = get_executor()
+    # A full queue pushes back on the uploader instead of growing forever
+    if not _queue_slots.acquire(blocking=False):
+        process_post_image(post_id, name)
+        return
+
+    def run():
+        try:
+            close_old_connections()
+            process_post_image(post_id, name)
+        except Exception:
+            logger.exception("Processing image %s of post %s failed", name, post_id)
+        finally:
+            close_old_connections()
+            _queue_slots.release()
+
+    executor.submit(run)
+
+
+# Re-encodes the original without metadata, writes the size variants and
+# stores them on the post, unless its image was replaced in the meantime
+def process_post_image(post_id, name):
+    post = PostModel.objects.filter(pk=post_id).first()
+    if post is None or post.image.name != name:
+        return
+
+    storage = post.image.storage
+    with storage.open(name) as file, Image.open(file) as image:
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+        icc_profile = image.info.get("icc_profile")
+        original = encode(image, image_format, icc_profile)
+        variants = build_variants(storage, name, image, icc_profile)
+
+    # Stored as a public blob, unlike the pending upload
+    sanitized_name = storage.save(os.path.basename(name), ContentFile(original))
+    image_variants = {"source": sanitized_name, **variants}
+
+    # The row is locked and checked again, since the image may have been
+    # replaced while this one was processed. Saving releases the upload and
+    # the previous variants (posts.signals).
+    with transaction.atomic():
+        post = (
+            PostModel.objects.select_for_update().filter(pk=post_id, image=name).first()
+        )
+        if post is not None:
+            post.image.name = sanitized_name
+            post.image_variants = image_variants
+            post.save(update_fields=["image", "image_variants", "updated_at"])
+    if post is None:
+        collect_blobs([sanitized_name, *get_variant_names(image_variants)])
+
+
+def build_variants(storage, name, image, icc_profile):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    variants = {key: {} for key in VARIANT_FORMATS}
+
+    for width in sorted(settings.POST_IMAGE_VARIANT_WIDTHS):
+        width = min(width, image.width)
+        descriptor = f"{width}w"
+        if descriptor in variants["webp"]:
+            continue
+
+        resized = image.copy()
+        resized.thumbnail((width, image.height))
+        for key, image_format in VARIANT_FORMATS.items():
+            variants[key][descriptor] = storage.save(
+                f"{VARIANTS_DIR}/{stem}-{descriptor}.{key}",
+                ContentFile(encode(resized, image_format, icc_profile)),
+            )
+
+    return variants
+
+
+# Animated GIFs keep only their first frame
+def encode(image, image_format, icc_profile=None):
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = flatten(image)
+    elif image.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+        image = image.convert("RGBA")
+
+    options = {"format": image_format}
+    if image_format in ("JPEG", "WEBP"):
+        options["quality"] = settings.POST_IMAGE_QUALITY
+    if image_format == "JPEG":
+        options["optimize"] = True
+    if icc_profile:
+        options["icc_profile"] = icc_profile
+
+    # EXIF, XMP and text chunks are only written when passed explicitly
+    buffer = io.BytesIO()
+    image.save(buffer, **options)
+    return buffer.getvalue()
+
+
+def flatten(image):
+    image = image.convert("RGBA")
+    background = Image.new("RGB", image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel("A"))
+    return background
+
+
+def get_variant_names(image_variants):
+    return [
+        variant_name
+        for key in VARIANT_FORMATS
+        for variant_name in image_variants.get(key, {}).values()
+    ]
+
@@ -0,0 +1,51 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Now
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from rest_framework.exceptions import ValidationError
+
+from posts.models import PostModel
+from posts.signals import post_liked, post_unliked
+
+
+# Like and dislike both lock the post row first with a database-side
+# counter update, then touch the like edge, whose (post, user) unique
+# constraint rejects duplicates. Two statements, no lost updates.
+def like_post(post_id, user_id):
+    try:
+        with transaction.atomic():
+            updated = PostModel.objects.filter(pk=post_id).update(
+                likes_counter=F("likes_counter") + 1, updated_at=Now()
+            )
+            if not updated:
+                raise Http404("No PostModel matches the given query.")
+            PostModel.liked_by.through.objects.create(
+                postmodel_id=post_id, user_id=user_id
+            )
+    except IntegrityError:
+        raise ValidationError({"detail": "You already liked this post."})
+
+    post_liked.send(sender=PostModel, post_id=post_id, user_id=user_id)
+
+
+def dislike_post(post_id, user_id):
+    with transaction.atomic():
+        updated = PostModel.objects.filter(pk=post_id, likes_counter__gt=0).update(
+            likes_counter=F("likes_counter") - 1, updated_at=Now()
+        )
+        deleted = 0
+        if updated:
+            deleted, _ = PostModel.liked_by.through.objects.filter(
+                postmodel_id=post_id, user_id=user_id
+            ).delete()
+        if not deleted:
+            transaction.set_rollback(True)
+
+    if not deleted:
+        get_object_or_404(PostModel, pk=post_id)
+        raise ValidationError(
+            {"detail": "You cannot dislike a post you have not liked yet."}
+        )
+
+    post_unliked.send(sender=PostModel, post_id=post_id, user_id=user_id)
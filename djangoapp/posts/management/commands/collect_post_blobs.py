@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from posts.blobs import collect_blobs, get_storage
+from posts.models import MediaBlob
+
+
+# Deletes stored post image files that no post references: rows left at zero
+# and files without a row, e.g. from uploads whose post was never saved.
+# Files inside the POST_IMAGE_BLOB_GRACE window are kept for the next run.
+class Command(BaseCommand):
+    help = "Delete post image files that are no longer referenced."
+
+    def handle(self, *args, **options):
+        storage = get_storage()
+        referenced = set(
+            MediaBlob.objects.filter(refcount__gt=0).values_list("name", flat=True)
+        )
+        candidates = set(
+            MediaBlob.objects.filter(refcount=0).values_list("name", flat=True)
+        )
+        for prefix in (storage.prefix, storage.pending_prefix):
+            candidates.update(
+                name for name in self.list_files(storage, prefix)
+                if name not in referenced
+            )
+
+        collect_blobs(sorted(candidates))
+        remaining = sum(1 for name in candidates if storage.exists(name))
+        self.stdout.write(
+            f"Collected {len(candidates) - remaining} of {len(candidates)} "
+            "unreferenced files."
+        )
+
+    def list_files(self, storage, path):
+        if not storage.exists(path):
+            return
+        directories, files = storage.listdir(path)
+        for name in files:
+            yield f"{path}/{name}"
+        for directory in directories:
+            yield from self.list_files(storage, f"{path}/{directory}")
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_postmodel_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='postmodel',
+            index=models.Index(fields=['poster_user', '-created_at', '-id'], name='post_author_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postmodel',
+            index=models.Index(fields=['-created_at', '-id'], name='post_recent_idx'),
+        ),
+        # The auto-created liked_by table only has (postmodel_id, user_id);
+        # "posts liked by a user" lookups need the reverse composite
+        migrations.RunSQL(
+            'CREATE INDEX "posts_liked_by_user_post_idx" '
+            'ON "posts_postmodel_liked_by" ("user_id", "postmodel_id")',
+            'DROP INDEX "posts_liked_by_user_post_idx"',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_postmodel_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postmodel',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
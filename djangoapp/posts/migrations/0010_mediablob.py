@@ -0,0 +1,52 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:18
+
+from collections import Counter
+
+import posts.storage
+from django.db import migrations, models
+
+
+# Files uploaded before the content-addressed storage keep their names; they
+# get reference counts like any blob so they are deleted with their posts
+def count_existing_references(apps, schema_editor):
+    PostModel = apps.get_model("posts", "PostModel")
+    MediaBlob = apps.get_model("posts", "MediaBlob")
+
+    references = Counter()
+    posts = PostModel.objects.exclude(image="").exclude(image__isnull=True)
+    for image, image_variants in posts.values_list("image", "image_variants"):
+        names = {image}
+        for key, variants in image_variants.items():
+            if key != "source":
+                names.update(variants.values())
+        references.update(names)
+
+    MediaBlob.objects.bulk_create(
+        [MediaBlob(name=name, refcount=count) for name, count in references.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_postmodel_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='postmodel',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=posts.storage.get_post_image_storage, upload_to='posts/'),
+        ),
+        migrations.RunPython(count_existing_references, migrations.RunPython.noop),
+    ]
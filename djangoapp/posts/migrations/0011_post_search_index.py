@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from posts.search import install_search_index, remove_search_index
+
+
+def install(apps, schema_editor):
+    install_search_index(schema_editor)
+
+
+def remove(apps, schema_editor):
+    remove_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_mediablob'),
+    ]
+
+    # The index is not part of the model state; see posts.search
+    operations = [
+        migrations.RunPython(install, remove),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Hashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PostHashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_entries', to='posts.hashtag')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hashtag_entries', to='posts.postmodel')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hashtag', '-created_at', '-id'], name='post_hashtag_recent_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'hashtag'), name='unique_post_hashtag')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostMention',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mention_entries', to='posts.postmodel')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at', '-id'], name='post_mention_recent_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'user'), name='unique_post_mention')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.db import migrations
+
+from posts.tags import extract_hashtags, extract_mentions
+
+
+def index_existing_posts(apps, schema_editor):
+    PostModel = apps.get_model("posts", "PostModel")
+    Hashtag = apps.get_model("posts", "Hashtag")
+    PostHashtag = apps.get_model("posts", "PostHashtag")
+    PostMention = apps.get_model("posts", "PostMention")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+
+    posts = PostModel.objects.filter(text_content__regex=r"[#@]").values_list(
+        "id", "text_content", "created_at"
+    )
+    for post_id, text_content, created_at in posts.iterator():
+        names = extract_hashtags(text_content)
+        Hashtag.objects.bulk_create(
+            [Hashtag(name=name) for name in names], ignore_conflicts=True
+        )
+        PostHashtag.objects.bulk_create(
+            [
+                PostHashtag(
+                    post_id=post_id, hashtag_id=hashtag_id, created_at=created_at
+                )
+                for hashtag_id in Hashtag.objects.filter(name__in=names).values_list(
+                    "id", flat=True
+                )
+            ],
+            ignore_conflicts=True,
+        )
+        PostMention.objects.bulk_create(
+            [
+                PostMention(post_id=post_id, user_id=user_id, created_at=created_at)
+                for user_id in User.objects.filter(
+                    username__in=extract_mentions(text_content)
+                ).values_list("id", flat=True)
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_hashtags_mentions'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_existing_posts, migrations.RunPython.noop),
+    ]
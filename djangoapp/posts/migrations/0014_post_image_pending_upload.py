@@ -0,0 +1,25 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:14
+
+import posts.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_index_existing_posts'),
+    ]
+
+    # upload_to has no column; SQLite would remake the table for the AlterField
+    # and drop the search triggers with it
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='postmodel',
+                    name='image',
+                    field=models.ImageField(blank=True, null=True, storage=posts.storage.get_post_image_storage, upload_to='pending/'),
+                ),
+            ],
+        ),
+    ]
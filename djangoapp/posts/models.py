@@ -1,16 +1,137 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from users.models import Follow
+
+from posts.storage import get_post_image_storage
 
 User = get_user_model()
 
+
+class PostQuerySet(models.QuerySet):
+    # Whether the viewer liked each post, as one EXISTS per row of the page
+    def with_liked_by_me(self, user):
+        return self.annotate(
+            liked_by_me=models.Exists(
+                self.model.liked_by.through.objects.filter(
+                    postmodel=models.OuterRef("pk"), user_id=user.pk
+                )
+            )
+        )
+
+    # Own posts and posts from followed users; staff see everything
+    def visible_to(self, user):
+        if user.is_staff:
+            return self
+        followee_ids = Follow.objects.filter(follower=user).values("followee_id")
+        return self.filter(
+            models.Q(poster_user=user) | models.Q(poster_user__in=followee_ids)
+        )
+
+
 class PostModel(models.Model):
     poster_user = models.ForeignKey(User, on_delete=models.CASCADE)
     text_content = models.CharField(max_length=280)
-    image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    image = models.ImageField(
+        upload_to='pending/', storage=get_post_image_storage, blank=True, null=True
+    )
+    # Filled by posts.images once the upload is processed:
+    # {"source": <image name>, "webp": {"150w": <name>, ...}, "jpeg": {...}}
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     likes_counter = models.PositiveIntegerField(default=0)
     liked_by = models.ManyToManyField(User, related_name='liked_posts', blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Per-author listings and pulled authors in the feed
+            models.Index(
+                fields=["poster_user", "-created_at", "-id"],
+                name="post_author_recent_idx",
+            ),
+            # Feed and staff listings ordered by (created_at, id)
+            models.Index(fields=["-created_at", "-id"], name="post_recent_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.poster_user.username}: {self.text_content[:20]}..."
+
+    # Stored files this post holds a reference to
+    def get_blob_names(self):
+        names = {self.image.name} if self.image else set()
+        for key, variants in self.image_variants.items():
+            if key != "source":
+                names.update(variants.values())
+        return names
+
+
+class Hashtag(models.Model):
+    # Lowercase, without the leading #
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return f"#{self.name}"
+
+
+# Inverted indexes of the #tags and @mentions in text_content, rewritten by
+# posts.tags whenever PostSerializer saves a post. created_at is copied from
+# the post so listings are read from one index without sorting.
+class PostHashtag(models.Model):
+    post = models.ForeignKey(
+        PostModel, on_delete=models.CASCADE, related_name="hashtag_entries"
+    )
+    hashtag = models.ForeignKey(
+        Hashtag, on_delete=models.CASCADE, related_name="post_entries"
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "hashtag"], name="unique_post_hashtag"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["hashtag", "-created_at", "-id"],
+                name="post_hashtag_recent_idx",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} #{self.hashtag_id}"  # type: ignore
+
+
+class PostMention(models.Model):
+    post = models.ForeignKey(
+        PostModel, on_delete=models.CASCADE, related_name="mention_entries"
+    )
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="mentions")
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["post", "user"], name="unique_post_mention")
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-id"], name="post_mention_recent_idx"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} @{self.user_id}"  # type: ignore
+
+
+# Number of posts referencing each file of the post image storage, as the
+# image or as one of its variants. A file is deleted when its count drops to
+# zero; see posts.blobs.
+class MediaBlob(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
     def __str__(self):
-        return f"{self.poster_user.username}: {self.text_content[:20]}..."
\ No newline at end of file
+        return f"{self.name} ({self.refcount})"
\ No newline at end of file
@@ -0,0 +1,122 @@
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from utils.pagination import KeysetPagination
+
+# Used by migrations too, so the model is not imported
+POST_TABLE = "posts_postmodel"
+SEARCH_CONFIG = "english"
+# SQLite only: FTS5 index over text_content, synced by triggers
+SQLITE_SEARCH_TABLE = f"{POST_TABLE}_search"
+
+POSTGRES_INDEX_SQL = [
+    f"""
+    ALTER TABLE {POST_TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('{SEARCH_CONFIG}', text_content)) STORED
+    """,
+    f"""
+    CREATE INDEX IF NOT EXISTS post_search_vector_idx ON {POST_TABLE}
+    USING GIN (search_vector)
+    """,
+]
+SQLITE_INDEX_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_SEARCH_TABLE} USING fts5(
+        text_content, content='{POST_TABLE}', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_SEARCH_TABLE}_insert
+    AFTER INSERT ON {POST_TABLE} BEGIN
+        INSERT INTO {SQLITE_SEARCH_TABLE} (rowid, text_content)
+        VALUES (new.id, new.text_content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_SEARCH_TABLE}_delete
+    AFTER DELETE ON {POST_TABLE} BEGIN
+        INSERT INTO {SQLITE_SEARCH_TABLE} ({SQLITE_SEARCH_TABLE}, rowid, text_content)
+        VALUES ('delete', old.id, old.text_content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_SEARCH_TABLE}_update
+    AFTER UPDATE OF text_content ON {POST_TABLE} BEGIN
+        INSERT INTO {SQLITE_SEARCH_TABLE} ({SQLITE_SEARCH_TABLE}, rowid, text_content)
+        VALUES ('delete', old.id, old.text_content);
+        INSERT INTO {SQLITE_SEARCH_TABLE} (rowid, text_content)
+        VALUES (new.id, new.text_content);
+    END
+    """,
+    f"INSERT INTO {SQLITE_SEARCH_TABLE} ({SQLITE_SEARCH_TABLE}) VALUES ('rebuild')",
+]
+
+
+# The search index lives outside the model: a generated tsvector column with a
+# GIN index on Postgres, an FTS5 table on SQLite (for tests and development).
+# Both are maintained by the database, bulk inserts included. Rebuilding
+# posts_postmodel on SQLite (a migration that remakes the table) drops the
+# triggers, so such migrations must call this again.
+def install_search_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {"postgresql": POSTGRES_INDEX_SQL, "sqlite": SQLITE_INDEX_SQL}
+    for sql in statements.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+def remove_search_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            f"ALTER TABLE {POST_TABLE} DROP COLUMN IF EXISTS search_vector"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SQLITE_SEARCH_TABLE}")
+        for trigger in ("insert", "delete", "update"):
+            schema_editor.execute(
+                f"DROP TRIGGER IF EXISTS {SQLITE_SEARCH_TABLE}_{trigger}"
+            )
+
+
+# Posts containing every word of the query (English stemming), annotated with
+# a relevance rank where higher is better
+def search_posts(queryset, query):
+    if connection.vendor == "postgresql":
+        tsquery = f"plainto_tsquery('{SEARCH_CONFIG}', %s)"
+        vector = f"{POST_TABLE}.search_vector"
+        # Double precision so the rank survives the round trip in the cursor
+        rank = f"CAST(ts_rank({vector}, {tsquery}) AS double precision)"
+        return queryset.annotate(
+            rank=RawSQL(rank, [query], output_field=FloatField())
+        ).filter(
+            RawSQL(f"{vector} @@ {tsquery}", [query], output_field=BooleanField())
+        )
+
+    fts_query = to_fts_query(query)
+    # bm25() is lower for better matches
+    rank = f"""
+        SELECT -bm25({SQLITE_SEARCH_TABLE}) FROM {SQLITE_SEARCH_TABLE}
+        WHERE {SQLITE_SEARCH_TABLE} MATCH %s
+        AND {SQLITE_SEARCH_TABLE}.rowid = {POST_TABLE}.id
+    """
+    matches = (
+        f"SELECT rowid FROM {SQLITE_SEARCH_TABLE} WHERE {SQLITE_SEARCH_TABLE} MATCH %s"
+    )
+    return queryset.annotate(
+        rank=RawSQL(rank, [fts_query], output_field=FloatField())
+    ).filter(pk__in=RawSQL(matches, [fts_query]))
+
+
+# Quotes every word, so FTS5 operators in user input are matched literally
+def to_fts_query(query):
+    return " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+
+
+class SearchPagination(KeysetPagination):
+    ordering = ("-rank", "-id")
+
+    def parse_position_value(self, model, name, value):
+        if name == "rank":
+            return float(value)
+        return super().parse_position_value(model, name, value)
@@ -1,9 +1,18 @@
+from django.db import transaction
 from rest_framework import serializers
+from users.counters import update_posts_count
+from utils.instrumentation import TimedSerializerMixin
 
+from posts import images, tags
 from posts.models import PostModel
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    # Filled by PostModel.objects.with_liked_by_me(); a new post has no likes
+    liked_by_me = serializers.BooleanField(read_only=True, default=False)
+    # {"webp": {"150w": url, ...}, "jpeg": {...}}, empty until processed
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = PostModel
         fields = [
@@ -11,8 +20,9 @@ class PostSerializer(serializers.ModelSerializer):
             "poster_user",
             "text_content",
             "image",
+            "srcset",
             "likes_counter",
-            "liked_by",
+            "liked_by_me",
             "created_at",
             "updated_at",
         ]
@@ -22,19 +32,56 @@ class PostSerializer(serializers.ModelSerializer):
             "updated_at",
             "poster_user",
             "likes_counter",
-            "liked_by",
         ]
 
     def __init__(self, *args, **kwargs):
         self.user = kwargs.pop("user", None)
         super().__init__(*args, **kwargs)
 
+    def validate_image(self, image):
+        if image is not None:
+            images.validate_image(image)
+        return image
+
+    # The upload still has its metadata and is not served until processed
+    def to_representation(self, post):
+        data = super().to_representation(post)
+        if post.image and post.image_variants.get("source") != post.image.name:
+            data["image"] = None
+        return data
+
+    def get_srcset(self, post):
+        request = self.context.get("request")
+        storage = post.image.storage
+        srcset = {}
+        for key in images.VARIANT_FORMATS:
+            variants = post.image_variants.get(key)
+            if not variants:
+                continue
+            srcset[key] = {}
+            for descriptor, name in variants.items():
+                url = storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                srcset[key][descriptor] = url
+        return srcset
+
     # Define valores automaticamente ao criar o post
+    @transaction.atomic
     def create(self, validated_data):
         validated_data["poster_user"] = self.user
         validated_data["likes_counter"] = 0
-        validated_data["liked_by"] = []
-        return super().create(validated_data)
+        post = super().create(validated_data)
+        tags.index_post(post, created=True)
+        update_posts_count(post.poster_user_id, 1)
+        return post
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        post = super().update(instance, validated_data)
+        if "text_content" in validated_data:
+            tags.index_post(post)
+        return post
 
 
 class LikeSerializer(serializers.Serializer):
@@ -43,3 +90,7 @@ class LikeSerializer(serializers.Serializer):
 
 class DislikeSerializer(serializers.Serializer):
     post_id = serializers.IntegerField()
+
+
+class SearchSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
@@ -0,0 +1,55 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal, receiver
+
+from posts import images
+from posts.blobs import acquire_blobs, release_blobs
+from posts.models import PostModel
+
+# Sent by posts.likes after a like / dislike is committed, with post_id and user_id.
+# Like edges are written straight to the liked_by table, so model signals
+# do not cover them.
+post_liked = Signal()
+post_unliked = Signal()
+
+
+# The stored files a post referenced when loaded, to diff against on save.
+# None when the image fields were deferred.
+@receiver(post_init, sender=PostModel)
+def remember_post_blobs(sender, instance, **kwargs):
+    if {"image", "image_variants"} & instance.get_deferred_fields():
+        instance._blob_names = None
+    else:
+        instance._blob_names = instance.get_blob_names()
+
+
+# Unknown previous references are treated as none, which can only keep a
+# file too long, never delete it early
+@receiver(post_save, sender=PostModel)
+def update_post_blob_references(sender, instance, **kwargs):
+    if not instance.image and instance.image_variants:
+        instance.image_variants = {}
+        PostModel.objects.filter(pk=instance.pk).update(image_variants={})
+
+    names = instance.get_blob_names()
+    previous_names = instance._blob_names or set()
+    acquire_blobs(names - previous_names)
+    release_blobs(previous_names - names)
+    instance._blob_names = names
+
+
+# New or replaced images are processed once the post is committed; saving
+# the processed variants sets image_variants["source"], which ends the loop
+@receiver(post_save, sender=PostModel)
+def process_post_image(sender, instance, **kwargs):
+    name = instance.image.name if instance.image else None
+    if name and instance.image_variants.get("source") != name:
+        post_id = instance.pk
+        transaction.on_commit(
+            lambda: images.schedule_image_processing(post_id, name)
+        )
+
+
+@receiver(post_delete, sender=PostModel)
+def release_post_blobs(sender, instance, **kwargs):
+    release_blobs(instance._blob_names or set())
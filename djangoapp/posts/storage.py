@@ -0,0 +1,58 @@
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, storages
+from django.utils._os import safe_join
+
+
+# Names files after the SHA-256 of their content, so identical uploads share
+# one file: blobs/ab/abcdef...<ext>. Saving a blob that already exists only
+# returns its name. Files are never modified in place, which lets them be
+# served with immutable cache headers; see posts.blobs for their reference
+# counts.
+#
+# Uploads (saved under pending/) are content-addressed too, but kept in
+# POST_IMAGE_PENDING_ROOT, outside MEDIA_ROOT, until posts.images has stored
+# their copy without metadata, so a file with its EXIF data is never served.
+class ContentAddressedStorage(FileSystemStorage):
+    prefix = "blobs"
+    pending_prefix = "pending"
+
+    def __init__(self, **kwargs):
+        # Two uploads of the same content write the same bytes
+        kwargs.setdefault("allow_overwrite", True)
+        super().__init__(**kwargs)
+
+    def _save(self, name, content):
+        name = self.get_content_name(name, content)
+        if self.exists(name):
+            # Keeps a blob whose last reference is being released from being
+            # collected before this upload acquires it
+            os.utime(self.path(name))
+            return name
+        # The name relative to MEDIA_ROOT would not fit pending files
+        super()._save(name, content)
+        return name
+
+    def get_content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+
+        extension = os.path.splitext(name)[1].lower()
+        prefix = self.pending_prefix if self.is_pending(name) else self.prefix
+        return f"{prefix}/{digest[:2]}/{digest}{extension}"
+
+    def is_pending(self, name):
+        return name.startswith(f"{self.pending_prefix}/")
+
+    def path(self, name):
+        if self.is_pending(name):
+            return safe_join(settings.POST_IMAGE_PENDING_ROOT, name)
+        return super().path(name)
+
+
+def get_post_image_storage():
+    return storages["post_images"]
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from posts.views import HashtagPostsView
+
+app_name = "tags"
+
+
+urlpatterns = [
+    path("<str:name>/", HashtagPostsView.as_view(), name="tag-posts"),
+]
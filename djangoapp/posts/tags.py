@@ -0,0 +1,90 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
+
+from posts.models import Hashtag, PostHashtag, PostMention, PostModel
+
+User = get_user_model()
+
+# Not preceded by a word character, so e-mails and URL fragments are skipped;
+# tags longer than a Hashtag name are skipped rather than cut
+HASHTAG_PATTERN = re.compile(r"(?<![\w#&])#(\w{1,100})(?!\w)")
+MENTION_PATTERN = re.compile(r"(?<![\w@])@([\w.+-]{1,150})")
+
+
+def extract_hashtags(text):
+    return {name.lower() for name in HASHTAG_PATTERN.findall(text)}
+
+
+# A trailing dot ends the sentence, not the username
+def extract_mentions(text):
+    return {name.rstrip(".") for name in MENTION_PATTERN.findall(text)} - {""}
+
+
+def normalize_hashtag(name):
+    return name.lstrip("#").lower()
+
+
+# Rewrites the post's rows in both indexes from its current text. A new post
+# has no rows yet, so nothing needs to be read or deleted.
+def index_post(post, created=False):
+    names = extract_hashtags(post.text_content)
+    hashtag_ids = set()
+    if names:
+        Hashtag.objects.bulk_create(
+            [Hashtag(name=name) for name in names], ignore_conflicts=True
+        )
+        hashtag_ids = set(
+            Hashtag.objects.filter(name__in=names).values_list("id", flat=True)
+        )
+    sync_entries(PostHashtag, "hashtag_id", post, hashtag_ids, created)
+
+    usernames = extract_mentions(post.text_content)
+    user_ids = set()
+    if usernames:
+        user_ids = set(
+            User.objects.filter(username__in=usernames).values_list("id", flat=True)
+        )
+    sync_entries(PostMention, "user_id", post, user_ids, created)
+
+
+def sync_entries(model, field, post, ids, created):
+    existing = set()
+    if not created:
+        existing = set(model.objects.filter(post=post).values_list(field, flat=True))
+        stale = existing - ids
+        if stale:
+            model.objects.filter(post=post, **{f"{field}__in": stale}).delete()
+
+    new_ids = ids - existing
+    if new_ids:
+        model.objects.bulk_create(
+            [
+                model(post=post, created_at=post.created_at, **{field: value})
+                for value in new_ids
+            ],
+            ignore_conflicts=True,
+        )
+
+
+# Index rows with their post and the viewer's liked_by_me flag, limited to
+# the posts the viewer can see unless visible_only is False
+def get_index_queryset(entries, user, visible_only=True):
+    if visible_only and not user.is_staff:
+        entries = entries.filter(post__in=PostModel.objects.visible_to(user))
+    return entries.select_related("post").annotate(
+        liked_by_me=Exists(
+            PostModel.liked_by.through.objects.filter(
+                postmodel=OuterRef("post_id"), user_id=user.pk
+            )
+        )
+    )
+
+
+def get_index_posts(entries):
+    posts = []
+    for entry in entries:
+        entry.post.liked_by_me = entry.liked_by_me
+        posts.append(entry.post)
+    return posts
@@ -0,0 +1,116 @@
+from django.urls import reverse
+from posts.models import PostModel
+from tests_base.base_test import BaseTest
+
+
+# The async endpoints must answer exactly like the sync DRF views
+class AsyncViewsTests(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.follow(self.user_a, self.user_b)
+        self.follow(self.user_a, self.user_c)
+
+    def get(self, url, token=None, **extra):
+        if token is not None:
+            extra["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+        return self.client.get(url, **extra)
+
+    def post(self, url, data, token):
+        return self.client.post(
+            url, data=data, HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+
+    def test_async_feed_matches_sync_feed(self):
+        sync_response = self.get(reverse("feed:user-feed"), self.token_user_a)
+        async_response = self.get(reverse("async:user-feed"), self.token_user_a)
+
+        self.assertEqual(200, async_response.status_code)
+        self.assertEqual(
+            sync_response.json()["results"], async_response.json()["results"]
+        )
+
+    def test_async_feed_status_304_when_etag_matches(self):
+        response = self.get(reverse("async:user-feed"), self.token_user_a)
+
+        response = self.get(
+            reverse("async:user-feed"),
+            self.token_user_a,
+            HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+
+        self.assertEqual(304, response.status_code)
+
+    def test_async_feed_paginates_with_cursor(self):
+        for i in range(12):
+            self.create_post(self.user_b, f"post {i}")
+
+        first = self.get(reverse("async:user-feed"), self.token_user_a).json()
+        second = self.get(first["next"], self.token_user_a).json()
+
+        ids = [post["id"] for post in first["results"] + second["results"]]
+        self.assertEqual(14, len(set(ids)))
+
+    def test_async_endpoints_status_401_without_authentication(self):
+        for name in ("async:user-feed", "async:posts-list"):
+            response = self.get(reverse(name))
+
+            self.assertEqual(401, response.status_code)
+            self.assertIn("WWW-Authenticate", response)
+
+        response = self.get(reverse("async:user-feed"), "not-a-token")
+        self.assertEqual(401, response.status_code)
+
+    def test_async_post_list_matches_sync_post_list(self):
+        sync_response = self.get(reverse("posts:posts-api-list"), self.token_user_a)
+        async_response = self.get(reverse("async:posts-list"), self.token_user_a)
+
+        self.assertEqual(200, async_response.status_code)
+        self.assertEqual(
+            sync_response.json()["results"], async_response.json()["results"]
+        )
+
+    def test_async_post_detail(self):
+        url = reverse("async:posts-detail", kwargs={"pk": self.post_a.pk})
+
+        response = self.get(url, self.token_user_a)
+        sync_response = self.get(
+            reverse("posts:posts-api-detail", kwargs={"pk": self.post_a.pk}),
+            self.token_user_a,
+        )
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(sync_response.json(), response.json())
+        self.assertEqual(sync_response["ETag"], response["ETag"])
+
+        response = self.get(url, self.token_user_a, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(304, response.status_code)
+
+        response = self.get(url, self.token_user_b)
+        self.assertEqual(403, response.status_code)
+
+        response = self.get(
+            reverse("async:posts-detail", kwargs={"pk": 999999}), self.token_user_a
+        )
+        self.assertEqual(404, response.status_code)
+
+    def test_async_like_and_dislike(self):
+        response = self.post(
+            reverse("async:posts-like"), {"post_id": self.post_b.pk}, self.token_user_a
+        )
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(1, PostModel.objects.get(pk=self.post_b.pk).likes_counter)
+
+        response = self.post(
+            reverse("async:posts-like"), {"post_id": self.post_b.pk}, self.token_user_a
+        )
+        self.assertEqual(400, response.status_code)
+
+        response = self.post(
+            reverse("async:posts-dislike"),
+            {"post_id": self.post_b.pk},
+            self.token_user_a,
+        )
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(0, PostModel.objects.get(pk=self.post_b.pk).likes_counter)
+
+        response = self.post(reverse("async:posts-like"), {}, self.token_user_a)
+        self.assertEqual(400, response.status_code)
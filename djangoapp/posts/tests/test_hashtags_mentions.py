@@ -0,0 +1,140 @@
+from django.urls import reverse
+from posts.models import PostHashtag, PostMention
+from posts.tags import extract_hashtags, extract_mentions
+from tests_base.base_test import BaseTest
+
+
+class HashtagMentionExtractionTests(BaseTest):
+    def test_extract_hashtags(self):
+        self.assertEqual(
+            {"django", "python_3"},
+            extract_hashtags("#Django and #python_3! not mail#tag or ##"),
+        )
+
+    def test_extract_hashtags_skips_tags_over_the_name_length(self):
+        self.assertEqual(
+            {"a" * 100},
+            extract_hashtags(f"#{'a' * 100} #{'b' * 101}"),
+        )
+
+    def test_extract_mentions(self):
+        self.assertEqual(
+            {"base_user_a", "john.doe"},
+            extract_mentions("hi @base_user_a, @john.doe. me@example.com"),
+        )
+
+
+class HashtagMentionIndexTests(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.follow(self.user_a, self.user_b)
+
+    def create(self, token, text):
+        response = self.client.post(
+            reverse("posts:posts-api-list"),
+            data={"text_content": text},
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        self.assertEqual(201, response.status_code)
+        return response.json()["id"]
+
+    def get_ids(self, url, token=None):
+        response = self.client.get(
+            url, HTTP_AUTHORIZATION=f"Bearer {token or self.token_user_a}"
+        )
+        self.assertEqual(200, response.status_code)
+        return [post["id"] for post in response.json()["results"]]
+
+    def test_create_indexes_hashtags_and_mentions(self):
+        post_id = self.create(
+            self.token_user_b, "#Launch day with @base_user_a and @nobody #launch"
+        )
+
+        self.assertEqual(
+            ["launch"],
+            list(
+                PostHashtag.objects.filter(post_id=post_id).values_list(
+                    "hashtag__name", flat=True
+                )
+            ),
+        )
+        self.assertEqual(
+            [self.user_a.id],
+            list(
+                PostMention.objects.filter(post_id=post_id).values_list(
+                    "user_id", flat=True
+                )
+            ),
+        )
+
+    def test_update_rewrites_index(self):
+        post_id = self.create(self.token_user_a, "#old for @base_user_b")
+
+        response = self.client.patch(
+            reverse("posts:posts-api-detail", args=[post_id]),
+            data={"text_content": "#new for @base_user_c"},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([], self.get_ids(reverse("tags:tag-posts", args=["old"])))
+        self.assertEqual(
+            [post_id], self.get_ids(reverse("tags:tag-posts", args=["new"]))
+        )
+        self.assertEqual(
+            {self.user_c.id},
+            set(
+                PostMention.objects.filter(post_id=post_id).values_list(
+                    "user_id", flat=True
+                )
+            ),
+        )
+
+    def test_tag_lists_visible_posts_newest_first(self):
+        first = self.create(self.token_user_b, "#news one")
+        second = self.create(self.token_user_a, "#NEWS two")
+        self.create(self.token_user_c, "#news hidden")
+
+        ids = self.get_ids(reverse("tags:tag-posts", args=["News"]))
+
+        self.assertEqual([second, first], ids)
+
+    def test_tag_paginates_with_cursor(self):
+        created = [self.create(self.token_user_b, f"#many {i}") for i in range(15)]
+
+        response = self.client.get(
+            reverse("tags:tag-posts", args=["many"]),
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        ).json()
+        ids = [post["id"] for post in response["results"]]
+        ids += self.get_ids(response["next"])
+
+        self.assertEqual(created[::-1], ids)
+
+    def test_mentions_include_posts_from_strangers_for_the_mentioned_user(self):
+        own = self.create(self.token_user_a, "note to self @base_user_a")
+        stranger = self.create(self.token_user_c, "hello @base_user_a")
+
+        ids = self.get_ids(reverse("users:users-api-mentions", args=[self.user_a.id]))
+        self.assertEqual([stranger, own], ids)
+
+        # user_b follows nobody, so only sees their own posts
+        ids = self.get_ids(
+            reverse("users:users-api-mentions", args=[self.user_a.id]),
+            self.token_user_b,
+        )
+        self.assertEqual([], ids)
+
+    def test_listings_within_query_budget(self):
+        for i in range(12):
+            self.create(self.token_user_b, f"#budget post {i} for @base_user_a")
+
+        for url in (
+            reverse("tags:tag-posts", args=["budget"]),
+            reverse("users:users-api-mentions", args=[self.user_a.id]),
+        ):
+            response = self.client.get(
+                url, HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}"
+            )
+            self.assertWithinQueryBudget(response)
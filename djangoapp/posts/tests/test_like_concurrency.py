@@ -0,0 +1,76 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TransactionTestCase
+from posts.models import PostModel
+from rest_framework.routers import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+NUMBER_OF_LIKES = 200
+NUMBER_OF_THREADS = 16
+
+
+class PostLikeConcurrencyTests(TransactionTestCase):
+    def setUp(self):
+        self.User = get_user_model()
+        self.poster = self.User.objects.create(
+            username="poster", email="poster@email.com", password="Abcd123!"
+        )
+        self.post = PostModel.objects.create(
+            poster_user=self.poster, text_content="Post to like"
+        )
+
+    def post_concurrently(self, url_name, users):
+        def send(user):
+            try:
+                client = APIClient()
+                return client.post(
+                    reverse(url_name),
+                    data={"post_id": self.post.id},  # type: ignore
+                    HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}",
+                ).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=NUMBER_OF_THREADS) as executor:
+            return list(executor.map(send, users))
+
+    def assertCounterMatchesEdges(self):
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.liked_by.count(), self.post.likes_counter)
+
+    def test_parallel_likes_keep_counter_equal_to_edges(self):
+        users = self.User.objects.bulk_create(
+            [self.User(username=f"liker_{i}") for i in range(NUMBER_OF_LIKES)]
+        )
+
+        status_codes = self.post_concurrently("posts:posts-api-like-post", users)
+
+        self.assertEqual([200] * NUMBER_OF_LIKES, status_codes)
+        self.assertCounterMatchesEdges()
+        self.assertEqual(NUMBER_OF_LIKES, self.post.likes_counter)
+
+    def test_parallel_likes_from_same_user_count_once(self):
+        status_codes = self.post_concurrently(
+            "posts:posts-api-like-post", [self.poster] * NUMBER_OF_THREADS
+        )
+
+        self.assertEqual(1, status_codes.count(200))
+        self.assertEqual(NUMBER_OF_THREADS - 1, status_codes.count(400))
+        self.assertCounterMatchesEdges()
+
+    def test_parallel_likes_and_dislikes_keep_counter_equal_to_edges(self):
+        users = self.User.objects.bulk_create(
+            [self.User(username=f"liker_{i}") for i in range(NUMBER_OF_LIKES)]
+        )
+        self.post_concurrently("posts:posts-api-like-post", users)
+
+        status_codes = self.post_concurrently(
+            "posts:posts-api-dislike-post", users[: NUMBER_OF_LIKES // 2]
+        )
+
+        self.assertEqual([200] * (NUMBER_OF_LIKES // 2), status_codes)
+        self.assertCounterMatchesEdges()
+        self.assertEqual(NUMBER_OF_LIKES // 2, self.post.likes_counter)
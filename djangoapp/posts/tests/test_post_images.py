@@ -0,0 +1,288 @@
+import io
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+from PIL import Image
+from posts import images
+from posts.blobs import get_storage
+from posts.images import build_variants
+from posts.models import MediaBlob, PostModel
+from rest_framework.exceptions import ValidationError
+from rest_framework.routers import reverse
+from tests_base.base_test import BaseTest
+from utils.media import serve_immutable
+
+GPS_IFD = 0x8825
+MAKE = 0x010F
+
+
+def make_image(size=(1600, 900), image_format="JPEG", exif=True):
+    image = Image.new("RGB", size, (200, 30, 30))
+    options = {}
+    if exif:
+        metadata = Image.Exif()
+        metadata[MAKE] = "Test Camera"
+        metadata[GPS_IFD] = {1: "N", 2: (1.0, 2.0, 3.0)}
+        options["exif"] = metadata.tobytes()
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **options)
+    extension = image_format.lower()
+    return SimpleUploadedFile(
+        f"upload.{extension}", buffer.getvalue(), content_type=f"image/{extension}"
+    )
+
+
+@override_settings(POST_IMAGE_WORKERS=0, POST_IMAGE_VARIANT_WIDTHS=[150, 600, 1200])
+class PostImageTestCase(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.pending_root = tempfile.mkdtemp()
+        self.media_override = override_settings(
+            MEDIA_ROOT=self.media_root, POST_IMAGE_PENDING_ROOT=self.pending_root
+        )
+        self.media_override.enable()
+
+    def tearDown(self):
+        self.media_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+        shutil.rmtree(self.pending_root, ignore_errors=True)
+        super().tearDown()
+
+    def upload(self, image, token=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse("posts:posts-api-list"),
+                data={"text_content": "post with image", "image": image},
+                HTTP_AUTHORIZATION=f"Bearer {token or self.token_user_a}",
+            )
+
+    def delete_post(self, post, token=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.delete(
+                reverse("posts:posts-api-detail", kwargs={"pk": post.pk}),
+                HTTP_AUTHORIZATION=f"Bearer {token or self.token_user_a}",
+            )
+
+
+class PostImagePipelineTests(PostImageTestCase):
+    def test_upload_produces_webp_and_jpeg_variants(self):
+        response = self.upload(make_image())
+        self.assertEqual(201, response.status_code)
+
+        post = PostModel.objects.get(pk=response.json()["id"])
+        variants = post.image_variants
+        self.assertEqual(post.image.name, variants["source"])
+        self.assertEqual(["150w", "600w", "1200w"], list(variants["webp"]))
+        self.assertEqual(["150w", "600w", "1200w"], list(variants["jpeg"]))
+
+        for key, image_format in (("webp", "WEBP"), ("jpeg", "JPEG")):
+            for descriptor, name in variants[key].items():
+                with get_storage().open(name) as file, Image.open(file) as image:
+                    self.assertEqual(image_format, image.format)
+                    self.assertEqual(int(descriptor[:-1]), image.width)
+
+    def test_upload_strips_metadata(self):
+        response = self.upload(make_image())
+        post = PostModel.objects.get(pk=response.json()["id"])
+
+        names = [post.image.name, *post.image_variants["jpeg"].values()]
+        for name in names:
+            with get_storage().open(name) as file, Image.open(file) as image:
+                self.assertEqual(0, len(image.getexif()))
+
+    def test_upload_is_not_served_until_processed(self):
+        # The image is processed by an on_commit callback
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                reverse("posts:posts-api-list"),
+                data={"text_content": "post with image", "image": make_image()},
+                HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+            )
+        post = PostModel.objects.get(pk=response.json()["id"])
+
+        pending_name = post.image.name
+        self.assertIsNone(response.json()["image"])
+        self.assertTrue(post.image.path.startswith(self.pending_root))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for callback in callbacks:
+                callback()
+
+        post.refresh_from_db()
+        self.assertTrue(post.image.path.startswith(self.media_root))
+        self.assertFalse(get_storage().exists(pending_name))
+
+    def test_image_replaced_during_processing_is_kept(self):
+        with self.captureOnCommitCallbacks():
+            response = self.client.post(
+                reverse("posts:posts-api-list"),
+                data={"text_content": "post with image", "image": make_image()},
+                HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+            )
+        post = PostModel.objects.get(pk=response.json()["id"])
+        first_name = post.image.name
+        replacement = get_storage().save(
+            "pending/new.jpeg", make_image(size=(800, 600))
+        )
+
+        def replace_then_build(*args):
+            PostModel.objects.filter(pk=post.pk).update(image=replacement)
+            return build_variants(*args)
+
+        with patch.object(images, "build_variants", replace_then_build):
+            images.process_post_image(post.pk, first_name)
+
+        post.refresh_from_db()
+        self.assertEqual(replacement, post.image.name)
+        self.assertEqual({}, post.image_variants)
+        self.assertFalse(MediaBlob.objects.filter(name__startswith="blobs/").exists())
+
+    def test_small_images_are_not_upscaled(self):
+        response = self.upload(make_image(size=(400, 300)))
+        post = PostModel.objects.get(pk=response.json()["id"])
+
+        self.assertEqual(["150w", "400w"], list(post.image_variants["webp"]))
+
+    def test_serializer_exposes_srcset(self):
+        response = self.upload(make_image())
+        post_id = response.json()["id"]
+
+        response = self.client.get(
+            reverse("posts:posts-api-detail", kwargs={"pk": post_id}),
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        srcset = response.json()["srcset"]
+        self.assertEqual({"webp", "jpeg"}, set(srcset))
+        self.assertTrue(srcset["webp"]["600w"].startswith("http://testserver/media/"))
+
+    def test_post_without_image_has_empty_srcset(self):
+        response = self.client.get(
+            reverse("posts:posts-api-detail", kwargs={"pk": self.post_a.pk}),
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        self.assertEqual({}, response.json()["srcset"])
+
+    def test_unsupported_format_is_rejected(self):
+        response = self.upload(make_image(image_format="BMP", exif=False))
+
+        self.assertEqual(400, response.status_code)
+        self.assertIn("image", response.json())
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=1000)
+    def test_oversized_image_is_rejected(self):
+        response = self.upload(make_image(size=(100, 100)))
+
+        self.assertEqual(400, response.status_code)
+
+    def test_decompression_bomb_is_rejected_as_too_large(self):
+        with patch.object(Image, "MAX_IMAGE_PIXELS", 100):
+            with self.assertRaisesMessage(ValidationError, "Image is too large."):
+                images.validate_image(make_image(size=(100, 100)))
+
+    def test_deleting_post_deletes_variants(self):
+        response = self.upload(make_image())
+        post = PostModel.objects.get(pk=response.json()["id"])
+        names = [*post.image_variants["webp"].values()]
+
+        self.delete_post(post)
+
+        for name in names:
+            self.assertFalse(get_storage().exists(name))
+
+
+@override_settings(POST_IMAGE_BLOB_GRACE=60)
+class PostImageStorageTests(PostImageTestCase):
+    def upload_post(self, image_bytes, token=None):
+        image = SimpleUploadedFile("meme.jpeg", image_bytes, content_type="image/jpeg")
+        response = self.upload(image, token)
+        return PostModel.objects.get(pk=response.json()["id"])
+
+    def test_identical_uploads_share_files(self):
+        image_bytes = make_image().read()
+
+        first = self.upload_post(image_bytes)
+        second = self.upload_post(image_bytes, self.token_user_b)
+
+        self.assertTrue(first.image.name.startswith("blobs/"))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image_variants, second.image_variants)
+        for name in first.get_blob_names():
+            self.assertEqual(2, MediaBlob.objects.get(name=name).refcount)
+
+    def test_raw_upload_is_released_after_processing(self):
+        image_bytes = make_image().read()
+        raw_name = get_storage().get_content_name(
+            "pending/meme.jpeg", ContentFile(image_bytes)
+        )
+
+        post = self.upload_post(image_bytes)
+
+        self.assertNotEqual(raw_name, post.image.name)
+        self.assertFalse(get_storage().exists(raw_name))
+        self.assertFalse(MediaBlob.objects.filter(name=raw_name).exists())
+
+    @override_settings(POST_IMAGE_BLOB_GRACE=0)
+    def test_files_are_deleted_with_the_last_reference(self):
+        image_bytes = make_image().read()
+        first = self.upload_post(image_bytes)
+        second = self.upload_post(image_bytes, self.token_user_b)
+        names = first.get_blob_names()
+
+        self.delete_post(first)
+        for name in names:
+            self.assertTrue(get_storage().exists(name))
+            self.assertEqual(1, MediaBlob.objects.get(name=name).refcount)
+
+        self.delete_post(second, self.token_user_b)
+        for name in names:
+            self.assertFalse(get_storage().exists(name))
+        self.assertFalse(MediaBlob.objects.filter(name__in=names).exists())
+
+    def test_recently_deduplicated_file_is_not_collected(self):
+        post = self.upload_post(make_image().read())
+        name = post.image.name
+
+        # Another upload finds the file while this post releases it
+        blob = MediaBlob.objects.get(name=name)
+        MediaBlob.objects.filter(pk=blob.pk).update(
+            created_at=blob.created_at - timezone.timedelta(minutes=5)
+        )
+        with get_storage().open(name) as file:
+            get_storage().save("meme.jpeg", ContentFile(file.read()))
+        self.delete_post(post)
+
+        self.assertTrue(get_storage().exists(name))
+
+    @override_settings(POST_IMAGE_BLOB_GRACE=0)
+    def test_collect_command_deletes_unreferenced_files(self):
+        post = self.upload_post(make_image().read())
+        orphan = get_storage().save("orphan.png", ContentFile(b"not referenced"))
+
+        call_command("collect_post_blobs", stdout=io.StringIO())
+
+        self.assertFalse(get_storage().exists(orphan))
+        for name in post.get_blob_names():
+            self.assertTrue(get_storage().exists(name))
+
+    def test_blobs_are_served_with_immutable_cache_headers(self):
+        post = self.upload_post(make_image().read())
+
+        response = serve_immutable(
+            RequestFactory().get("/media/"),
+            path=post.image.name,
+            document_root=self.media_root,
+        )
+
+        self.assertEqual(200, response.status_code)
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("max-age=31536000", response["Cache-Control"])
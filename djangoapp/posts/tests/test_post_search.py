@@ -0,0 +1,98 @@
+from django.urls import reverse
+from tests_base.base_test import BaseTest
+
+
+class PostSearchTests(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.follow(self.user_a, self.user_b)
+
+    def search(self, query, token=None, url=None):
+        return self.client.get(
+            url or reverse("posts:posts-api-search"),
+            {"q": query} if url is None else None,
+            HTTP_AUTHORIZATION=f"Bearer {token or self.token_user_a}",
+        )
+
+    def get_result_ids(self, response):
+        self.assertEqual(200, response.status_code)
+        return [post["id"] for post in response.json()["results"]]
+
+    def test_search_matches_stemmed_words_ranked_by_relevance(self):
+        once = self.create_post(self.user_b, "Running late for the game")
+        twice = self.create_post(self.user_a, "I run, you run, everybody runs")
+        self.create_post(self.user_a, "Nothing to see here")
+
+        response = self.search("runs")
+
+        self.assertEqual([twice.id, once.id], self.get_result_ids(response))
+        self.assertIn("liked_by_me", response.json()["results"][0])
+
+    def test_search_matches_every_word(self):
+        both = self.create_post(self.user_a, "coffee and cake")
+        self.create_post(self.user_a, "just coffee")
+
+        response = self.search("cake coffee")
+
+        self.assertEqual([both.id], self.get_result_ids(response))
+
+    def test_search_only_returns_visible_posts(self):
+        own = self.create_post(self.user_a, "secret recipe")
+        followed = self.create_post(self.user_b, "secret recipe too")
+        hidden = self.create_post(self.user_c, "secret recipe again")
+
+        ids = self.get_result_ids(self.search("recipe"))
+        self.assertEqual({own.id, followed.id}, set(ids))
+
+        staff_user = self.create_super_user("staff", "staff@email.com", "Abcd123!")
+        staff_ids = self.get_result_ids(
+            self.search("recipe", self.create_token(staff_user))
+        )
+        self.assertEqual({own.id, followed.id, hidden.id}, set(staff_ids))
+
+    def test_search_index_follows_updates_and_deletes(self):
+        post = self.create_post(self.user_a, "old words")
+        deleted = self.create_post(self.user_a, "doomed words")
+
+        post.text_content = "fresh words"
+        post.save()
+        deleted.delete()
+
+        self.assertEqual([], self.get_result_ids(self.search("old")))
+        self.assertEqual([], self.get_result_ids(self.search("doomed")))
+        self.assertEqual([post.id], self.get_result_ids(self.search("fresh")))
+
+    def test_search_paginates_with_cursor(self):
+        posts = [self.create_post(self.user_b, f"cursor post {i}") for i in range(25)]
+
+        ids = []
+        response = self.search("cursor")
+        while True:
+            ids += self.get_result_ids(response)
+            next_url = response.json()["next"]
+            if next_url is None:
+                break
+            response = self.search(None, url=next_url)
+
+        self.assertEqual(sorted(post.id for post in posts), sorted(ids))
+        self.assertEqual(25, len(set(ids)))
+
+    def test_search_operators_in_query_are_matched_literally(self):
+        post = self.create_post(self.user_a, "apples and pears")
+
+        ids = self.get_result_ids(self.search('"apples AND (pears*'))
+
+        self.assertEqual([post.id], ids)
+
+    def test_search_status_400_without_query(self):
+        response = self.client.get(
+            reverse("posts:posts-api-search"),
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        self.assertEqual(400, response.status_code)
+
+    def test_search_status_401_without_authentication(self):
+        response = self.client.get(reverse("posts:posts-api-search"), {"q": "post"})
+
+        self.assertEqual(401, response.status_code)
@@ -1,3 +1,6 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from posts.models import PostModel
 from rest_framework.routers import reverse
 from tests_base.base_test import BaseTest
 
@@ -38,6 +41,18 @@ class PostTestsCRUD(BaseTest):
 
         self.assertEqual(200, response.status_code)
 
+    def test_list_posts_uses_cursor_pagination_by_default(self):
+        for i in range(12):
+            self.create_post(self.user_to_post, f"Post number: {i}")
+
+        response = self.client.get(
+            reverse("posts:posts-api-list"),
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_to_post}",
+        )
+
+        self.assertNotIn("count", response.data)  # type: ignore
+        self.assertIsNotNone(response.data.get("next"))  # type: ignore
+
     def test_list_posts_status_401_without_authentication(self):
         response = self.client.get(reverse("posts:posts-api-list"))
 
@@ -217,3 +232,164 @@ class PostTestsLikesAndDislike(BaseTest):
             HTTP_AUTHORIZATION=f"Bearer {self.token_user_to_post}",
         )
         self.assertEqual(400, response.status_code)
+
+    def test_like_and_dislike_use_two_statements_and_keep_counter_in_sync(self):
+        post = self.create_post(user=self.user_b, content="Post to like")
+        post_id = {"post_id": post.id}  # type: ignore
+
+        for url_name in ("posts:posts-api-like-post", "posts:posts-api-dislike-post"):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    reverse(url_name),
+                    data=post_id,
+                    HTTP_AUTHORIZATION=f"Bearer {self.token_user_to_post}",
+                )
+            self.assertEqual(200, response.status_code)
+
+            post_statements = [
+                query for query in queries if "posts_postmodel" in query["sql"]
+            ]
+            self.assertEqual(2, len(post_statements))
+
+            post.refresh_from_db()
+            self.assertEqual(post.liked_by.count(), post.likes_counter)
+
+    def test_like_post_status_404_for_nonexistent_post(self):
+        response = self.client.post(
+            reverse("posts:posts-api-like-post"),
+            data={"post_id": 10**9},
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_to_post}",
+        )
+
+        self.assertEqual(404, response.status_code)
+
+
+class PostTestsLikedByMe(BaseTest):
+    def setUp(self):
+        super().setUp()
+
+    def like(self, user, post):
+        post.liked_by.add(user)
+        PostModel.objects.filter(pk=post.pk).update(likes_counter=post.liked_by.count())
+
+    def list_posts(self, token):
+        return self.client.get(
+            reverse("posts:posts-api-list"), HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+
+    def test_list_posts_exposes_liked_by_me_instead_of_liked_by(self):
+        self.like(self.user_a, self.post_a)
+
+        post = self.list_posts(self.token_user_a).data["results"][0]  # type: ignore
+
+        self.assertNotIn("liked_by", post)
+        self.assertTrue(post["liked_by_me"])
+        self.assertEqual(1, post["likes_counter"])
+
+    def test_list_posts_query_count_does_not_grow_with_page_size(self):
+        self.list_posts(self.token_user_a)
+        with CaptureQueriesContext(connection) as few_posts:
+            self.list_posts(self.token_user_a)
+
+        for i in range(8):
+            post = self.create_post(self.user_a, f"Post number: {i}")
+            self.like(self.user_b, post)
+            self.like(self.user_c, post)
+        with CaptureQueriesContext(connection) as many_posts:
+            self.list_posts(self.token_user_a)
+
+        self.assertEqual(len(few_posts), len(many_posts))
+
+    def test_feed_exposes_liked_by_me(self):
+        self.follow(self.user_a, self.user_b)
+        self.like(self.user_a, self.post_b)
+
+        response = self.client.get(
+            reverse("feed:user-feed"), HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}"
+        )
+
+        self.assertTrue(response.data["results"][0]["liked_by_me"])  # type: ignore
+
+    def test_likers_endpoint_paginates_users_who_liked(self):
+        likers = [
+            self.create_user(f"liker_{i}", f"liker_{i}@email.com", "Abcd123!")
+            for i in range(12)
+        ]
+        # Liked in the reverse order of their IDs
+        for liker in reversed(likers):
+            self.like(liker, self.post_a)
+
+        response = self.client.get(
+            reverse("posts:posts-api-likers", args=[self.post_a.id]),  # type: ignore
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+        next_response = self.client.get(
+            response.data["next"],  # type: ignore
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        liker_ids = [
+            liker["id"]
+            for page in (response, next_response)
+            for liker in page.data["results"]  # type: ignore
+        ]
+        self.assertEqual([liker.id for liker in likers], liker_ids)  # type: ignore
+
+    def test_likers_status_404_for_post_not_visible(self):
+        response = self.client.get(
+            reverse("posts:posts-api-likers", args=[self.post_b.id]),  # type: ignore
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        self.assertEqual(404, response.status_code)
+
+
+class PostTestsConditionalGet(BaseTest):
+    def setUp(self):
+        super().setUp()
+
+    def retrieve(self, **headers):
+        return self.client.get(
+            reverse("posts:posts-api-detail", args=[self.post_a.id]),  # type: ignore
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+            **headers,
+        )
+
+    def test_retrieve_post_status_304_when_etag_matches(self):
+        etag = self.retrieve()["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.retrieve(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(304, response.status_code)
+        post_queries = [query for query in queries if "posts_postmodel" in query["sql"]]
+        self.assertEqual(1, len(post_queries))
+
+    def test_retrieve_post_status_304_when_not_modified_since(self):
+        last_modified = self.retrieve()["Last-Modified"]
+
+        response = self.retrieve(HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(304, response.status_code)
+
+    def test_retrieve_post_status_200_after_like(self):
+        etag = self.retrieve()["ETag"]
+        self.client.post(
+            reverse("posts:posts-api-like-post"),
+            data={"post_id": self.post_a.id},  # type: ignore
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_b}",
+        )
+
+        response = self.retrieve(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(1, response.data["likes_counter"])  # type: ignore
+
+    def test_retrieve_other_user_post_status_403_with_etag(self):
+        response = self.client.get(
+            reverse("posts:posts-api-detail", args=[self.post_b.id]),  # type: ignore
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+            HTTP_IF_NONE_MATCH="*",
+        )
+
+        self.assertEqual(403, response.status_code)
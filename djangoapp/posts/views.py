@@ -1,19 +1,40 @@
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.generics import GenericAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
+from users.counters import update_posts_count
+from users.serializers import UserSummarySerializer
+from utils.conditional import conditional_view, make_etag
+from utils.pagination import KeysetPagination
 
-from posts.models import PostModel
-from posts.serializers import DislikeSerializer, LikeSerializer, PostSerializer
+from posts import likes
+from posts.models import PostHashtag, PostModel
+from posts.search import SearchPagination, search_posts
+from posts.serializers import (
+    DislikeSerializer,
+    LikeSerializer,
+    PostSerializer,
+    SearchSerializer,
+)
+from posts.tags import get_index_posts, get_index_queryset, normalize_hashtag
+
+
+# Over the like rows, which have no timestamp: their IDs follow the order
+# the likes were made in
+class LikersPagination(KeysetPagination):
+    ordering = ("-id",)
 
 
 class PostViewSet(ModelViewSet):
     serializer_class = PostSerializer
     queryset = PostModel.objects.all().order_by("-created_at")
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_serializer_class(self):
         if self.action == "like_post":
@@ -29,15 +50,38 @@ class PostViewSet(ModelViewSet):
 
     def get_queryset(self):
         if not self.request.user.is_staff:  # type: ignore
-            return PostModel.objects.filter(poster_user=self.request.user.id)  # type: ignore
-        return super().get_queryset()
+            queryset = PostModel.objects.filter(poster_user=self.request.user.id)  # type: ignore
+        else:
+            queryset = super().get_queryset()
+        return queryset.with_liked_by_me(self.request.user)
 
     def check_post_permissions(self, post):
         if self.request.user.id != post.poster_user.id:  # type: ignore
             raise PermissionDenied("You do not have permission to perform this action.")
 
+    # Validators come from the post row only; the poster is the only one who
+    # can retrieve a post, so other users fall through to the 403
+    def get_post_validators(self, request, *args, **kwargs):
+        validators = (
+            PostModel.objects.filter(pk=kwargs.get("pk"), poster_user=request.user.pk)
+            .with_liked_by_me(request.user)
+            .values_list("updated_at", "likes_counter", "liked_by_me")
+            .first()
+        )
+        if validators is None:
+            return None, None
+
+        updated_at, likes_counter, liked_by_me = validators
+        etag = make_etag(
+            kwargs.get("pk"), updated_at.isoformat(), likes_counter, liked_by_me
+        )
+        return etag, updated_at
+
+    @conditional_view(get_post_validators)
     def retrieve(self, request, *args, **kwargs):
-        post = get_object_or_404(PostModel, pk=kwargs.get("pk"))
+        post = get_object_or_404(
+            PostModel.objects.with_liked_by_me(request.user), pk=kwargs.get("pk")
+        )
         self.check_post_permissions(post)
         serializer = self.get_serializer(post)
         return Response(serializer.data)
@@ -50,22 +94,47 @@ class PostViewSet(ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         post = get_object_or_404(PostModel, pk=kwargs.get("pk"))
         self.check_post_permissions(post)
-        post.delete()
+        with transaction.atomic():
+            post.delete()
+            update_posts_count(post.poster_user_id, -1)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    # Full list of users who liked a post, most recent likes first
+    @action(methods=["GET"], detail=True, url_path="likers")
+    def likers(self, request, *args, **kwargs):
+        post = get_object_or_404(
+            PostModel.objects.visible_to(request.user), pk=kwargs.get("pk")
+        )
+
+        likes = PostModel.liked_by.through.objects.filter(
+            postmodel=post
+        ).select_related("user")
+        paginator = LikersPagination()
+        page = paginator.paginate_queryset(likes, request, view=self)
+        serializer = UserSummarySerializer([like.user for like in page], many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    # Full-text search over the posts the user can see, best matches first
+    @action(methods=["GET"], detail=False, url_path="search")
+    def search(self, request, *args, **kwargs):
+        query = SearchSerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        posts = search_posts(
+            PostModel.objects.visible_to(request.user).with_liked_by_me(request.user),
+            query.validated_data["q"],
+        ).order_by(*SearchPagination.ordering)
+        paginator = SearchPagination()
+        page = paginator.paginate_queryset(posts, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     @action(methods=["POST"], detail=False, url_path="like")
     def like_post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        post_id = serializer.validated_data["post_id"]
-
-        post = get_object_or_404(PostModel, pk=post_id)
-        if post.liked_by.filter(pk=request.user.pk).exists():
-            raise ValidationError({"detail": "You already liked this post."})
 
-        post.liked_by.add(request.user)
-        post.likes_counter += 1
-        post.save()
+        likes.like_post(serializer.validated_data["post_id"], request.user.pk)
         return Response(
             {"message": "Post liked successfully."}, status=status.HTTP_200_OK
         )
@@ -74,17 +143,26 @@ class PostViewSet(ModelViewSet):
     def dislike_post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        post_id = serializer.validated_data["post_id"]
-
-        post = get_object_or_404(PostModel, pk=post_id)
-        if post.liked_by.filter(pk=request.user.pk).exists():
-            post.liked_by.remove(request.user)
-            post.likes_counter -= 1
-            post.save()
-            return Response(
-                {"message": "Post disliked successfully."}, status=status.HTTP_200_OK
-            )
-
-        raise ValidationError(
-            {"detail": "You cannot dislike a post you have not liked yet."}
+
+        likes.dislike_post(serializer.validated_data["post_id"], request.user.pk)
+        return Response(
+            {"message": "Post disliked successfully."}, status=status.HTTP_200_OK
+        )
+
+
+# Visible posts carrying a hashtag, newest first
+class HashtagPostsView(GenericAPIView):
+    serializer_class = PostSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get(self, request, *args, **kwargs):
+        entries = get_index_queryset(
+            PostHashtag.objects.filter(
+                hashtag__name=normalize_hashtag(kwargs.get("name"))
+            ),
+            request.user,
         )
+        page = self.paginate_queryset(entries)
+        serializer = self.get_serializer(get_index_posts(page), many=True)
+        return self.get_paginated_response(serializer.data)
@@ -0,0 +1,31 @@
+from django.contrib import admin
+from django.utils.html import format_html
+
+from profiling.models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ["created_at", "method", "path", "status_code", "duration_ms", "user"]
+    list_filter = ["method", "status_code"]
+    search_fields = ["path"]
+    fields = [
+        "created_at",
+        "user",
+        "method",
+        "path",
+        "status_code",
+        "duration_ms",
+        "formatted_report",
+    ]
+    readonly_fields = fields
+
+    @admin.display(description="Report")
+    def formatted_report(self, profile):
+        return format_html("<pre>{}</pre>", profile.report)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,121 @@
+import cProfile
+import io
+import pstats
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.exceptions import APIException
+from users.authentication import CachedJWTAuthentication
+
+from profiling.models import RequestProfile
+
+RATE_LIMIT_KEY = "profiler:window:{}"
+
+
+def get_staff_user(request):
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        # The API authenticates in the views, so the token is checked here
+        try:
+            authenticated = CachedJWTAuthentication().authenticate(request)
+        except APIException:
+            authenticated = None
+        user = authenticated[0] if authenticated else None
+    return user if user is not None and user.is_staff else None
+
+
+# At most PROFILER_RATE_LIMIT profiled requests per PROFILER_RATE_PERIOD
+# seconds, counted in the cache. The limit is for the whole deployment
+# because the cache is shared by the workers: the settings refuse to start
+# the multi-worker server modes on a per-process cache.
+def acquire_profile_slot():
+    period = settings.PROFILER_RATE_PERIOD
+    key = RATE_LIMIT_KEY.format(int(time.time() // period))
+    cache.add(key, 0, period)
+    try:
+        used = cache.incr(key)
+    except ValueError:
+        # Expired between the two calls
+        cache.set(key, 1, period)
+        used = 1
+    return used <= settings.PROFILER_RATE_LIMIT
+
+
+def format_report(profiler):
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(
+        settings.PROFILER_REPORT_LINES
+    )
+    return stream.getvalue()
+
+
+def store_profile(request, response, user, duration, report):
+    profile = RequestProfile.objects.create(
+        user=user,
+        method=request.method,
+        path=request.get_full_path()[:2048],
+        status_code=response.status_code,
+        duration_ms=duration * 1000,
+        report=report,
+    )
+    stale = RequestProfile.objects.values_list("pk", flat=True)[
+        settings.PROFILER_MAX_REPORTS :
+    ]
+    RequestProfile.objects.filter(pk__in=list(stale)).delete()
+    return profile
+
+
+# Staff users profile a single request by sending the PROFILER_HEADER header:
+# the view runs under cProfile and the call statistics are stored as a
+# RequestProfile, listed in the admin. With the value "inline" the report is
+# returned as text instead of the view's response. Anyone else's header is
+# ignored. cProfile only sees the current thread, so requests served by the
+# async handler (SERVER_MODE=asgi) are not profiled.
+class ProfilerMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        mode = request.headers.get(settings.PROFILER_HEADER)
+        user = get_staff_user(request) if mode else None
+        if user is None:
+            return self.get_response(request)
+        if not acquire_profile_slot():
+            response = self.get_response(request)
+            response["X-Profile-Skipped"] = "rate-limited"
+            return response
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - started
+
+        report = format_report(profiler)
+        profile = store_profile(request, response, user, duration, report)
+        if mode.lower() == "inline":
+            response = HttpResponse(report, content_type="text/plain")
+            response["X-Profile-Status"] = profile.status_code
+        response["X-Profile-Report"] = profile.pk
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if settings.PROFILER_HEADER in request.headers:
+            response["X-Profile-Skipped"] = "async"
+        return response
@@ -0,0 +1,89 @@
+from django.test import override_settings
+from django.urls import reverse
+from profiling.models import RequestProfile
+from tests_base.base_test import BaseTest
+
+
+class ProfilerMiddlewareTests(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.staff_user = self.create_super_user(
+            "staff_user", "staff_user@email.com", "Abcd123!"
+        )
+        self.token_staff_user = self.create_token(self.staff_user)
+
+    def get(self, token, profile="1"):
+        return self.client.get(
+            reverse("posts:posts-api-list"),
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+            HTTP_X_PROFILE=profile,
+        )
+
+    def test_staff_request_is_profiled_and_stored(self):
+        response = self.get(self.token_staff_user)
+
+        self.assertEqual(200, response.status_code)
+        self.assertIn("results", response.json())
+        profile = RequestProfile.objects.get()
+        self.assertEqual(str(profile.pk), response["X-Profile-Report"])
+        self.assertEqual(self.staff_user, profile.user)
+        self.assertEqual("GET", profile.method)
+        self.assertEqual(reverse("posts:posts-api-list"), profile.path)
+        self.assertEqual(200, profile.status_code)
+        self.assertIn("cumulative", profile.report)
+        self.assertIn("views.py", profile.report)
+
+    def test_inline_report_replaces_response(self):
+        response = self.get(self.token_staff_user, profile="inline")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("text/plain", response["Content-Type"])
+        self.assertEqual("200", response["X-Profile-Status"])
+        self.assertEqual(
+            RequestProfile.objects.get().report, response.content.decode()
+        )
+
+    def test_header_ignored_for_non_staff_users(self):
+        response = self.get(self.token_user_a)
+
+        self.assertEqual(200, response.status_code)
+        self.assertNotIn("X-Profile-Report", response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_header_ignored_for_anonymous_and_invalid_tokens(self):
+        for token in ("not-a-token", ""):
+            response = self.get(token)
+
+            self.assertEqual(401, response.status_code)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(PROFILER_RATE_LIMIT=2)
+    def test_profiles_rate_limited(self):
+        responses = [self.get(self.token_staff_user) for _ in range(3)]
+
+        self.assertIn("X-Profile-Report", responses[1])
+        self.assertEqual("rate-limited", responses[2]["X-Profile-Skipped"])
+        self.assertEqual(200, responses[2].status_code)
+        self.assertEqual(2, RequestProfile.objects.count())
+
+    @override_settings(PROFILER_MAX_REPORTS=2, PROFILER_RATE_LIMIT=10)
+    def test_only_recent_reports_kept(self):
+        report_ids = [
+            int(self.get(self.token_staff_user)["X-Profile-Report"]) for _ in range(3)
+        ]
+
+        self.assertEqual(
+            set(report_ids[1:]),
+            set(RequestProfile.objects.values_list("pk", flat=True)),
+        )
+
+    def test_report_viewable_in_admin(self):
+        profile_id = self.get(self.token_staff_user)["X-Profile-Report"]
+        self.client.force_login(self.staff_user)
+
+        response = self.client.get(
+            reverse("admin:profiling_requestprofile_change", args=[profile_id])
+        )
+
+        self.assertEqual(200, response.status_code)
+        self.assertContains(response, "<pre>")
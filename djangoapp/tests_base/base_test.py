@@ -1,11 +1,16 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from posts.models import PostModel
 from rest_framework_simplejwt.tokens import AccessToken
+from users.counters import update_follow_counts, update_posts_count
+from users.models import Follow
 
 
 class BaseTest(TestCase):
     def setUp(self):
+        # IDs are reused between tests, so cached feeds must not leak
+        cache.clear()
         self.User = get_user_model()
 
         self.user_a = self.create_user(
@@ -44,17 +49,35 @@ class BaseTest(TestCase):
         )
 
     def create_post(self, user, content):
-        return PostModel.objects.create(poster_user=user, text_content=content)
+        post = PostModel.objects.create(poster_user=user, text_content=content)
+        update_posts_count(user.id, 1)
+        return post
 
     def create_token(self, user):
         return AccessToken.for_user(user)
 
     def follow(self, user_following, user_to_follow):
-        user_following.profile.following.add(user_to_follow.profile)
-        user_to_follow.profile.followers.add(user_following.profile)
+        Follow.objects.create(follower=user_following, followee=user_to_follow)
+        update_follow_counts(user_following.id, [user_to_follow.id], 1)
         self.refresh_user_profiles(user_following, user_to_follow)
 
     def unfollow(self, user_following, user_to_follow):
-        user_following.profile.following.remove(user_to_follow.profile)
-        user_to_follow.profile.followers.remove(user_following.profile)
+        deleted, _ = Follow.objects.filter(
+            follower=user_following, followee=user_to_follow
+        ).delete()
+        if deleted:
+            update_follow_counts(user_following.id, [user_to_follow.id], -1)
         self.refresh_user_profiles(user_following, user_to_follow)
+
+    # Fails when the request ran more SQL queries than the budget, by default
+    # the one configured for its endpoint in REQUEST_QUERY_BUDGETS
+    def assertWithinQueryBudget(self, response, budget=None):
+        metrics = response.metrics
+        if budget is None:
+            budget = metrics.query_budget
+        self.assertLessEqual(
+            metrics.queries,
+            budget,
+            f"{metrics.endpoint} ran {metrics.queries} SQL queries, "
+            f"over its budget of {budget}",
+        )
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class TrendingConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'trending'
+
+    def ready(self) -> None:
+        import trending.signals  # noqa: F401
+        super().ready()
@@ -0,0 +1,24 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+
+from trending.scores import flush_engagement
+
+
+# Run it every few seconds (cron, a sidecar loop): the trending view only
+# scores one batch per TRENDING_FLUSH_INTERVAL. The buffer is filled by the
+# server processes, so the command needs the cache they share.
+class Command(BaseCommand):
+    help = "Score the likes and posts buffered for the trending rankings."
+
+    def handle(self, *args, **options):
+        if isinstance(caches["default"], LocMemCache):
+            raise CommandError(
+                "The trending buffer is in the server processes' local memory "
+                "cache; set CACHE_BACKEND to a shared cache."
+            )
+
+        count = flush_engagement()
+        if count is None:
+            raise CommandError("Another flush is running.")
+        self.stdout.write(f"Scored {count} buffered events.")
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from trending.scores import prune_scores
+
+
+# Scores from before the previous epoch of their window are worth less than
+# 2 ** -64 of a current event, so they only take space
+class Command(BaseCommand):
+    help = "Delete trending scores that no longer affect the ranking."
+
+    def handle(self, *args, **options):
+        deleted = prune_scores()
+        self.stdout.write(f"Deleted {deleted} trending scores.")
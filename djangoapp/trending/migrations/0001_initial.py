@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Post'), ('hashtag', 'Hashtag')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('window', models.CharField(max_length=20)),
+                ('epoch', models.IntegerField()),
+                ('score', models.FloatField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'window', 'epoch', '-score'], name='trending_score_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'window', 'epoch', 'object_id'), name='unique_trending_score')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import models
+
+
+# Forward-decayed engagement of a post or hashtag in one trending window,
+# relative to the landmark of the epoch (see trending.scores)
+class TrendingScore(models.Model):
+    POST = "post"
+    HASHTAG = "hashtag"
+    KIND_CHOICES = [(POST, "Post"), (HASHTAG, "Hashtag")]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    window = models.CharField(max_length=20)
+    epoch = models.IntegerField()
+    score = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "window", "epoch", "object_id"],
+                name="unique_trending_score",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["kind", "window", "epoch", "-score"],
+                name="trending_score_rank_idx",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} ({self.window}): {self.score:.2f}"
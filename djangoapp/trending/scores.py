@@ -0,0 +1,339 @@
+import heapq
+import operator
+import time
+import uuid
+from functools import reduce
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, F, FloatField, Q, Value, When
+from posts.models import PostModel
+
+from trending.models import TrendingScore
+
+# Forward decay: an event at time t adds weight * 2 ** ((t - L) / half_life)
+# to its item's score, where L is a fixed landmark. Scores only ever grow, so
+# they are kept with plain F() increments; dividing by
+# 2 ** ((now - L) / half_life) gives the engagement decayed to now, which
+# never changes the ranking. Each window has its own half-life.
+#
+# The landmark moves forward every EPOCH_HALF_LIVES half-lives to keep the
+# factors far from overflowing. Scores are stored per epoch: a row of the
+# previous epoch is worth 2 ** -EPOCH_HALF_LIVES of its value in the current
+# one, and older rows are negligible (see prune_trending).
+EPOCH_HALF_LIVES = 32
+EPOCH_FACTOR = 2.0**-EPOCH_HALF_LIVES
+
+TOP_KEY = "trending:top:{}:{}"
+
+
+def get_epoch(half_life, now):
+    return int(now // (half_life * EPOCH_HALF_LIVES))
+
+
+def get_landmark(half_life, epoch):
+    return epoch * half_life * EPOCH_HALF_LIVES
+
+
+def decay(score, half_life, epoch, now):
+    return score * 2 ** ((get_landmark(half_life, epoch) - now) / half_life)
+
+
+# Likes and new posts are not scored in the request that makes them: each one
+# is appended to a buffer in the cache (a sequence number and one key per
+# event, two cache calls and no query), and flush_engagement scores the
+# buffered events in batches: one batch at most every TRENDING_FLUSH_INTERVAL
+# seconds from the trending view, all of them from manage.py flush_trending.
+# The buffer must live in a cache shared by the workers and the command (see
+# CACHES).
+BUFFER_SEQUENCE_KEY = "trending:buffer:sequence"
+BUFFER_FLUSHED_KEY = "trending:buffer:flushed"
+BUFFER_RETRY_KEY = "trending:buffer:retry"
+BUFFER_EVENT_KEY = "trending:buffer:event:{}"
+FLUSH_DUE_KEY = "trending:buffer:due"
+FLUSH_LOCK_KEY = "trending:buffer:lock"
+# Only a crashed flush holds the lock that long
+FLUSH_LOCK_TIMEOUT = 600
+
+
+def buffer_post_engagement(post_id, weight, now=None):
+    now = time.time() if now is None else now
+    try:
+        sequence = cache.incr(BUFFER_SEQUENCE_KEY)
+    except ValueError:
+        cache.add(BUFFER_SEQUENCE_KEY, 0, timeout=None)
+        sequence = cache.incr(BUFFER_SEQUENCE_KEY)
+    cache.set(
+        BUFFER_EVENT_KEY.format(sequence),
+        (post_id, weight, now),
+        settings.TRENDING_BUFFER_TIMEOUT,
+    )
+
+
+# Scores the buffered events, TRENDING_FLUSH_BATCH_SIZE per batch, and
+# returns how many there were, or None when another flush is running; with
+# max_batches, the newer events are left for the next flush. A sequence
+# number is taken before its event is written, so an event missing from the
+# cache is looked up once more by the next flush before it is given up as
+# expired.
+def flush_engagement(max_batches=None):
+    token = uuid.uuid4().hex
+    if not cache.add(FLUSH_LOCK_KEY, token, FLUSH_LOCK_TIMEOUT):
+        return None
+    try:
+        return flush_buffer(max_batches)
+    finally:
+        if cache.get(FLUSH_LOCK_KEY) == token:
+            cache.delete(FLUSH_LOCK_KEY)
+
+
+def flush_buffer(max_batches):
+    last = cache.get(BUFFER_SEQUENCE_KEY, 0)
+    flushed = cache.get(BUFFER_FLUSHED_KEY, 0)
+    retry = cache.get(BUFFER_RETRY_KEY, [])
+    # The sequence started over (the cache was cleared)
+    if flushed > last:
+        flushed = 0
+        retry = []
+    batch_size = settings.TRENDING_FLUSH_BATCH_SIZE
+    if max_batches is not None:
+        last = min(last, max(flushed, flushed + max_batches * batch_size - len(retry)))
+
+    sequences = [*retry, *range(flushed + 1, last + 1)]
+    missing = []
+    count = 0
+    for start in range(0, len(sequences), batch_size):
+        batch = sequences[start : start + batch_size]
+        keys = {BUFFER_EVENT_KEY.format(sequence): sequence for sequence in batch}
+        events = cache.get_many(list(keys))
+        cache.delete_many(list(events))
+        missing += [
+            sequence
+            for key, sequence in keys.items()
+            if key not in events and sequence not in retry
+        ]
+        record_post_events(list(events.values()))
+        count += len(events)
+
+    cache.set_many({BUFFER_FLUSHED_KEY: last, BUFFER_RETRY_KEY: missing}, None)
+    return count
+
+
+# One batch per request, so the requests that flush stay within their budget
+def flush_engagement_if_due():
+    if cache.add(FLUSH_DUE_KEY, True, settings.TRENDING_FLUSH_INTERVAL):
+        flush_engagement(max_batches=1)
+
+
+# Scores (post_id, weight, time) events for their posts and hashtags. Posts
+# deleted since are skipped.
+def record_post_events(events):
+    post_ids = {post_id for post_id, _, _ in events}
+    items_by_post = {}
+    rows = PostModel.objects.filter(pk__in=post_ids).values_list(
+        "id", "hashtag_entries__hashtag_id"
+    )
+    for post_id, hashtag_id in rows:
+        items = items_by_post.setdefault(post_id, [(TrendingScore.POST, post_id)])
+        if hashtag_id is not None:
+            items.append((TrendingScore.HASHTAG, hashtag_id))
+
+    record_events(
+        [
+            (items_by_post[post_id], weight, now)
+            for post_id, weight, now in events
+            if post_id in items_by_post
+        ]
+    )
+
+
+def record_post_engagement(post_id, weight, now=None):
+    now = time.time() if now is None else now
+    record_post_events([(post_id, weight, now)])
+
+
+def record_engagement(items, weight, now=None):
+    now = time.time() if now is None else now
+    record_events([(items, weight, now)])
+
+
+# Adds the weight of each (items, weight, time) event to its items in all
+# windows: one insert for the missing rows, one update and one read of the
+# updated scores, whatever the number of events, items and windows
+def record_events(events):
+    increments = {}
+    for items, weight, now in events:
+        for window, half_life in settings.TRENDING_WINDOWS.items():
+            epoch = get_epoch(half_life, now)
+            landmark = get_landmark(half_life, epoch)
+            increment = weight * 2 ** ((now - landmark) / half_life)
+            for kind, object_id in items:
+                key = (kind, object_id, window, epoch)
+                increments[key] = increments.get(key, 0) + increment
+    if not increments:
+        return
+
+    TrendingScore.objects.bulk_create(
+        [
+            TrendingScore(
+                kind=kind, object_id=object_id, window=window, epoch=epoch, score=0
+            )
+            for kind, object_id, window, epoch in increments
+        ],
+        ignore_conflicts=True,
+    )
+
+    ids_by_group = {}
+    for kind, object_id, window, epoch in increments:
+        ids_by_group.setdefault((kind, window, epoch), set()).add(object_id)
+    TrendingScore.objects.filter(
+        reduce(
+            operator.or_,
+            (
+                Q(kind=kind, window=window, epoch=epoch, object_id__in=ids)
+                for (kind, window, epoch), ids in ids_by_group.items()
+            ),
+        )
+    ).update(
+        score=F("score")
+        + Case(
+            *[
+                When(
+                    kind=kind,
+                    object_id=object_id,
+                    window=window,
+                    epoch=epoch,
+                    then=Value(increment),
+                )
+                for (kind, object_id, window, epoch), increment in increments.items()
+            ],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    )
+
+    update_top(ids_by_group)
+
+
+# The top TRENDING_TOP_K items of a window live in the cache as
+# {"epoch": epoch, "scores": {object_id: score}}, rebuilt from the table when
+# missing. The updated items are read back from the table with the share of
+# the previous epoch, as in load_top, so their score carries over a rollover.
+# Concurrent flushes can lose updates to it, so it expires after
+# TRENDING_CACHE_TIMEOUT seconds.
+def update_top(ids_by_group):
+    tops = {}
+    ids = {}
+    for (kind, window, epoch), object_ids in ids_by_group.items():
+        if (kind, window) not in tops:
+            tops[(kind, window)] = cache.get(TOP_KEY.format(kind, window))
+        top = tops[(kind, window)]
+        if top is None:
+            continue
+        tops[(kind, window)] = shift_top(top, max(top["epoch"], epoch))
+        ids.setdefault((kind, window), set()).update(object_ids)
+    if not ids:
+        return
+
+    rows = TrendingScore.objects.filter(
+        reduce(
+            operator.or_,
+            (
+                Q(
+                    kind=kind,
+                    window=window,
+                    epoch__in=[
+                        tops[(kind, window)]["epoch"] - 1,
+                        tops[(kind, window)]["epoch"],
+                    ],
+                    object_id__in=object_ids,
+                )
+                for (kind, window), object_ids in ids.items()
+            ),
+        )
+    ).values_list("kind", "window", "epoch", "object_id", "score")
+    updated = {key: dict.fromkeys(object_ids, 0) for key, object_ids in ids.items()}
+    for kind, window, epoch, object_id, score in rows:
+        if epoch != tops[(kind, window)]["epoch"]:
+            score *= EPOCH_FACTOR
+        updated[(kind, window)][object_id] += score
+
+    for (kind, window), scores in updated.items():
+        top = tops[(kind, window)]
+        top["scores"].update(scores)
+        if len(top["scores"]) > settings.TRENDING_TOP_K:
+            best = heapq.nlargest(
+                settings.TRENDING_TOP_K, top["scores"].items(), key=lambda item: item[1]
+            )
+            top["scores"] = dict(best)
+        cache.set(TOP_KEY.format(kind, window), top, settings.TRENDING_CACHE_TIMEOUT)
+
+
+def shift_top(top, epoch):
+    if top["epoch"] == epoch:
+        return top
+    factor = EPOCH_FACTOR ** (epoch - top["epoch"])
+    return {
+        "epoch": epoch,
+        "scores": {
+            object_id: score * factor for object_id, score in top["scores"].items()
+        },
+    }
+
+
+# The best TRENDING_TOP_K items of either epoch are the candidates, and each
+# gets its rows of both epochs, in one query
+def load_top(kind, window, epoch):
+    scores = TrendingScore.objects.filter(kind=kind, window=window)
+    candidates = reduce(
+        operator.or_,
+        (
+            Q(
+                object_id__in=scores.filter(epoch=row_epoch)
+                .order_by("-score")
+                .values("object_id")[: settings.TRENDING_TOP_K]
+            )
+            for row_epoch in (epoch - 1, epoch)
+        ),
+    )
+    rows = scores.filter(candidates, epoch__in=[epoch - 1, epoch]).values_list(
+        "epoch", "object_id", "score"
+    )
+
+    totals = {}
+    for row_epoch, object_id, score in rows:
+        factor = 1 if row_epoch == epoch else EPOCH_FACTOR
+        totals[object_id] = totals.get(object_id, 0) + score * factor
+    best = heapq.nlargest(
+        settings.TRENDING_TOP_K, totals.items(), key=lambda item: item[1]
+    )
+    return {"epoch": epoch, "scores": dict(best)}
+
+
+# [(object_id, engagement decayed to now)], best first
+def get_trending(kind, window, now=None):
+    now = time.time() if now is None else now
+    half_life = settings.TRENDING_WINDOWS[window]
+    epoch = get_epoch(half_life, now)
+
+    key = TOP_KEY.format(kind, window)
+    top = cache.get(key)
+    if top is None or top["epoch"] != epoch:
+        top = load_top(kind, window, epoch)
+        cache.set(key, top, settings.TRENDING_CACHE_TIMEOUT)
+
+    ranking = sorted(top["scores"].items(), key=lambda item: item[1], reverse=True)
+    return [
+        (object_id, decay(score, half_life, epoch, now)) for object_id, score in ranking
+    ]
+
+
+def prune_scores(now=None):
+    now = time.time() if now is None else now
+    deleted = 0
+    for window, half_life in settings.TRENDING_WINDOWS.items():
+        count, _ = TrendingScore.objects.filter(
+            window=window, epoch__lt=get_epoch(half_life, now) - 1
+        ).delete()
+        deleted += count
+    return deleted
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from posts.models import PostModel
+from posts.signals import post_liked
+
+from trending.models import TrendingScore
+from trending.scores import buffer_post_engagement
+
+
+# After the commit, so a rolled back post is not buffered
+@receiver(post_save, sender=PostModel)
+def record_new_post(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(
+            lambda: buffer_post_engagement(instance.pk, settings.TRENDING_POST_WEIGHT)
+        )
+
+
+# Unlikes are not subtracted: the engagement happened, and its weight at the
+# time of the like is no longer known
+@receiver(post_liked)
+def record_like(sender, post_id, **kwargs):
+    buffer_post_engagement(post_id, settings.TRENDING_LIKE_WEIGHT)
+
+
+@receiver(post_delete, sender=PostModel)
+def delete_post_scores(sender, instance, **kwargs):
+    TrendingScore.objects.filter(
+        kind=TrendingScore.POST, object_id=instance.pk
+    ).delete()
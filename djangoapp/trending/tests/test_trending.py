@@ -0,0 +1,239 @@
+import io
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Hashtag
+from tests_base.base_test import BaseTest
+from trending.models import TrendingScore
+from trending.scores import (
+    BUFFER_EVENT_KEY,
+    BUFFER_SEQUENCE_KEY,
+    EPOCH_HALF_LIVES,
+    FLUSH_LOCK_KEY,
+    buffer_post_engagement,
+    flush_engagement,
+    get_trending,
+    prune_scores,
+    record_engagement,
+    record_post_engagement,
+)
+
+HOUR = 3600
+# Start of an epoch of the "hour" window
+START = 1000 * EPOCH_HALF_LIVES * HOUR
+
+
+@override_settings(TRENDING_WINDOWS={"hour": HOUR})
+class TrendingScoreTests(BaseTest):
+    def record(self, object_id, now, weight=1):
+        record_engagement([(TrendingScore.POST, object_id)], weight, now)
+
+    def test_recent_engagement_outranks_older_engagement(self):
+        for _ in range(3):
+            self.record(1, START)
+        for _ in range(2):
+            self.record(2, START + 2 * HOUR)
+
+        ranking = get_trending(TrendingScore.POST, "hour", now=START + 2 * HOUR)
+
+        self.assertEqual([2, 1], [object_id for object_id, _ in ranking])
+        # Two half-lives later three likes weigh as much as 3 / 4 of a like
+        self.assertAlmostEqual(2, ranking[0][1])
+        self.assertAlmostEqual(0.75, ranking[1][1])
+
+    def test_scores_carry_over_epoch_boundary(self):
+        boundary = START + EPOCH_HALF_LIVES * HOUR
+        get_trending(TrendingScore.POST, "hour", now=START)
+        self.record(1, boundary - HOUR, weight=4)
+        self.record(2, boundary + HOUR)
+
+        for cached in (True, False):
+            if not cached:
+                cache.clear()
+            ranking = dict(
+                get_trending(TrendingScore.POST, "hour", now=boundary + HOUR)
+            )
+            self.assertAlmostEqual(1, ranking[1])
+            self.assertAlmostEqual(1, ranking[2])
+
+    @override_settings(TRENDING_TOP_K=3)
+    def test_top_is_bounded_and_rebuilt_from_scores(self):
+        get_trending(TrendingScore.POST, "hour", now=START)
+        for object_id in range(1, 6):
+            self.record(object_id, START, weight=object_id)
+
+        cached = get_trending(TrendingScore.POST, "hour", now=START)
+        cache.clear()
+        rebuilt = get_trending(TrendingScore.POST, "hour", now=START)
+
+        self.assertEqual([5, 4, 3], [object_id for object_id, _ in cached])
+        self.assertEqual(cached, rebuilt)
+
+    @override_settings(TRENDING_TOP_K=1)
+    def test_item_entering_top_keeps_previous_epoch_share(self):
+        boundary = START + EPOCH_HALF_LIVES * HOUR
+        get_trending(TrendingScore.POST, "hour", now=START)
+        self.record(1, boundary - HOUR, weight=5)
+        # Left out of the top by 1
+        self.record(2, boundary - HOUR, weight=3)
+        self.record(2, boundary + HOUR)
+
+        cached = get_trending(TrendingScore.POST, "hour", now=boundary + HOUR)
+        cache.clear()
+        rebuilt = get_trending(TrendingScore.POST, "hour", now=boundary + HOUR)
+
+        self.assertEqual(2, cached[0][0])
+        self.assertAlmostEqual(1.75, cached[0][1])
+        self.assertEqual(cached, rebuilt)
+
+    def test_prune_deletes_old_epochs(self):
+        self.record(1, START - 2 * EPOCH_HALF_LIVES * HOUR)
+        self.record(1, START - HOUR)
+        self.record(1, START)
+
+        self.assertEqual(1, prune_scores(now=START))
+        self.assertEqual(2, TrendingScore.objects.count())
+
+        output = io.StringIO()
+        call_command("prune_trending", stdout=output)
+        self.assertIn("Deleted 2 trending scores.", output.getvalue())
+
+
+class TrendingViewTests(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.follow(self.user_a, self.user_b)
+
+    def create(self, token, text):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("posts:posts-api-list"),
+                data={"text_content": text},
+                HTTP_AUTHORIZATION=f"Bearer {token}",
+            )
+        return response.json()["id"]
+
+    def like(self, token, post_id):
+        response = self.client.post(
+            reverse("posts:posts-api-like-post"),
+            data={"post_id": post_id},
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        self.assertEqual(200, response.status_code)
+
+    def get(self, **params):
+        return self.client.get(
+            reverse("trending:trending"),
+            params,
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+    def test_trending_ranks_liked_posts_and_their_hashtags(self):
+        quiet = self.create(self.token_user_b, "#quiet post")
+        popular = self.create(self.token_user_b, "#popular post")
+        self.create(self.token_user_c, "#hidden post from a stranger")
+        for token in (self.token_user_a, self.token_user_c):
+            self.like(token, popular)
+
+        response = self.get(window="hour")
+
+        self.assertEqual(200, response.status_code)
+        data = response.json()
+        self.assertEqual("hour", data["window"])
+        self.assertEqual([popular, quiet], [post["id"] for post in data["posts"]])
+        self.assertTrue(data["posts"][0]["liked_by_me"])
+        hashtags = [hashtag["name"] for hashtag in data["hashtags"]]
+        self.assertEqual("popular", hashtags[0])
+        self.assertEqual({"popular", "quiet", "hidden"}, set(hashtags))
+
+    def test_likes_are_buffered_until_flushed(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.like(self.token_user_a, self.post_b.id)
+            self.like(self.token_user_c, self.post_b.id)
+
+        self.assertFalse(
+            [query for query in queries if "trending_" in query["sql"]]
+        )
+        self.assertFalse(TrendingScore.objects.exists())
+
+        self.assertEqual(2, flush_engagement())
+        self.assertEqual(
+            [self.post_b.id],
+            [post["id"] for post in self.get(window="hour").json()["posts"]],
+        )
+        self.assertEqual(0, flush_engagement())
+
+    def test_event_written_after_a_flush_is_scored_by_the_next_one(self):
+        # The sequence number is taken, the event not written yet
+        cache.set(BUFFER_SEQUENCE_KEY, 1, None)
+        self.assertEqual(0, flush_engagement())
+
+        buffer_post_engagement(self.post_b.id, 1)
+        cache.set(BUFFER_EVENT_KEY.format(1), (self.post_b.id, 1, START), None)
+
+        self.assertEqual(2, flush_engagement())
+        self.assertEqual(0, flush_engagement())
+
+    def test_flush_does_not_run_twice_at_once(self):
+        buffer_post_engagement(self.post_b.id, 1)
+        cache.add(FLUSH_LOCK_KEY, "other flush")
+
+        self.assertIsNone(flush_engagement())
+        cache.delete(FLUSH_LOCK_KEY)
+        self.assertEqual(1, flush_engagement())
+
+    def test_flush_command_needs_a_shared_cache(self):
+        buffer_post_engagement(self.post_b.id, 1)
+
+        with self.assertRaisesMessage(CommandError, "shared cache"):
+            call_command("flush_trending", stdout=io.StringIO())
+        self.assertEqual(1, flush_engagement())
+
+    def test_deleted_posts_leave_trending(self):
+        post_id = self.create(self.token_user_a, "short lived")
+
+        self.client.delete(
+            reverse("posts:posts-api-detail", args=[post_id]),
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        self.assertEqual([], self.get().json()["posts"])
+        self.assertFalse(
+            TrendingScore.objects.filter(kind=TrendingScore.POST, object_id=post_id)
+        )
+
+    def test_trending_reads_constant_number_of_queries(self):
+        for i in range(15):
+            post_id = self.create(self.token_user_b, f"#tag{i} post {i}")
+            self.like(self.token_user_a, post_id)
+
+        cold_response = self.get()
+        response = self.get()
+
+        self.assertEqual(15, len(response.json()["hashtags"]))
+        self.assertEqual(
+            [hashtag["name"] for hashtag in cold_response.json()["hashtags"]],
+            [hashtag["name"] for hashtag in response.json()["hashtags"]],
+        )
+        # The cold request also scores the buffered posts and likes
+        self.assertWithinQueryBudget(cold_response)
+        # User, visible posts and hashtag names; the rankings come from the cache
+        self.assertWithinQueryBudget(response, budget=3)
+
+    def test_record_post_engagement_without_hashtags(self):
+        record_post_engagement(self.post_a.id, 1)
+
+        self.assertEqual(
+            {TrendingScore.POST},
+            set(TrendingScore.objects.values_list("kind", flat=True)),
+        )
+        self.assertFalse(Hashtag.objects.exists())
+
+    def test_trending_status_400_with_unknown_window(self):
+        response = self.get(window="decade")
+
+        self.assertEqual(400, response.status_code)
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from trending.views import TrendingView
+
+app_name = "trending"
+
+urlpatterns = [
+    path("", TrendingView.as_view(), name="trending"),
+]
@@ -0,0 +1,64 @@
+from django.conf import settings
+from posts.models import Hashtag, PostModel
+from posts.serializers import PostSerializer
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from trending.models import TrendingScore
+from trending.scores import flush_engagement_if_due, get_trending
+
+
+# Reads the cached top-K of the window, so the cost does not depend on the
+# number of posts: two queries for at most TRENDING_TOP_K rows each. At most
+# every TRENDING_FLUSH_INTERVAL seconds a request first scores the buffered
+# likes and posts (see trending.scores).
+class TrendingView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        window = request.query_params.get("window", settings.TRENDING_DEFAULT_WINDOW)
+        if window not in settings.TRENDING_WINDOWS:
+            raise ValidationError(
+                {"window": f"Choose one of: {', '.join(settings.TRENDING_WINDOWS)}."}
+            )
+
+        flush_engagement_if_due()
+        return Response(
+            {
+                "window": window,
+                "posts": self.get_posts(window),
+                "hashtags": self.get_hashtags(window),
+            }
+        )
+
+    # Trending posts the user can see, best first
+    def get_posts(self, window):
+        ranking = get_trending(TrendingScore.POST, window)
+        posts = PostModel.objects.visible_to(self.request.user).with_liked_by_me(
+            self.request.user
+        )
+        posts_by_id = posts.in_bulk([post_id for post_id, _ in ranking])
+        posts = [
+            posts_by_id[post_id] for post_id, _ in ranking if post_id in posts_by_id
+        ]
+
+        serializer = PostSerializer(
+            posts[: settings.TRENDING_SIZE],
+            many=True,
+            context={"request": self.request},
+        )
+        return serializer.data
+
+    def get_hashtags(self, window):
+        ranking = get_trending(TrendingScore.HASHTAG, window)[: settings.TRENDING_SIZE]
+        names = dict(
+            Hashtag.objects.filter(pk__in=[hashtag_id for hashtag_id, _ in ranking])
+            .values_list("id", "name")
+        )
+        return [
+            {"name": names[hashtag_id], "score": round(score, 3)}
+            for hashtag_id, score in ranking
+            if hashtag_id in names
+        ]
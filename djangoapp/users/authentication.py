@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+USER_KEY = "auth:user:{}"
+
+
+def get_user_key(user_id):
+    return USER_KEY.format(user_id)
+
+
+# Saving or deleting a user drops its entry (see users.signals), so
+# deactivation, deletion and staff changes apply to the next request, on
+# every worker as long as they share the cache: the settings refuse to start
+# the multi-worker server modes on a per-process one. QuerySet.update() sends
+# no signal: such changes wait for the timeout.
+def invalidate_cached_user(user_id):
+    cache.delete(get_user_key(user_id))
+
+
+def get_user_queryset(user_id):
+    return (
+        get_user_model()
+        .objects.filter(**{jwt_settings.USER_ID_FIELD: user_id})
+        .select_related("profile")
+    )
+
+
+# JWTAuthentication reading the user, with its profile, from the shared
+# cache for AUTH_USER_CACHE_TIMEOUT seconds instead of from the database on
+# every request. Profile counters of the cached copy can be that old too;
+# the endpoints that show them read their own.
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        key = get_user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = get_user_queryset(user_id).first()
+            if user is not None:
+                cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return self.check_user(user, validated_token)
+
+    # For the async views: the same lookup on the async cache and ORM
+    async def aget_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        key = get_user_key(user_id)
+        user = await cache.aget(key)
+        if user is None:
+            user = await get_user_queryset(user_id).afirst()
+            if user is not None:
+                await cache.aset(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return self.check_user(user, validated_token)
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+    # The checks JWTAuthentication.get_user makes after loading the user
+    def check_user(self, user, validated_token):
+        if user is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if jwt_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            jwt_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                "The user's password has been changed.", code="password_changed"
+            )
+        return user
@@ -0,0 +1,148 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    OuterRef,
+    PositiveIntegerField,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Greatest
+from posts.models import PostModel
+
+from users.models import Follow, Profile
+
+
+# Profile counters move with database-side increments, in the same
+# transaction as the rows they count. They never go below zero, so a counter
+# that drifted (rows written by the admin or in bulk) cannot make an unfollow
+# fail; manage.py repair_counters recounts them.
+def add_to_count(field, delta):
+    return Greatest(F(field) + delta, 0, output_field=PositiveIntegerField())
+
+
+def update_follow_counts(follower_id, followee_ids, delta):
+    if not followee_ids:
+        return
+    profiles = Profile.objects.filter(
+        Q(user_id=follower_id) | Q(user_id__in=followee_ids)
+    )
+    updates = {
+        "following_count": Case(
+            When(
+                user_id=follower_id,
+                then=add_to_count("following_count", delta * len(followee_ids)),
+            ),
+            default=F("following_count"),
+        ),
+        "followers_count": Case(
+            When(user_id__in=followee_ids, then=add_to_count("followers_count", delta)),
+            default=F("followers_count"),
+        ),
+    }
+    # Followees whose count passes FEED_FANOUT_MAX_FOLLOWERS become pull
+    # authors (the condition reads the row before the update). Going back to
+    # push takes a backfill, left to manage.py switch_to_push.
+    if delta > 0:
+        updates["pull_author"] = Case(
+            When(
+                user_id__in=followee_ids,
+                followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS - delta,
+                then=Value(True),
+            ),
+            default=F("pull_author"),
+        )
+    profiles.update(**updates)
+
+
+# A user's follow edges are written one request at a time: the follow views
+# lock the follower's profile before they check which edges exist, so the
+# counters move by exactly the edges inserted
+def lock_follower(user_id):
+    list(
+        Profile.objects.select_for_update()
+        .filter(user_id=user_id)
+        .values_list("pk", flat=True)
+    )
+
+
+def update_posts_count(user_id, delta):
+    Profile.objects.filter(user_id=user_id).update(
+        posts_count=add_to_count("posts_count", delta)
+    )
+
+
+# Before a user is deleted: the follow edges go away with the CASCADE, so the
+# accounts on the other side lose a follower or a followee
+def remove_user_from_counts(user_id):
+    Profile.objects.filter(
+        user_id__in=Follow.objects.filter(follower_id=user_id).values("followee_id")
+    ).update(followers_count=add_to_count("followers_count", -1))
+    Profile.objects.filter(
+        user_id__in=Follow.objects.filter(followee_id=user_id).values("follower_id")
+    ).update(following_count=add_to_count("following_count", -1))
+
+
+def count_rows(queryset, user_field):
+    rows = (
+        queryset.filter(**{user_field: OuterRef("user_id")})
+        .values(user_field)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def get_actual_counts():
+    return {
+        "followers_count": count_rows(Follow.objects.all(), "followee_id"),
+        "following_count": count_rows(Follow.objects.all(), "follower_id"),
+        "posts_count": count_rows(PostModel.objects.all(), "poster_user_id"),
+    }
+
+
+# Sets the counters of the profiles from the rows, in one UPDATE
+def recount_profiles(profiles):
+    return profiles.update(**get_actual_counts())
+
+
+# Recounts the profiles whose counters drifted, chunk_size profiles per
+# transaction, and returns how many were repaired
+def repair_counters(chunk_size, progress=None):
+    actual = {f"actual_{name}": count for name, count in get_actual_counts().items()}
+    total = Profile.objects.count()
+    last_id = 0
+    checked = 0
+    repaired = 0
+    while True:
+        chunk = list(
+            Profile.objects.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:chunk_size]
+        )
+        if not chunk:
+            break
+        last_id = chunk[-1]
+
+        with transaction.atomic():
+            drifted = list(
+                Profile.objects.filter(pk__in=chunk)
+                .annotate(**actual)
+                .filter(
+                    ~Q(followers_count=F("actual_followers_count"))
+                    | ~Q(following_count=F("actual_following_count"))
+                    | ~Q(posts_count=F("actual_posts_count"))
+                )
+                .values_list("pk", flat=True)
+            )
+            if drifted:
+                repaired += recount_profiles(Profile.objects.filter(pk__in=drifted))
+
+        checked += len(chunk)
+        if progress is not None:
+            progress(checked, total, repaired)
+    return repaired
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from users.suggestions import compute_suggestions
+
+
+# Full rebuild of the "who to follow" lists; follows and unfollows keep them
+# up to date in between (see users.suggestions)
+class Command(BaseCommand):
+    help = "Recompute the follow suggestions of every user from the follow graph."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Users per transaction (default: SUGGESTIONS_BATCH_SIZE).",
+        )
+
+    def handle(self, *args, **options):
+        count = compute_suggestions(
+            batch_size=options["batch_size"],
+            progress=self.report_progress if options["verbosity"] > 1 else None,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Computed suggestions for {count} users.")
+        )
+
+    def report_progress(self, done, total):
+        self.stdout.write(f"{done}/{total} users")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from users.counters import repair_counters
+
+
+# Counters drift when follows or posts are written outside the views (the
+# admin, bulk imports); this recounts the profiles that are off
+class Command(BaseCommand):
+    help = "Recount the follower, following and post counters of every profile."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Profiles checked per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        repaired = repair_counters(
+            options["chunk_size"],
+            progress=self.report_progress if options["verbosity"] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Repaired {repaired} profiles."))
+
+    def report_progress(self, checked, total, repaired):
+        self.stdout.write(f"{checked}/{total} profiles checked, {repaired} repaired")
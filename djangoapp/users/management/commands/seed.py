@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from utils.seeding import SocialGraphSeeder
+
+
+# Builds a large synthetic dataset for staging and load tests; see
+# utils.seeding for how the graph is shaped and written
+class Command(BaseCommand):
+    help = (
+        "Seed users, profiles, posts, follow edges and likes in bulk, "
+        "with a power-law follow graph."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--posts-per-user", type=int, default=10)
+        parser.add_argument("--follows-per-user", type=int, default=30)
+        parser.add_argument("--likes-per-user", type=int, default=20)
+        parser.add_argument(
+            "--alpha", type=float, default=1.0, help="Power-law exponent."
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Random seed; same seed, same graph."
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--prefix",
+            default="seed_user_",
+            help="Username prefix; use a new one to seed the same database again.",
+        )
+        parser.add_argument(
+            "--password", default="Seed1234!", help="Password of every seeded user."
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Use bulk_create on Postgres too instead of COPY.",
+        )
+
+    def handle(self, *args, **options):
+        seeder = SocialGraphSeeder(
+            users=options["users"],
+            posts_per_user=options["posts_per_user"],
+            follows_per_user=options["follows_per_user"],
+            likes_per_user=options["likes_per_user"],
+            alpha=options["alpha"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            username_prefix=options["prefix"],
+            password=options["password"],
+            use_copy=not options["no_copy"],
+            progress=self.report_progress if options["verbosity"] > 0 else None,
+        )
+        counts = seeder.run()
+
+        summary = ", ".join(f"{count} {name}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded {summary}."))
+
+    def report_progress(self, table, done, total, seconds):
+        rate = done / seconds if seconds else 0
+        progress = f"{done}/{total}" if total else str(done)
+        self.stdout.write(f"{table}: {progress} rows ({rate:,.0f} rows/s)")
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# The old graph was written to two M2Ms that could drift apart; an edge
+# present in either of them becomes one Follow row
+def copy_profile_graph_to_follow(apps, schema_editor):
+    Profile = apps.get_model("users", "Profile")
+    Follow = apps.get_model("users", "Follow")
+
+    edges = set(
+        Profile.following.through.objects.values_list(
+            "from_profile__user_id", "to_profile__user_id"
+        )
+    )
+    edges |= {
+        (follower_id, followee_id)
+        for followee_id, follower_id in Profile.followers.through.objects.values_list(
+            "from_profile__user_id", "to_profile__user_id"
+        )
+    }
+
+    Follow.objects.bulk_create(
+        [
+            Follow(follower_id=follower_id, followee_id=followee_id)
+            for follower_id, followee_id in edges
+            if follower_id != followee_id
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_profile_followers_profile_following_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Follow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('followee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follower_edges', to=settings.AUTH_USER_MODEL)),
+                ('follower', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='following_edges', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['followee', '-created_at'], name='follow_followee_recent_idx')],
+                'constraints': [models.UniqueConstraint(fields=('follower', 'followee'), name='unique_follow'), models.CheckConstraint(condition=models.Q(('follower', models.F('followee')), _negated=True), name='prevent_self_follow')],
+            },
+        ),
+        migrations.RunPython(copy_profile_graph_to_follow, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='profile',
+            name='followers',
+        ),
+        migrations.RemoveField(
+            model_name='profile',
+            name='following',
+        ),
+    ]
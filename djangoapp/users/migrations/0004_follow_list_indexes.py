@@ -0,0 +1,27 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_follow'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='follow',
+            name='follow_followee_recent_idx',
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['followee', '-created_at', '-id'], name='follow_followee_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['follower', '-created_at', '-id'], name='follow_follower_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_rows(model, user_field):
+    rows = (
+        model.objects.filter(**{user_field: OuterRef("user_id")})
+        .values(user_field)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def count_existing_profiles(apps, schema_editor):
+    Profile = apps.get_model("users", "Profile")
+    Follow = apps.get_model("users", "Follow")
+    PostModel = apps.get_model("posts", "PostModel")
+
+    Profile.objects.update(
+        followers_count=count_rows(Follow, "followee_id"),
+        following_count=count_rows(Follow, "follower_id"),
+        posts_count=count_rows(PostModel, "poster_user_id"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_profile_counters'),
+        ('posts', '0013_index_existing_posts'),
+    ]
+
+    operations = [
+        migrations.RunPython(count_existing_profiles, migrations.RunPython.noop),
+    ]
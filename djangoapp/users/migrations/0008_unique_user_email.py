@@ -0,0 +1,23 @@
+from django.db import migrations
+
+# auth.User cannot declare the constraint, so signup's unique email is an
+# index on its table. Blank emails (e.g. from createsuperuser) stay allowed.
+# Duplicate emails already in the table make this migration fail; they have
+# to be fixed first.
+USER_TABLE = "auth_user"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_count_existing_profiles'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            f"CREATE UNIQUE INDEX users_unique_email ON {USER_TABLE} (email) "
+            "WHERE email <> ''",
+            "DROP INDEX users_unique_email",
+        ),
+    ]
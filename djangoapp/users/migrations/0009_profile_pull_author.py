@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Same rule as before the flag: authors with more followers than the
+# threshold are pulled
+def mark_pull_authors(apps, schema_editor):
+    Profile = apps.get_model("users", "Profile")
+    Profile.objects.filter(
+        followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).update(pull_author=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_unique_user_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='pull_author',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_pull_authors, migrations.RunPython.noop),
+    ]
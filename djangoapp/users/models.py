@@ -6,14 +6,73 @@ User = get_user_model()
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
+    # Kept by users.counters, so showing a profile counts no rows
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    posts_count = models.PositiveIntegerField(default=0)
+    # The user's posts are pulled into feeds at read time instead of fanned
+    # out (see feed.timeline); set by users.counters, cleared by
+    # manage.py switch_to_push
+    pull_author = models.BooleanField(default=False)
 
-    following = models.ManyToManyField(
-        "self", symmetrical=False, related_name="followers_profiles", blank=True
-    )
+    def __str__(self):
+        return self.user.username
 
-    followers = models.ManyToManyField(
-        "self", symmetrical=False, related_name="following_profiles", blank=True
+
+# One row per follow edge, queried in both directions:
+# "who do I follow" by follower, "who follows me" by followee
+class Follow(models.Model):
+    follower = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="following_edges"
+    )
+    followee = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="follower_edges"
     )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["follower", "followee"], name="unique_follow"
+            ),
+            models.CheckConstraint(
+                condition=~models.Q(follower=models.F("followee")),
+                name="prevent_self_follow",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["followee", "-created_at", "-id"],
+                name="follow_followee_recent_idx",
+            ),
+            models.Index(
+                fields=["follower", "-created_at", "-id"],
+                name="follow_follower_recent_idx",
+            ),
+        ]
 
     def __str__(self):
-        return self.user.username
+        return f"{self.follower_id} -> {self.followee_id}"  # type: ignore
+
+
+# Precomputed "who to follow" list: accounts followed by the people the user
+# follows, scored by how many of them follow it (see users.suggestions)
+class Suggestion(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="suggestions")
+    suggested = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    score = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "suggested"], name="unique_suggestion"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-score", "suggested"], name="suggestion_rank_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.suggested_id}"  # type: ignore
@@ -1,34 +1,39 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from rest_framework.serializers import (
+    CharField,
+    IntegerField,
     ModelSerializer,
-    PrimaryKeyRelatedField,
     Serializer,
 )
 from rest_framework.validators import ValidationError
+from utils.instrumentation import TimedSerializerMixin
 from utils.utils_functions import (
     hasAtLeast8Characters,
     hasSpecialCharacter,
     hasUpperCase,
 )
 
-from users.models import Profile
+from users.models import Profile, Suggestion
+from users.signup import create_users, get_taken_errors
 
 
-class ProfileSerializer(ModelSerializer):
-    following = PrimaryKeyRelatedField(many=True, read_only=True)
-    followers = PrimaryKeyRelatedField(many=True, read_only=True)
-
+# Counters are kept on the profile (see users.counters); the full lists are
+# served paginated by /user/{id}/followers/ and /user/{id}/following/
+class ProfileSerializer(TimedSerializerMixin, ModelSerializer):
     class Meta:
         model = Profile
-        fields = ["user", "following", "followers"]
-        read_only_fields = ["user"]
+        fields = ["user", "followers_count", "following_count", "posts_count"]
+        read_only_fields = fields
 
 
 User = get_user_model()
 
 
-class UserSerializer(ModelSerializer):
+class UserSerializer(TimedSerializerMixin, ModelSerializer):
     profile = ProfileSerializer(read_only=True)
 
     class Meta:
@@ -38,37 +43,27 @@ class UserSerializer(ModelSerializer):
         extra_kwargs = {
             "password": {"write_only": True, "required": True},
             "email": {"required": True},
+            # Without the UniqueValidator DRF adds
+            "username": {"validators": [UnicodeUsernameValidator()]},
         }
 
+    # Taken usernames and emails are rejected by the unique constraints when
+    # the user is written or updated (see users.signup), not checked beforehand
     def create(self, validated_data):
-        User = get_user_model()
-
-        user = User.objects.create_user(
-            username=validated_data.get("username"),
-            email=validated_data.get("email"),
-            password=validated_data.get("password"),
-        )
+        user = create_users([validated_data])[0]
+        if not isinstance(user, User):
+            raise ValidationError(user)
         return user
 
-    def validate_email(self, email):
-        User = get_user_model()
-
-        if User.objects.filter(email=email).exists():
-            raise ValidationError(
-                "The provided email is already registered. Please choose another one."
-            )
-
-        return email
-
-    def validate_username(self, username):
-        User = get_user_model()
-
-        if User.objects.filter(username=username).exists():
-            raise ValidationError(
-                "The provided username is already registered. Please choose another one."
-            )
-
-        return username
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError:
+            errors = get_taken_errors(instance)
+            if not errors:
+                raise
+            raise ValidationError(errors)
 
     def validate_password(self, password):
         errors_list = []
@@ -90,9 +85,40 @@ class UserSerializer(ModelSerializer):
         return password
 
 
+class BulkUserSerializer(Serializer):
+    users = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.BULK_CREATE_MAX_USERS,
+    )
+
+
+class UserSummarySerializer(TimedSerializerMixin, ModelSerializer):
+    class Meta:
+        model = User
+        fields = ["id", "username"]
+
+
+class SuggestionSerializer(TimedSerializerMixin, ModelSerializer):
+    id = IntegerField(source="suggested_id")
+    username = CharField(source="suggested.username")
+
+    class Meta:
+        model = Suggestion
+        fields = ["id", "username", "score"]
+
+
 class FollowSerializer(Serializer):
     id_user_to_follow = serializers.IntegerField()
 
 
+class BulkFollowSerializer(Serializer):
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_FOLLOW_MAX_USERS,
+    )
+
+
 class UnfollowSerializer(Serializer):
     id_user_to_unfollow = serializers.IntegerField()
@@ -1,12 +1,60 @@
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
 
-from users.models import Profile
+from users.authentication import invalidate_cached_user
+from users.models import Follow, Profile
+from users.suggestions import (
+    refresh_suggestions,
+    update_follower_suggestions,
+    update_own_suggestions,
+)
 
 User = get_user_model()
+
+# Sent by UserViewSet.bulk_follow once the edges are committed, with
+# follower_id and followee_ids. The edges are written with bulk_create, so
+# post_save does not cover them.
+users_followed = Signal()
+
+
+# For users created outside signup (admin, createsuperuser); users.signup
+# writes the profiles of its users itself
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
-        profile = Profile.objects.create(user=instance)
-        profile.save()
\ No newline at end of file
+        Profile.objects.create(user=instance)
+
+
+# Any save may change is_active, is_staff or the password. Dropped again
+# after the commit, or a request reading the old row in between would cache it.
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_authenticated_user(sender, instance, **kwargs):
+    user_id = instance.pk
+    invalidate_cached_user(user_id)
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
+
+
+# After the commit, so the lists are computed from the graph as committed
+@receiver(post_save, sender=Follow)
+def update_suggestions_on_follow(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: update_suggestions(instance, 1))
+
+
+@receiver(post_delete, sender=Follow)
+def update_suggestions_on_unfollow(sender, instance, **kwargs):
+    transaction.on_commit(lambda: update_suggestions(instance, -1))
+
+
+def update_suggestions(follow, delta):
+    update_own_suggestions(follow.follower_id, follow.followee_id, delta)
+    update_follower_suggestions(follow.follower_id, [follow.followee_id], delta)
+
+
+@receiver(users_followed)
+def update_suggestions_on_bulk_follow(sender, follower_id, followee_ids, **kwargs):
+    refresh_suggestions(follower_id)
+    update_follower_suggestions(follower_id, followee_ids, 1)
@@ -0,0 +1,103 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from users.models import Profile
+
+User = get_user_model()
+
+DUPLICATE_ERRORS = {
+    "username": (
+        "The provided username is already registered. Please choose another one."
+    ),
+    "email": "The provided email is already registered. Please choose another one.",
+}
+
+
+def build_user(data):
+    user = User(
+        username=User.normalize_username(data["username"]),
+        email=User.objects.normalize_email(data["email"]),
+    )
+    user.set_password(data["password"])
+    return user
+
+
+# Signs up users from validated {"username", "email", "password"} rows: the
+# users and their profiles are written with two INSERTs in one transaction,
+# and the unique constraints on username and email (see migration
+# 0008_unique_user_email) reject taken ones instead of a query per field.
+# bulk_create sends no post_save, so the profile signal does not run.
+#
+# Returns a list with the created user or the {field: [error]} dict of each
+# row. Rows that collide with existing users are found with one query after
+# the failed INSERT, and the others are written again.
+def create_users(rows):
+    results = [build_user(row) for row in rows]
+    mark_duplicates_in_batch(results)
+
+    while True:
+        users = [user for user in results if isinstance(user, User)]
+        if not users:
+            return results
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                Profile.objects.bulk_create([Profile(user=user) for user in users])
+            return results
+        except IntegrityError:
+            if not mark_taken(results, users):
+                raise
+
+
+def mark_duplicates_in_batch(results):
+    seen = {field: set() for field in DUPLICATE_ERRORS}
+    for index, user in enumerate(results):
+        errors = {}
+        for field, values in seen.items():
+            value = getattr(user, field)
+            if value and value in values:
+                errors[field] = [DUPLICATE_ERRORS[field]]
+            values.add(value)
+        if errors:
+            results[index] = errors
+
+
+# Replaces the users whose username or email is taken by their errors and
+# returns whether there was any
+def mark_taken(results, users):
+    taken = {field: set() for field in DUPLICATE_ERRORS}
+    existing = User.objects.filter(
+        Q(username__in=[user.username for user in users])
+        | Q(email__in=[user.email for user in users if user.email])
+    ).values_list("username", "email")
+    for username, email in existing:
+        taken["username"].add(username)
+        if email:
+            taken["email"].add(email)
+
+    found = False
+    for index, user in enumerate(results):
+        if not isinstance(user, User):
+            continue
+        errors = {
+            field: [DUPLICATE_ERRORS[field]]
+            for field, values in taken.items()
+            if getattr(user, field) in values
+        }
+        if errors:
+            results[index] = errors
+            found = True
+    return found
+
+
+# The {field: [error]} dict of the username and email of a user being updated
+# that another account already uses, after its UPDATE failed
+def get_taken_errors(user):
+    others = User.objects.exclude(pk=user.pk)
+    return {
+        field: [DUPLICATE_ERRORS[field]]
+        for field in DUPLICATE_ERRORS
+        if getattr(user, field)
+        and others.filter(**{field: getattr(user, field)}).exists()
+    }
@@ -0,0 +1,182 @@
+# "Who to follow": the accounts followed by the people a user follows, scored
+# by how many of them follow each one, without the user, the accounts they
+# already follow and staff accounts. Only the best SUGGESTIONS_SIZE of them
+# are stored (Suggestion), so /user/suggestions/ reads one short list.
+#
+# The lists are built offline by compute_suggestions (manage.py
+# compute_suggestions) and kept up to date as follows and unfollows happen
+# (see users.signals). A follow only moves the scores of the accounts the
+# followee follows, in the follower's list, and of the followee, in the lists
+# of the follower's followers, so both are updated in place. Accounts that
+# would enter a list that way are only picked up by the next offline run; a
+# bulk follow (onboarding) recomputes the follower's list instead.
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import chain
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F
+
+from users.models import Follow, Suggestion
+
+User = get_user_model()
+
+
+# The follow graph as compressed sparse rows over dense node numbers:
+# node i is user_ids[i], and the nodes it follows are
+# targets[offsets[i]:offsets[i + 1]]. Typed arrays take 8 bytes per user and
+# 4 per edge, instead of a Python int object and list slot each.
+class FollowGraph:
+    def __init__(self, user_ids, offsets, targets, excluded):
+        self.user_ids = user_ids
+        self.offsets = offsets
+        self.targets = targets
+        # Nodes that are never suggested, as a bytearray of flags
+        self.excluded = excluded
+
+    @classmethod
+    def load(cls, chunk_size=10000):
+        user_ids = array("q")
+        excluded = bytearray()
+        users = User.objects.order_by("id").values_list("id", "is_staff")
+        for user_id, is_staff in users.iterator(chunk_size=chunk_size):
+            user_ids.append(user_id)
+            excluded.append(is_staff)
+
+        offsets = array("q", [0]) * (len(user_ids) + 1)
+        targets = array("i")
+        graph = cls(user_ids, offsets, targets, excluded)
+        node = 0
+        edges = Follow.objects.order_by("follower_id").values_list(
+            "follower_id", "followee_id"
+        )
+        for follower_id, followee_id in edges.iterator(chunk_size=chunk_size):
+            follower = graph.get_node(follower_id)
+            followee = graph.get_node(followee_id)
+            # Edges of users that signed up after the users were read
+            if follower is None or followee is None:
+                continue
+            while node < follower:
+                node += 1
+                offsets[node] = len(targets)
+            targets.append(followee)
+        while node < len(user_ids):
+            node += 1
+            offsets[node] = len(targets)
+        return graph
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def get_node(self, user_id):
+        node = bisect_left(self.user_ids, user_id)
+        if node < len(self.user_ids) and self.user_ids[node] == user_id:
+            return node
+        return None
+
+    def following(self, node):
+        return self.targets[self.offsets[node] : self.offsets[node + 1]]
+
+    # [(node, score)] of the best candidates, highest score first, ties by
+    # lowest user id. Counter counts a whole chain of array slices in C, so
+    # the per-edge work never runs Python bytecode.
+    def suggest(self, node, size):
+        following = self.following(node)
+        scores = Counter(chain.from_iterable(map(self.following, following)))
+        for seen in chain(following, (node,)):
+            scores.pop(seen, None)
+        candidates = (
+            (candidate, score)
+            for candidate, score in scores.items()
+            if not self.excluded[candidate]
+        )
+        return heapq.nlargest(size, candidates, key=lambda item: (item[1], -item[0]))
+
+
+# Rebuilds the stored lists of the given users (of everybody by default), a
+# batch of users per transaction. Returns the number of users processed.
+def compute_suggestions(user_ids=None, batch_size=None, progress=None):
+    batch_size = batch_size or settings.SUGGESTIONS_BATCH_SIZE
+    graph = FollowGraph.load()
+    if user_ids is None:
+        nodes = range(len(graph))
+    else:
+        nodes = [graph.get_node(user_id) for user_id in sorted(user_ids)]
+        nodes = [node for node in nodes if node is not None]
+
+    done = 0
+    for start in range(0, len(nodes), batch_size):
+        batch = nodes[start : start + batch_size]
+        suggestions = [
+            Suggestion(
+                user_id=graph.user_ids[node],
+                suggested_id=graph.user_ids[candidate],
+                score=score,
+            )
+            for node in batch
+            for candidate, score in graph.suggest(node, settings.SUGGESTIONS_SIZE)
+        ]
+        with transaction.atomic():
+            Suggestion.objects.filter(
+                user_id__in=[graph.user_ids[node] for node in batch]
+            ).delete()
+            Suggestion.objects.bulk_create(suggestions)
+        done += len(batch)
+        if progress is not None:
+            progress(done, len(nodes))
+    return done
+
+
+# Recomputes one user's list in SQL, for the user who just followed many
+# accounts at once
+def refresh_suggestions(user_id):
+    following = Follow.objects.filter(follower_id=user_id).values("followee_id")
+    candidates = (
+        Follow.objects.filter(follower_id__in=following)
+        .exclude(followee_id=user_id)
+        .exclude(followee_id__in=following)
+        .exclude(followee__is_staff=True)
+        .values("followee_id")
+        .annotate(score=Count("id"))
+        .order_by("-score", "followee_id")[: settings.SUGGESTIONS_SIZE]
+    )
+    suggestions = [
+        Suggestion(
+            user_id=user_id, suggested_id=row["followee_id"], score=row["score"]
+        )
+        for row in candidates
+    ]
+    with transaction.atomic():
+        Suggestion.objects.filter(user_id=user_id).delete()
+        Suggestion.objects.bulk_create(suggestions)
+
+
+# follower_id followed (delta 1) or unfollowed (delta -1) followee_id: the
+# accounts followee_id follows gain or lose a point in the follower's list, and
+# a followed account leaves it
+def update_own_suggestions(follower_id, followee_id, delta):
+    suggestions = Suggestion.objects.filter(user_id=follower_id)
+    if delta > 0:
+        suggestions.filter(suggested_id=followee_id).delete()
+    suggestions.filter(
+        suggested_id__in=Follow.objects.filter(follower_id=followee_id).values(
+            "followee_id"
+        )
+    ).update(score=F("score") + delta)
+    if delta < 0:
+        suggestions.filter(score=0).delete()
+
+
+# The followers of follower_id gain (or lose) one point for each of the
+# followees that is in their list
+def update_follower_suggestions(follower_id, followee_ids, delta):
+    suggestions = Suggestion.objects.filter(
+        user__following_edges__followee_id=follower_id, suggested_id__in=followee_ids
+    )
+    suggestions.update(score=F("score") + delta)
+    if delta < 0:
+        suggestions.filter(score=0).delete()
@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.urls import reverse
+from feed.models import TimelineEntry
+from tests_base.base_test import BaseTest
+from users.models import Follow, Profile, Suggestion
+
+
+class BulkFollowTests(BaseTest):
+    def bulk_follow(self, user_ids, token=None):
+        return self.client.post(
+            reverse("users:users-api-bulk-follow"),
+            data={"user_ids": user_ids},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {token or self.token_user_a}",
+        )
+
+    def create_users(self, prefix, count):
+        return [
+            self.create_user(f"{prefix}_{i}", f"{prefix}_{i}@email.com", "Abcd123!")
+            for i in range(count)
+        ]
+
+    def test_bulk_follow_reports_a_result_per_id(self):
+        staff = self.create_super_user("staff", "staff@email.com", "Abcd123!")
+        self.follow(self.user_a, self.user_c)
+
+        # The repeated ID gets one result
+        user_ids = [self.user_b.id, self.user_c.id, self.user_a.id, staff.id, 999999]
+        response = self.bulk_follow(user_ids + [self.user_b.id])
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            [
+                {"id": self.user_b.id, "result": "followed"},
+                {"id": self.user_c.id, "result": "already_following"},
+                {"id": self.user_a.id, "result": "cannot_follow_self"},
+                {"id": staff.id, "result": "cannot_follow_user"},
+                {"id": 999999, "result": "not_found"},
+            ],
+            response.json()["results"],
+        )
+        self.assertEqual(
+            {self.user_b.id, self.user_c.id},
+            set(
+                Follow.objects.filter(follower=self.user_a).values_list(
+                    "followee_id", flat=True
+                )
+            ),
+        )
+        self.refresh_user_profiles(self.user_a, self.user_b)
+        self.assertEqual(2, self.user_a.profile.following_count)
+        self.assertEqual(1, self.user_b.profile.followers_count)
+
+    def test_repeated_bulk_follow_counts_each_edge_once(self):
+        user_ids = [self.user_b.id, self.user_c.id]
+
+        self.bulk_follow(user_ids)
+        response = self.bulk_follow(user_ids)
+
+        self.assertEqual(
+            ["already_following", "already_following"],
+            [result["result"] for result in response.json()["results"]],
+        )
+        self.refresh_user_profiles(self.user_a, self.user_b)
+        self.assertEqual(2, self.user_a.profile.following_count)
+        self.assertEqual(1, self.user_b.profile.followers_count)
+
+    def test_bulk_follow_fills_timeline_and_suggestions(self):
+        self.follow(self.user_b, self.user_c)
+
+        self.bulk_follow([self.user_b.id])
+
+        self.assertEqual(
+            [self.post_b.id],
+            list(
+                TimelineEntry.objects.filter(owner=self.user_a).values_list(
+                    "post_id", flat=True
+                )
+            ),
+        )
+        self.assertTrue(
+            Suggestion.objects.filter(user=self.user_a, suggested=self.user_c).exists()
+        )
+
+    def test_bulk_follow_runs_constant_number_of_queries(self):
+        few = self.bulk_follow([user.id for user in self.create_users("few", 3)])
+        many = self.bulk_follow(
+            [user.id for user in self.create_users("many", 50)], self.token_user_b
+        )
+
+        self.assertEqual(few.metrics.queries, many.metrics.queries)
+        self.assertWithinQueryBudget(many)
+        self.assertEqual(50, Profile.objects.get(user=self.user_b).following_count)
+
+    def test_bulk_follow_status_400_with_invalid_ids(self):
+        too_many = list(range(1, settings.BULK_FOLLOW_MAX_USERS + 2))
+
+        for user_ids in ([], ["abc"], too_many):
+            with self.subTest(user_ids=user_ids[:3]):
+                response = self.bulk_follow(user_ids)
+
+                self.assertEqual(400, response.status_code)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_bulk_follow_status_401_without_authentication(self):
+        response = self.client.post(
+            reverse("users:users-api-bulk-follow"),
+            data={"user_ids": [self.user_b.id]},
+            content_type="application/json",
+        )
+
+        self.assertEqual(401, response.status_code)
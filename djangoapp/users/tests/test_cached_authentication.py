@@ -0,0 +1,65 @@
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework.exceptions import AuthenticationFailed
+from tests_base.base_test import BaseTest
+from users.authentication import CachedJWTAuthentication, invalidate_cached_user
+
+
+class CachedJWTAuthenticationTests(BaseTest):
+    def authenticate(self, token=None):
+        request = RequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {token or self.token_user_a}"
+        )
+        user, _ = CachedJWTAuthentication().authenticate(request)
+        return user
+
+    def get_feed(self, name="feed:user-feed"):
+        return self.client.get(
+            reverse(name), HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}"
+        )
+
+    def test_user_and_profile_come_from_cache(self):
+        self.authenticate()
+
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+            self.assertEqual(0, user.profile.following_count)
+        self.assertEqual(self.user_a, user)
+
+    def test_cached_user_saves_query_on_sync_and_async_views(self):
+        for name in ("feed:user-feed", "async:user-feed"):
+            with self.subTest(name=name):
+                # Warms the feed cache, then only the user entry is missing
+                self.get_feed(name)
+                invalidate_cached_user(self.user_a.id)
+                cold = self.get_feed(name)
+                warm = self.get_feed(name)
+
+                self.assertEqual(200, warm.status_code)
+                self.assertEqual(cold.metrics.queries - 1, warm.metrics.queries)
+
+    def test_deactivated_user_is_rejected_at_once(self):
+        self.authenticate()
+
+        self.user_a.is_active = False
+        self.user_a.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+        self.assertEqual(401, self.get_feed().status_code)
+
+    def test_deleted_user_is_rejected_at_once(self):
+        self.authenticate()
+
+        self.user_a.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_staff_change_applies_at_once(self):
+        self.assertFalse(self.authenticate().is_staff)
+
+        self.user_a.is_staff = True
+        self.user_a.save()
+
+        self.assertTrue(self.authenticate().is_staff)
@@ -0,0 +1,100 @@
+import io
+
+from django.core.management import call_command
+from django.urls import reverse
+from tests_base.base_test import BaseTest
+from users.models import Follow, Profile
+
+
+class ProfileCounterTests(BaseTest):
+    def post(self, url, token, data=None):
+        return self.client.post(url, data=data, HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def get_counts(self, user):
+        profile = Profile.objects.get(user=user)
+        return profile.followers_count, profile.following_count, profile.posts_count
+
+    def test_follow_and_unfollow_move_counters(self):
+        follow_url = reverse("users:users-api-follow")
+        unfollow_url = reverse("users:users-api-unfollow")
+
+        self.post(follow_url, self.token_user_a, {"id_user_to_follow": self.user_b.id})
+        self.post(follow_url, self.token_user_c, {"id_user_to_follow": self.user_b.id})
+        # Rejected follows and unfollows leave the counters alone
+        self.post(follow_url, self.token_user_a, {"id_user_to_follow": self.user_b.id})
+        self.post(
+            unfollow_url, self.token_user_b, {"id_user_to_unfollow": self.user_a.id}
+        )
+
+        self.assertEqual((0, 1, 1), self.get_counts(self.user_a))
+        self.assertEqual((2, 0, 1), self.get_counts(self.user_b))
+
+        self.post(
+            unfollow_url, self.token_user_a, {"id_user_to_unfollow": self.user_b.id}
+        )
+
+        self.assertEqual((0, 0, 1), self.get_counts(self.user_a))
+        self.assertEqual((1, 0, 1), self.get_counts(self.user_b))
+
+    def test_creating_and_deleting_posts_move_counter(self):
+        response = self.post(
+            reverse("posts:posts-api-list"),
+            self.token_user_a,
+            {"text_content": "counted post"},
+        )
+        self.assertEqual((0, 0, 2), self.get_counts(self.user_a))
+
+        self.client.delete(
+            reverse("posts:posts-api-detail", args=[response.json()["id"]]),
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+        self.assertEqual((0, 0, 1), self.get_counts(self.user_a))
+
+    def test_deleting_user_updates_counters_of_other_side(self):
+        self.follow(self.user_a, self.user_b)
+        self.follow(self.user_b, self.user_c)
+
+        self.client.delete(
+            reverse("users:users-api-detail", args=[self.user_b.id]),
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_b}",
+        )
+
+        self.assertEqual((0, 0, 1), self.get_counts(self.user_a))
+        self.assertEqual((0, 0, 1), self.get_counts(self.user_c))
+
+    def test_profile_shows_counters(self):
+        self.follow(self.user_a, self.user_b)
+
+        response = self.client.get(
+            reverse("users:users-api-detail", args=[self.user_b.id]),
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        self.assertEqual(
+            {
+                "user": self.user_b.id,
+                "followers_count": 1,
+                "following_count": 0,
+                "posts_count": 1,
+            },
+            response.json()["profile"],
+        )
+
+    def test_repair_counters_recounts_drifted_profiles(self):
+        # Written around the views, so no counter moves
+        Follow.objects.create(follower=self.user_a, followee=self.user_b)
+        Follow.objects.create(follower=self.user_c, followee=self.user_b)
+        Profile.objects.filter(user=self.user_c).update(posts_count=7)
+        output = io.StringIO()
+
+        call_command("repair_counters", chunk_size=2, verbosity=2, stdout=output)
+
+        self.assertEqual((0, 1, 1), self.get_counts(self.user_a))
+        self.assertEqual((2, 0, 1), self.get_counts(self.user_b))
+        self.assertEqual((0, 1, 1), self.get_counts(self.user_c))
+        self.assertIn("2/3 profiles checked, 2 repaired", output.getvalue())
+        self.assertIn("Repaired 3 profiles.", output.getvalue())
+
+        output = io.StringIO()
+        call_command("repair_counters", stdout=output)
+        self.assertIn("Repaired 0 profiles.", output.getvalue())
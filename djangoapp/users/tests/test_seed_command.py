@@ -0,0 +1,89 @@
+import io
+
+from django.conf import settings
+from django.core.management import call_command
+from feed.models import TimelineEntry
+from posts.models import PostModel
+from tests_base.base_test import BaseTest
+from users.models import Follow, Profile
+
+
+class SeedCommandTests(BaseTest):
+    def seed(self, prefix, **options):
+        output = io.StringIO()
+        call_command(
+            "seed",
+            users=30,
+            posts_per_user=3,
+            follows_per_user=5,
+            likes_per_user=4,
+            prefix=prefix,
+            batch_size=7,
+            stdout=output,
+            **options,
+        )
+        return output.getvalue()
+
+    def get_graph(self, prefix):
+        # Edges by user index, so graphs of different prefixes can be compared
+        def index(username):
+            return int(username.removeprefix(prefix))
+
+        follows = {
+            (index(a), index(b))
+            for a, b in Follow.objects.filter(
+                follower__username__startswith=prefix
+            ).values_list("follower__username", "followee__username")
+        }
+        posts = sorted(
+            (post.text_content, index(post.poster_user.username))
+            for post in PostModel.objects.filter(
+                poster_user__username__startswith=prefix
+            ).select_related("poster_user")
+        )
+        return follows, posts
+
+    def test_seed_creates_users_with_profiles_and_usable_password(self):
+        output = self.seed("seeded_")
+
+        users = self.User.objects.filter(username__startswith="seeded_")
+        self.assertEqual(30, users.count())
+        self.assertEqual(30, Profile.objects.filter(user__in=users).count())
+        self.assertTrue(users.first().check_password("Seed1234!"))
+        self.assertIn("Seeded 30 users, 90 posts", output)
+        self.assertIn("auth_user: 30/30 rows", output)
+
+    def test_seed_keeps_like_counters_and_timelines_consistent(self):
+        self.seed("seeded_")
+
+        posts = PostModel.objects.filter(poster_user__username__startswith="seeded_")
+        for post in posts:
+            self.assertEqual(post.liked_by.count(), post.likes_counter)
+
+        profiles = Profile.objects.filter(user__username__startswith="seeded_")
+        for profile in profiles.select_related("user"):
+            user = profile.user
+            self.assertEqual(user.follower_edges.count(), profile.followers_count)
+            self.assertEqual(user.following_edges.count(), profile.following_count)
+            self.assertEqual(user.postmodel_set.count(), profile.posts_count)
+
+        follow = Follow.objects.filter(follower__username__startswith="seeded_")[0]
+        expected = set(
+            PostModel.objects.filter(poster_user_id=follow.followee_id)
+            .order_by("-created_at", "-id")
+            .values_list("id", flat=True)[: settings.FEED_TIMELINE_BACKFILL]
+        )
+        timeline = set(
+            TimelineEntry.objects.filter(
+                owner_id=follow.follower_id, post__poster_user_id=follow.followee_id
+            ).values_list("post_id", flat=True)
+        )
+        self.assertEqual(expected, timeline)
+
+    def test_seed_is_deterministic(self):
+        self.seed("first_", seed=3, verbosity=0)
+        self.seed("second_", seed=3, verbosity=0)
+        self.seed("third_", seed=4, verbosity=0)
+
+        self.assertEqual(self.get_graph("first_"), self.get_graph("second_"))
+        self.assertNotEqual(self.get_graph("first_"), self.get_graph("third_"))
@@ -0,0 +1,105 @@
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from tests_base.base_test import BaseTest
+from users.models import Profile
+from users.signup import DUPLICATE_ERRORS
+
+
+class SignupTests(BaseTest):
+    def row(self, username, email, password="Abcd123!"):
+        return {"username": username, "email": email, "password": password}
+
+    def signup(self, username, email):
+        return self.client.post(
+            reverse("users:users-api-list"), data=self.row(username, email)
+        )
+
+    def bulk_create(self, users, token=None):
+        return self.client.post(
+            reverse("users:users-api-bulk-create"),
+            data={"users": users},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {token}" if token else "",
+        )
+
+    def test_signup_writes_user_and_profile_without_pre_checks(self):
+        response = self.signup("newcomer", "newcomer@email.com")
+
+        self.assertEqual(201, response.status_code)
+        user = self.User.objects.get(username="newcomer")
+        self.assertTrue(user.check_password("Abcd123!"))
+        self.assertTrue(Profile.objects.filter(user=user).exists())
+        self.assertEqual(user.id, response.json()["id"])
+        # Savepoint, two INSERTs and the release
+        self.assertWithinQueryBudget(response, budget=4)
+
+    def test_signup_reports_taken_username_and_email(self):
+        for username, email, field in (
+            ("base_user_a", "free@email.com", "username"),
+            ("free_name", "base_user_a@email.com", "email"),
+        ):
+            with self.subTest(field=field):
+                response = self.signup(username, email)
+
+                self.assertEqual(400, response.status_code)
+                self.assertEqual({field: [DUPLICATE_ERRORS[field]]}, response.json())
+        self.assertEqual(3, self.User.objects.count())
+
+    def test_update_reports_taken_username_and_email(self):
+        for data, field in (
+            ({"username": "base_user_b"}, "username"),
+            ({"email": "base_user_b@email.com"}, "email"),
+        ):
+            with self.subTest(field=field):
+                response = self.client.patch(
+                    reverse("users:users-api-detail", args=[self.user_a.id]),
+                    data=data,
+                    content_type="application/json",
+                    HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+                )
+
+                self.assertEqual(400, response.status_code)
+                self.assertEqual({field: [DUPLICATE_ERRORS[field]]}, response.json())
+        self.user_a.refresh_from_db()
+        self.assertEqual("base_user_a", self.user_a.username)
+        self.assertEqual("base_user_a@email.com", self.user_a.email)
+
+    def test_emails_are_unique_unless_blank(self):
+        self.create_super_user("admin_1", "", "Abcd123!")
+        self.create_super_user("admin_2", "", "Abcd123!")
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.create_user("copycat", "base_user_a@email.com", "Abcd123!")
+
+    def test_staff_bulk_create_reports_a_result_per_row(self):
+        staff = self.create_super_user("staff", "staff@email.com", "Abcd123!")
+
+        response = self.bulk_create(
+            [
+                self.row("imported_1", "i1@email.com"),
+                self.row("imported_2", "i2@email.com", password="abc"),
+                self.row("base_user_b", "i3@email.com"),
+                self.row("imported_4", "i1@email.com"),
+                self.row("imported_5", "i5@email.com"),
+            ],
+            self.create_token(staff),
+        )
+
+        self.assertEqual(200, response.status_code)
+        results = response.json()["results"]
+        self.assertEqual("imported_1", results[0]["user"]["username"])
+        self.assertIn("password", results[1]["errors"])
+        self.assertEqual(
+            {"username": [DUPLICATE_ERRORS["username"]]}, results[2]["errors"]
+        )
+        self.assertEqual({"email": [DUPLICATE_ERRORS["email"]]}, results[3]["errors"])
+        self.assertEqual("imported_5", results[4]["user"]["username"])
+        imported = self.User.objects.filter(username__startswith="imported_")
+        self.assertEqual(2, Profile.objects.filter(user__in=imported).count())
+
+    def test_bulk_create_is_staff_only(self):
+        row = self.row("imported", "i@email.com")
+
+        self.assertEqual(401, self.bulk_create([row]).status_code)
+        self.assertEqual(403, self.bulk_create([row], self.token_user_a).status_code)
+        self.assertFalse(self.User.objects.filter(username="imported").exists())
@@ -0,0 +1,155 @@
+import io
+import random
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from tests_base.base_test import BaseTest
+from users.models import Follow, Suggestion
+from users.suggestions import compute_suggestions, refresh_suggestions
+from utils.instrumentation import get_query_budget
+
+
+class SuggestionTests(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.user_d = self.create_user("base_user_d", "d@email.com", "Abcd123!")
+        self.user_e = self.create_user("base_user_e", "e@email.com", "Abcd123!")
+        self.staff = self.create_super_user("staff", "staff@email.com", "Abcd123!")
+
+    def add_follows(self, *edges):
+        Follow.objects.bulk_create(
+            [
+                Follow(follower=follower, followee=followee)
+                for follower, followee in edges
+            ]
+        )
+
+    def get_suggestions(self, user):
+        return list(
+            Suggestion.objects.filter(user=user)
+            .order_by("-score", "suggested_id")
+            .values_list("suggested_id", "score")
+        )
+
+    def post(self, name, token, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse(f"users:users-api-{name}"),
+                data=data,
+                HTTP_AUTHORIZATION=f"Bearer {token}",
+            )
+        self.assertEqual(204, response.status_code)
+
+    def test_compute_ranks_accounts_followed_by_followees(self):
+        a, b, c, d, e = self.user_a, self.user_b, self.user_c, self.user_d, self.user_e
+        self.add_follows(
+            (a, b), (a, c), (b, d), (c, d), (b, e), (c, a), (b, c), (b, self.staff)
+        )
+
+        self.assertEqual(6, compute_suggestions(batch_size=4))
+
+        # Not themselves, not who they follow already, not staff
+        self.assertEqual([(d.id, 2), (e.id, 1)], self.get_suggestions(a))
+        self.assertEqual([(b.id, 1)], self.get_suggestions(c))
+        self.assertEqual([], self.get_suggestions(d))
+
+    @override_settings(SUGGESTIONS_SIZE=3)
+    def test_offline_and_incremental_lists_agree(self):
+        users = [
+            self.create_user(f"graph_{i}", f"graph_{i}@email.com", "Abcd123!")
+            for i in range(25)
+        ]
+        rng = random.Random(0)
+        self.add_follows(
+            *{
+                (follower, followee)
+                for follower in users
+                for followee in rng.sample(users, 5)
+                if follower != followee
+            }
+        )
+
+        compute_suggestions()
+        computed = {user.id: self.get_suggestions(user) for user in users}
+        for user in users:
+            refresh_suggestions(user.id)
+
+        refreshed = {user.id: self.get_suggestions(user) for user in users}
+        self.assertEqual(computed, refreshed)
+        self.assertTrue(all(len(suggestions) == 3 for suggestions in computed.values()))
+
+    def test_follow_and_unfollow_update_suggestions(self):
+        a, b, c, d, e = self.user_a, self.user_b, self.user_c, self.user_d, self.user_e
+        # c follows a, and reaches b and e through d too
+        self.add_follows((b, e), (c, a), (c, d), (d, b), (d, e), (a, d))
+        compute_suggestions()
+
+        self.post("follow", self.token_user_a, id_user_to_follow=b.id)
+        self.assertEqual([(e.id, 2)], self.get_suggestions(a))
+        self.assertEqual([(b.id, 2), (e.id, 1)], self.get_suggestions(c))
+
+        # b comes back to a's list with the next offline run
+        self.post("unfollow", self.token_user_a, id_user_to_unfollow=b.id)
+        self.assertEqual([(e.id, 1)], self.get_suggestions(a))
+        self.assertEqual([(b.id, 1), (e.id, 1)], self.get_suggestions(c))
+
+        self.post("follow", self.token_user_c, id_user_to_follow=b.id)
+        self.assertEqual([(e.id, 2)], self.get_suggestions(c))
+
+    def test_follow_and_unfollow_stay_within_query_budget(self):
+        self.add_follows((self.user_b, self.user_c), (self.user_c, self.user_a))
+        compute_suggestions()
+
+        for name, data in (
+            ("follow", {"id_user_to_follow": self.user_b.id}),
+            ("unfollow", {"id_user_to_unfollow": self.user_b.id}),
+        ):
+            with self.subTest(name=name):
+                # The suggestions are updated after the commit
+                with CaptureQueriesContext(connection) as queries:
+                    self.post(name, self.token_user_a, **data)
+
+                budget = get_query_budget("POST", f"users:users-api-{name}")
+                self.assertLessEqual(len(queries), budget)
+
+    def test_suggestions_endpoint_reads_the_stored_list(self):
+        self.add_follows(
+            (self.user_a, self.user_b),
+            (self.user_b, self.user_c),
+            (self.user_b, self.user_d),
+            (self.user_e, self.user_d),
+            (self.user_a, self.user_e),
+        )
+        compute_suggestions()
+
+        response = self.client.get(
+            reverse("users:users-api-suggestions"),
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            [
+                {"id": self.user_d.id, "username": "base_user_d", "score": 2},
+                {"id": self.user_c.id, "username": "base_user_c", "score": 1},
+            ],
+            response.json(),
+        )
+        self.assertWithinQueryBudget(response)
+
+    def test_suggestions_status_401_without_authentication(self):
+        response = self.client.get(reverse("users:users-api-suggestions"))
+
+        self.assertEqual(401, response.status_code)
+
+    def test_compute_suggestions_command(self):
+        self.add_follows((self.user_a, self.user_b), (self.user_b, self.user_c))
+        output = io.StringIO()
+
+        call_command("compute_suggestions", stdout=output)
+
+        self.assertIn("Computed suggestions for 6 users.", output.getvalue())
+        self.assertEqual([(self.user_c.id, 1)], self.get_suggestions(self.user_a))
@@ -1,6 +1,9 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework_simplejwt.tokens import AccessToken
 from tests_base.base_test import BaseTest
+from users.models import Follow
 
 
 class UserAuthenticationTests(BaseTest):
@@ -221,3 +224,138 @@ class UserFollowTests(BaseTest):
             HTTP_AUTHORIZATION=f"Bearer {user_access_token}",
         )
         self.assertEqual(400, response.status_code)
+
+    def test_follow_creates_a_single_edge(self):
+        self.client.post(
+            reverse("users:users-api-follow"),
+            data={"id_user_to_follow": self.user_b.id},  # type: ignore
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        self.assertEqual(
+            1, Follow.objects.filter(follower=self.user_a, followee=self.user_b).count()
+        )
+
+    def test_unfollow_removes_the_edge(self):
+        self.follow(self.user_a, self.user_b)
+
+        self.client.post(
+            reverse("users:users-api-unfollow"),
+            data={"id_user_to_unfollow": self.user_b.id},  # type: ignore
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        self.assertFalse(Follow.objects.filter(follower=self.user_a).exists())
+
+    def test_unfollowing_not_followed_user_status_400(self):
+        response = self.client.post(
+            reverse("users:users-api-unfollow"),
+            data={"id_user_to_unfollow": self.user_b.id},  # type: ignore
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        self.assertEqual(400, response.status_code)
+
+    def test_profile_exposes_follow_counts(self):
+        self.follow(self.user_a, self.user_b)
+        self.follow(self.user_c, self.user_b)
+
+        response = self.client.get(
+            reverse("users:users-api-detail", args=[self.user_b.id]),  # type: ignore
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        self.assertEqual(2, response.data["profile"]["followers_count"])  # type: ignore
+        self.assertEqual(0, response.data["profile"]["following_count"])  # type: ignore
+        self.assertNotIn("followers", response.data["profile"])  # type: ignore
+
+
+class UserListQueriesTests(BaseTest):
+    def setUp(self):
+        super().setUp()
+
+    def list_users(self):
+        return self.client.get(
+            reverse("users:users-api-list"),
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+    def test_list_users_query_count_does_not_grow_with_graph(self):
+        self.list_users()
+        with CaptureQueriesContext(connection) as small_graph:
+            self.list_users()
+
+        users = [
+            self.create_user(f"user_{i}", f"user_{i}@email.com", "Abcd123!")
+            for i in range(6)
+        ]
+        for follower in users:
+            for followee in users:
+                if follower != followee:
+                    self.follow(follower, followee)
+        with CaptureQueriesContext(connection) as large_graph:
+            response = self.list_users()
+
+        self.assertEqual(len(small_graph), len(large_graph))
+        counts = {
+            user["id"]: user["profile"]["followers_count"]
+            for user in response.data["results"]  # type: ignore
+        }
+        self.assertEqual(5, counts[users[0].id])  # type: ignore
+
+    def test_followers_and_following_endpoints_paginate_edges(self):
+        followers = [
+            self.create_user(f"follower_{i}", f"follower_{i}@email.com", "Abcd123!")
+            for i in range(12)
+        ]
+        for follower in followers:
+            self.follow(follower, self.user_b)
+
+        response = self.client.get(
+            reverse("users:users-api-followers", args=[self.user_b.id]),  # type: ignore
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+        next_response = self.client.get(
+            response.data["next"],  # type: ignore
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+        follower_ids = [
+            user["id"]
+            for page in (response, next_response)
+            for user in page.data["results"]  # type: ignore
+        ]
+        self.assertEqual([user.id for user in reversed(followers)], follower_ids)  # type: ignore
+
+        response = self.client.get(
+            reverse("users:users-api-following", args=[followers[0].id]),  # type: ignore
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+        self.assertEqual([self.user_b.id], [user["id"] for user in response.data["results"]])  # type: ignore
+
+
+class UserConditionalGetTests(BaseTest):
+    def setUp(self):
+        super().setUp()
+
+    def retrieve(self, **headers):
+        return self.client.get(
+            reverse("users:users-api-detail", args=[self.user_b.id]),  # type: ignore
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+            **headers,
+        )
+
+    def test_retrieve_user_status_304_when_etag_matches(self):
+        etag = self.retrieve()["ETag"]
+
+        response = self.retrieve(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(304, response.status_code)
+
+    def test_retrieve_user_status_200_after_new_follower(self):
+        etag = self.retrieve()["ETag"]
+        self.follow(self.user_a, self.user_b)
+
+        response = self.retrieve(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(1, response.data["profile"]["followers_count"])  # type: ignore
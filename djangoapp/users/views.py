@@ -1,14 +1,37 @@
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
 from django.shortcuts import get_object_or_404
+from posts.models import PostMention
+from posts.serializers import PostSerializer
+from posts.tags import get_index_posts, get_index_queryset
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.validators import ValidationError
 from rest_framework.viewsets import ModelViewSet
+from utils.conditional import conditional_view, make_etag
+from utils.pagination import KeysetPagination
 
+from users.counters import (
+    lock_follower,
+    remove_user_from_counts,
+    update_follow_counts,
+)
+from users.models import Follow, Suggestion
+from users.signals import users_followed
+from users.signup import create_users
 from users.permissions import CanCreate
-from users.serializers import FollowSerializer, UnfollowSerializer, UserSerializer
+from users.serializers import (
+    BulkFollowSerializer,
+    BulkUserSerializer,
+    FollowSerializer,
+    SuggestionSerializer,
+    UnfollowSerializer,
+    UserSerializer,
+    UserSummarySerializer,
+)
 
 
 class UserViewSet(ModelViewSet):
@@ -21,6 +44,10 @@ class UserViewSet(ModelViewSet):
     def get_serializer_class(self):
         if self.action == "follow":
             return FollowSerializer
+        if self.action == "bulk_follow":
+            return BulkFollowSerializer
+        if self.action == "bulk_create":
+            return BulkUserSerializer
         if self.action == "unfollow":
             return UnfollowSerializer
         return UserSerializer
@@ -29,11 +56,42 @@ class UserViewSet(ModelViewSet):
         User = get_user_model()
 
         if self.request.user.is_staff or self.request.method == "GET":  # type: ignore
-            return User.objects.all()
+            queryset = User.objects.all()
+        else:
+            queryset = User.objects.filter(pk=self.request.user.pk)
 
-        return User.objects.filter(pk=self.request.user.pk)
+        # The profile and its counters come with the user row
+        return queryset.select_related("profile").order_by("id")
+
+    def get_user_validators(self, request, *args, **kwargs):
+        validators = (
+            self.get_queryset()
+            .filter(pk=kwargs.get("pk"))
+            .values_list(
+                "username",
+                "email",
+                "profile__followers_count",
+                "profile__following_count",
+                "profile__posts_count",
+            )
+            .first()
+        )
+        if validators is None:
+            return None, None
+        return make_etag(kwargs.get("pk"), *validators), None
+
+    @conditional_view(get_user_validators)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        remove_user_from_counts(instance.pk)
+        instance.delete()
 
     def get_permissions(self):
+        if self.action == "bulk_create":
+            return [IsAdminUser()]
         if self.request.method == "POST" and not (
             "follow/" in self.request.path or "unfollow" in self.request.path
         ):
@@ -58,12 +116,6 @@ class UserViewSet(ModelViewSet):
 
         user_to_follow = get_object_or_404(User, id=id_user_to_follow)
 
-        # User can not follow who his already follow
-        if user_following.profile.following.filter(
-            pk=user_to_follow.profile.pk  # type: ignore
-        ).exists():
-            raise ValidationError({"detail": "You are already following this user."})
-
         # User can not follow itself
         if user_following == user_to_follow:
             raise ValidationError({"detail": "You can not follow yourself."})
@@ -72,13 +124,107 @@ class UserViewSet(ModelViewSet):
         if user_to_follow.is_staff:
             raise ValidationError({"detail": "You can not follow this user."})
 
-        user_following.profile.following.add(user_to_follow.profile)  # type: ignore
-        user_to_follow.profile.followers.add(user_following.profile)  # type: ignore
+        # User can not follow who his already follow (unique follower/followee)
+        try:
+            with transaction.atomic():
+                lock_follower(user_following.id)
+                Follow.objects.create(follower=user_following, followee=user_to_follow)
+                update_follow_counts(user_following.id, [user_to_follow.id], 1)
+        except IntegrityError:
+            raise ValidationError({"detail": "You are already following this user."})
+
         return Response(
             {"detail": "Successfully followed the user."},
             status=status.HTTP_204_NO_CONTENT,
         )
 
+    # Staff imports: signs up to BULK_CREATE_MAX_USERS accounts through the
+    # same path as signup, with the same validation for each row and a result
+    # per row; the valid rows are written together
+    @action(methods=["POST"], detail=False, url_path="bulk")
+    def bulk_create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = []
+        rows = []
+        for row in serializer.validated_data["users"]:
+            user_serializer = UserSerializer(data=row)
+            if user_serializer.is_valid():
+                rows.append((len(results), user_serializer.validated_data))
+                results.append(None)
+            else:
+                results.append({"errors": user_serializer.errors})
+
+        created = create_users([data for _, data in rows])
+        for (index, _), user in zip(rows, created):
+            if isinstance(user, get_user_model()):
+                results[index] = {"user": UserSummarySerializer(user).data}
+            else:
+                results[index] = {"errors": user}
+
+        return Response({"results": results})
+
+    # Follows many accounts at once (onboarding, contact import): one query
+    # checks every ID, one inserts the edges, and each ID gets its own result.
+    # The check runs under the follower's lock (see users.counters), so a
+    # repeated or concurrent request sees the edges of the first one.
+    @action(methods=["POST"], detail=False, url_path="follow/bulk")
+    def bulk_follow(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user_ids = list(dict.fromkeys(serializer.validated_data["user_ids"]))
+        follower = request.user
+
+        with transaction.atomic():
+            lock_follower(follower.id)
+            results, followee_ids = self.check_followees(follower, user_ids)
+            if followee_ids:
+                Follow.objects.bulk_create(
+                    [
+                        Follow(follower=follower, followee_id=followee_id)
+                        for followee_id in followee_ids
+                    ]
+                )
+                update_follow_counts(follower.id, followee_ids, 1)
+        if followee_ids:
+            users_followed.send(
+                sender=Follow, follower_id=follower.id, followee_ids=followee_ids
+            )
+
+        return Response({"results": results})
+
+    # The result of each ID of a bulk follow, and the IDs to follow
+    def check_followees(self, follower, user_ids):
+        users = (
+            get_user_model()
+            .objects.filter(pk__in=user_ids)
+            .annotate(
+                already_following=Exists(
+                    Follow.objects.filter(follower=follower, followee=OuterRef("pk"))
+                )
+            )
+            .values_list("pk", "is_staff", "already_following")
+        )
+        found = {pk: (is_staff, following) for pk, is_staff, following in users}
+
+        results = []
+        followee_ids = []
+        for user_id in user_ids:
+            if user_id not in found:
+                result = "not_found"
+            elif user_id == follower.id:
+                result = "cannot_follow_self"
+            elif found[user_id][0]:
+                result = "cannot_follow_user"
+            elif found[user_id][1]:
+                result = "already_following"
+            else:
+                result = "followed"
+                followee_ids.append(user_id)
+            results.append({"id": user_id, "result": result})
+        return results, followee_ids
+
     @action(
         methods=["POST"],
         detail=False,
@@ -97,13 +243,66 @@ class UserViewSet(ModelViewSet):
 
         user_to_unfollow = get_object_or_404(User, id=id_user_to_unfollow)
 
-        if user_unfollowing.profile.following.filter(
-            pk=user_to_unfollow.profile.pk  # type: ignore
-        ).exists():
-            user_unfollowing.profile.following.remove(user_to_unfollow.profile)  # type: ignore
-            user_to_unfollow.profile.followers.remove(user_unfollowing.profile)  # type: ignore
+        with transaction.atomic():
+            deleted, _ = Follow.objects.filter(
+                follower=user_unfollowing, followee=user_to_unfollow
+            ).delete()
+            if deleted:
+                update_follow_counts(user_unfollowing.id, [user_to_unfollow.id], -1)
+        if deleted:
             return Response(
                 {"detail": "Successfully unfollowed the user."},
                 status=status.HTTP_204_NO_CONTENT,
             )
         raise ValidationError({"detail": "You are not following this user."})
+
+    @action(methods=["GET"], detail=True, url_path="followers")
+    def followers(self, request, *args, **kwargs):
+        user = get_object_or_404(get_user_model(), pk=kwargs.get("pk"))
+        edges = Follow.objects.filter(followee=user).select_related("follower")
+        return self.paginate_follow_edges(edges, "follower")
+
+    @action(methods=["GET"], detail=True, url_path="following")
+    def following(self, request, *args, **kwargs):
+        user = get_object_or_404(get_user_model(), pk=kwargs.get("pk"))
+        edges = Follow.objects.filter(follower=user).select_related("followee")
+        return self.paginate_follow_edges(edges, "followee")
+
+    # Posts mentioning the user, newest first. Being mentioned makes a post
+    # visible to the mentioned user; others only see the posts they can see.
+    @action(methods=["GET"], detail=True, url_path="mentions")
+    def mentions(self, request, *args, **kwargs):
+        user = get_object_or_404(get_user_model(), pk=kwargs.get("pk"))
+        entries = get_index_queryset(
+            PostMention.objects.filter(user=user),
+            request.user,
+            visible_only=user != request.user,
+        )
+
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(entries, request, view=self)
+        serializer = PostSerializer(
+            get_index_posts(page), many=True, context=self.get_serializer_context()
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    # Precomputed by users.suggestions; accounts that became staff since are
+    # left out
+    @action(methods=["GET"], detail=False, url_path="suggestions")
+    def suggestions(self, request, *args, **kwargs):
+        suggestions = (
+            Suggestion.objects.filter(user=request.user, suggested__is_staff=False)
+            .select_related("suggested")
+            .order_by("-score", "suggested_id")
+        )
+        serializer = SuggestionSerializer(suggestions, many=True)
+        return Response(serializer.data)
+
+    # Most recent follows first, keyed on (created_at, id) of the edge
+    def paginate_follow_edges(self, edges, user_field):
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(edges, self.request, view=self)
+        serializer = UserSummarySerializer(
+            [getattr(edge, user_field) for edge in page], many=True
+        )
+        return paginator.get_paginated_response(serializer.data)
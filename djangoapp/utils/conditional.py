@@ -0,0 +1,54 @@
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    return hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+# Evaluates If-None-Match / If-Modified-Since against the validators.
+# Returns the 304 / 412 response, if any, and the validator headers to send
+# with a full response. Either validator may be None.
+def check_validators(request, etag, last_modified):
+    etag = quote_etag(etag) if etag else None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+    headers = {}
+    if etag:
+        headers["ETag"] = etag
+    if timestamp:
+        headers["Last-Modified"] = http_date(timestamp)
+    return response, headers
+
+
+# Like django.views.decorators.http.condition, but for DRF view methods:
+# get_validators(view, request, *args, **kwargs) runs after authentication and
+# returns (etag, last_modified) from cheap queries, so a 304 never reaches the
+# serializers.
+def conditional_view(get_validators):
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return handler(view, request, *args, **kwargs)
+
+            etag, last_modified = get_validators(view, request, *args, **kwargs)
+            response, headers = check_validators(request, etag, last_modified)
+            if response is not None:
+                return response
+
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                for header, value in headers.items():
+                    if not response.has_header(header):
+                        response.headers[header] = value
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,180 @@
+import json
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# Metrics of the request being handled. Context variables follow the request
+# into sync_to_async threads, but not into the image processing pool.
+_current_metrics = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.method = None
+        self.endpoint = None
+        self.status = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.view_time = 0.0
+        self.total_time = 0.0
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.serializing = False
+
+    @property
+    def query_budget(self):
+        return get_query_budget(self.method, self.endpoint)
+
+    # Durations in milliseconds; db and serializer time are part of view time
+    def server_timing(self):
+        return ", ".join(
+            [
+                f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"',
+                f"serializer;dur={self.serializer_time * 1000:.2f}",
+                f"view;dur={self.view_time * 1000:.2f}",
+                f"total;dur={self.total_time * 1000:.2f}",
+            ]
+        )
+
+    def as_dict(self):
+        return {
+            "method": self.method,
+            "endpoint": self.endpoint,
+            "status": self.status,
+            "queries": self.queries,
+            "query_budget": self.query_budget,
+            "db_ms": round(self.db_time * 1000, 2),
+            "serializer_ms": round(self.serializer_time * 1000, 2),
+            "view_ms": round(self.view_time * 1000, 2),
+            "total_ms": round(self.total_time * 1000, 2),
+        }
+
+
+# Budgets are looked up as "METHOD endpoint", then "endpoint"
+def get_query_budget(method, endpoint):
+    budgets = settings.REQUEST_QUERY_BUDGETS
+    return budgets.get(
+        f"{method} {endpoint}", budgets.get(endpoint, settings.REQUEST_QUERY_BUDGET)
+    )
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+def instrument_connection(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+# New connections (one per thread) are instrumented when they connect, the
+# ones already open when the first request comes in by the middleware
+connection_created.connect(instrument_connection)
+
+
+# Serializers whose output counts as serializer time: the repo's model
+# serializers list it first among their bases. Only the outermost
+# representation is timed, since nested serializers (and the items of a list)
+# run inside it.
+class TimedSerializerMixin:
+    def to_representation(self, instance):
+        metrics = _current_metrics.get()
+        if metrics is None or metrics.serializing:
+            return super().to_representation(instance)
+
+        metrics.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializing = False
+            metrics.serializer_time += time.perf_counter() - started
+
+
+# Records SQL queries, DB, serializer and view time of each request and sends
+# them back in a Server-Timing header and a JSON log line, with a warning when
+# the endpoint ran more queries than its budget. The response keeps them in
+# response.metrics for tests (see BaseTest.assertWithinQueryBudget).
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Keeps Django from running process_view in a worker thread
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        for connection in connections.all():
+            instrument_connection(connection)
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current_metrics.get()
+        if metrics is not None:
+            metrics.view_started = time.perf_counter()
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.process_view(request, view_func, view_args, view_kwargs)
+
+    def finish(self, request, response, metrics):
+        finished = time.perf_counter()
+        metrics.total_time = finished - metrics.started
+        if metrics.view_started is not None:
+            metrics.view_time = finished - metrics.view_started
+        match = request.resolver_match
+        metrics.method = request.method
+        metrics.endpoint = match.view_name if match else request.path
+        metrics.status = response.status_code
+
+        if settings.REQUEST_SERVER_TIMING:
+            response["Server-Timing"] = metrics.server_timing()
+        response.metrics = metrics
+
+        logger.info(json.dumps(metrics.as_dict()))
+        if metrics.queries > metrics.query_budget:
+            logger.warning(
+                "%s %s ran %d SQL queries, over its budget of %d",
+                metrics.method,
+                metrics.endpoint,
+                metrics.queries,
+                metrics.query_budget,
+            )
+        return response
@@ -0,0 +1,10 @@
+from django.views.decorators.cache import cache_control
+from django.views.static import serve
+
+# Content-addressed files never change under the same name, so clients and
+# proxies may keep them for a year without revalidating
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+serve_immutable = cache_control(
+    public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+)(serve)
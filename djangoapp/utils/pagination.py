@@ -0,0 +1,199 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# Cursor pagination keyed on the ordering columns, e.g. (created_at, id).
+# Pages are fetched with a WHERE on the last seen position instead of OFFSET,
+# and no COUNT(*) is run. Clients that still send ?page= or ?pagination=page
+# get the old page-number response.
+class KeysetPagination(BasePagination):
+    page_size = api_settings.PAGE_SIZE
+    ordering = ("-created_at", "-id")
+    cursor_query_param = "cursor"
+    mode_query_param = "pagination"
+    invalid_cursor_message = "Invalid cursor."
+    page_number_pagination_class = PageNumberPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_number_paginator = None
+
+        if self.wants_page_numbers(request):
+            self.page_number_paginator = self.page_number_pagination_class()
+            return self.page_number_paginator.paginate_queryset(
+                queryset, request, view
+            )
+
+        reverse, position = self.decode_cursor(request, queryset.model)
+        rows = self.fetch_page(queryset, position, reverse)
+        return self.set_page(rows, position, reverse)
+
+    # Same as paginate_queryset with the async ORM; always in cursor mode
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_number_paginator = None
+
+        reverse, position = self.decode_cursor(request, queryset.model)
+        rows = await self.afetch_page(queryset, position, reverse)
+        return self.set_page(rows, position, reverse)
+
+    def set_page(self, rows, position, reverse):
+        has_more = len(rows) > self.page_size
+        results = rows[: self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.has_next = has_more if not reverse else True
+        self.has_previous = has_more if reverse else position is not None
+        self.page = results
+        return results
+
+    def wants_page_numbers(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == "page"
+            or PageNumberPagination.page_query_param in request.query_params
+        )
+
+    # Returns up to page_size + 1 rows after the position, in page order
+    def fetch_page(self, queryset, position, reverse, ordering=None):
+        return list(self.get_page_queryset(queryset, position, reverse, ordering))
+
+    async def afetch_page(self, queryset, position, reverse, ordering=None):
+        queryset = self.get_page_queryset(queryset, position, reverse, ordering)
+        return [row async for row in queryset]
+
+    def get_page_queryset(self, queryset, position, reverse, ordering=None):
+        queryset = queryset.order_by(*self.get_ordering(reverse, ordering))
+        if position is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(position, reverse, ordering)
+            )
+        return queryset[: self.page_size + 1]
+
+    def get_ordering(self, reverse=False, ordering=None):
+        ordering = ordering or self.ordering
+        if not reverse:
+            return list(ordering)
+        return [
+            field[1:] if field.startswith("-") else f"-{field}" for field in ordering
+        ]
+
+    def get_keyset_filter(self, position, reverse, ordering=None):
+        # (a, b) < (x, y)  ==>  a < x OR (a = x AND b < y)
+        keyset_filter = Q()
+        equal_to_previous = Q()
+        for field, value in zip(self.get_ordering(reverse, ordering), position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            keyset_filter |= equal_to_previous & Q(**{f"{name}__{lookup}": value})
+            equal_to_previous &= Q(**{name: value})
+        return keyset_filter
+
+    def get_position(self, instance):
+        return [getattr(instance, field.lstrip("-")) for field in self.ordering]
+
+    def encode_cursor(self, instance, reverse):
+        position = [str(value) for value in self.get_position(instance)]
+        payload = json.dumps({"p": position, "r": int(reverse)})
+        token = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, token
+        )
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return False, None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            reverse = bool(payload["r"])
+            raw_position = payload["p"]
+            if len(raw_position) != len(self.ordering):
+                raise ValueError
+            position = [
+                self.parse_position_value(model, field.lstrip("-"), value)
+                for field, value in zip(self.ordering, raw_position)
+            ]
+        # KeyError / TypeError for a payload of the wrong shape, ValidationError
+        # for a position value the field can not parse
+        except (
+            KeyError,
+            TypeError,
+            ValueError,
+            binascii.Error,
+            json.JSONDecodeError,
+            DjangoValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+        return reverse, position
+
+    # Cursor values are parsed by the field they order by; subclasses
+    # ordering by an annotation override this
+    def parse_position_value(self, model, name, value):
+        return model._meta.get_field(name).to_python(value)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param
+            )
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if self.page_number_paginator is not None:
+            return self.page_number_paginator.get_paginated_response(data)
+
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to 'page' to use page-number pagination.",
+                "schema": {"type": "string"},
+            },
+        ]
@@ -0,0 +1,317 @@
+# Bulk generation of a synthetic social graph, for staging datasets
+# (manage.py seed) and the benchmarks. Follower counts follow a power law (a
+# few accounts are followed by most users), posting activity is skewed the
+# same way, and likes concentrate on a few popular posts. Everything comes
+# from one random seed, so two runs with the same options build the same
+# graph.
+#
+# Rows are written in batches with bulk_create, or with COPY on Postgres,
+# so no per-row signals run: profiles and their counters, timelines, like
+# counters and follow suggestions are written here the way the signals and
+# views would have.
+import datetime
+import io
+import json
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from feed.models import TimelineEntry
+from posts.models import PostModel
+from users.counters import recount_profiles
+from users.models import Follow, Profile
+from users.suggestions import compute_suggestions
+
+User = get_user_model()
+Like = PostModel.liked_by.through
+
+
+class PowerLaw:
+    # Picks items with probability proportional to 1 / rank ** alpha, using
+    # the inverse CDF of the continuous distribution, so sampling from
+    # millions of items needs no weight table
+    def __init__(self, items, alpha, rng):
+        self.items = list(items)
+        self.alpha = alpha
+        self.rng = rng
+        rng.shuffle(self.items)
+
+    def sample(self):
+        size = len(self.items)
+        u = self.rng.random()
+        if abs(self.alpha - 1) < 1e-9:
+            rank = (size + 1) ** u
+        else:
+            exponent = 1 - self.alpha
+            rank = (1 + u * ((size + 1) ** exponent - 1)) ** (1 / exponent)
+        return self.items[min(size, int(rank)) - 1]
+
+    def sample_distinct(self, count, exclude=()):
+        count = min(count, len(self.items) - len(exclude))
+        picked = set()
+        for _ in range(count * 20):
+            if len(picked) >= count:
+                break
+            item = self.sample()
+            if item not in exclude:
+                picked.add(item)
+        return picked
+
+
+def skewed_count(rng, mean, maximum):
+    return min(maximum, int(rng.expovariate(1 / mean))) if mean > 0 else 0
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class SocialGraphSeeder:
+    def __init__(
+        self,
+        users,
+        posts_per_user,
+        follows_per_user,
+        likes_per_user,
+        alpha=1.0,
+        seed=0,
+        batch_size=5000,
+        username_prefix="seed_user_",
+        password="Seed1234!",
+        use_copy=True,
+        progress=None,
+    ):
+        self.users = users
+        self.posts_per_user = posts_per_user
+        self.follows_per_user = follows_per_user
+        self.likes_per_user = likes_per_user
+        self.alpha = alpha
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.username_prefix = username_prefix
+        self.password = password
+        self.use_copy = use_copy and connection.vendor == "postgresql"
+        self.progress = progress or (lambda table, done, total, seconds: None)
+
+    def run(self):
+        # The hash is slow on purpose, so it is computed once for all users
+        password = make_password(self.password)
+        # Posts are one second apart, ending now (with COPY only: bulk_create
+        # stamps auto_now_add fields with the insert time)
+        now = timezone.now()
+
+        max_post_id = PostModel.objects.aggregate(id=Max("id"))["id"] or 0
+        max_follow_id = Follow.objects.aggregate(id=Max("id"))["id"] or 0
+        max_profile_id = Profile.objects.aggregate(id=Max("id"))["id"] or 0
+
+        self.write(
+            User,
+            (
+                User(
+                    username=f"{self.username_prefix}{i}",
+                    email=f"{self.username_prefix}{i}@example.com",
+                    password=password,
+                    date_joined=now,
+                )
+                for i in range(self.users)
+            ),
+            self.users,
+        )
+        user_ids = list(
+            User.objects.filter(username__startswith=self.username_prefix)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        self.write(
+            Profile, (Profile(user_id=user_id) for user_id in user_ids), len(user_ids)
+        )
+
+        post_count = len(user_ids) * self.posts_per_user
+        activity = PowerLaw(user_ids, self.alpha, self.rng)
+        self.write(
+            PostModel,
+            (
+                PostModel(
+                    poster_user_id=activity.sample(),
+                    text_content=f"seed post {i}",
+                    created_at=now - datetime.timedelta(seconds=post_count - i),
+                    updated_at=now,
+                )
+                for i in range(post_count)
+            ),
+            post_count,
+        )
+
+        popularity = PowerLaw(user_ids, self.alpha, self.rng)
+        max_follows = len(user_ids) - 1
+        follows = (
+            Follow(follower_id=follower_id, followee_id=followee_id, created_at=now)
+            for follower_id in user_ids
+            for followee_id in popularity.sample_distinct(
+                max(1, skewed_count(self.rng, self.follows_per_user, max_follows)),
+                exclude={follower_id},
+            )
+        )
+        follow_count = self.write(Follow, follows)
+        timeline_count = self.build_timelines(max_follow_id)
+
+        # Ordered like user_ids: the RNG picks by position, and without an
+        # ORDER BY the database may return the rows in any order
+        post_ids = (
+            PostModel.objects.filter(id__gt=max_post_id)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        liked_posts = PowerLaw(post_ids, self.alpha, self.rng)
+        likes = (
+            Like(user_id=user_id, postmodel_id=post_id)
+            for user_id in user_ids
+            for post_id in liked_posts.sample_distinct(
+                skewed_count(self.rng, self.likes_per_user, len(liked_posts.items))
+            )
+        )
+        like_count = self.write(Like, likes)
+        self.count_likes(max_post_id)
+        seeded_profiles = Profile.objects.filter(id__gt=max_profile_id)
+        recount_profiles(seeded_profiles)
+        # Like users.counters would have on the follow that crossed the limit
+        seeded_profiles.filter(
+            followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS
+        ).update(pull_author=True)
+
+        # Seeded users only follow each other, so nobody else's list changes
+        compute_suggestions(user_ids, batch_size=self.batch_size)
+
+        return {
+            "users": len(user_ids),
+            "posts": post_count,
+            "follows": follow_count,
+            "likes": like_count,
+            "timeline_entries": timeline_count,
+        }
+
+    # Writes the instances in batches and returns how many were written
+    def write(self, model, instances, total=None):
+        table = model._meta.db_table
+        started = time.perf_counter()
+        written = 0
+        for batch in batched(instances, self.batch_size):
+            with transaction.atomic():
+                if self.use_copy:
+                    self.copy(model, batch)
+                else:
+                    model.objects.bulk_create(batch)
+            written += len(batch)
+            self.progress(table, written, total, time.perf_counter() - started)
+        return written
+
+    def copy(self, model, instances):
+        fields = [
+            field for field in model._meta.concrete_fields if not field.primary_key
+        ]
+        columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+        sql = (
+            f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) "
+            "FROM STDIN"
+        )
+        data = "".join(
+            "\t".join(
+                to_copy_value(get_field_value(field, instance)) for field in fields
+            )
+            + "\n"
+            for instance in instances
+        )
+
+        with connection.cursor() as cursor:
+            raw_cursor = cursor.cursor
+            if hasattr(raw_cursor, "copy"):
+                # psycopg 3
+                with raw_cursor.copy(sql) as copy:
+                    copy.write(data)
+            else:
+                raw_cursor.copy_expert(sql, io.StringIO(data))
+
+    # Same rows fan_out_post / backfill_timeline write: the newest
+    # FEED_TIMELINE_BACKFILL posts of each followed push author
+    def build_timelines(self, max_follow_id):
+        started = time.perf_counter()
+        quote = connection.ops.quote_name
+        timeline = TimelineEntry._meta
+        follow = Follow._meta
+        post = PostModel._meta
+
+        sql = f"""
+            INSERT INTO {quote(timeline.db_table)} (owner_id, post_id, created_at)
+            SELECT f.follower_id, p.id, p.created_at
+            FROM {quote(follow.db_table)} f
+            JOIN (
+                SELECT id, poster_user_id, created_at, ROW_NUMBER() OVER (
+                    PARTITION BY poster_user_id ORDER BY created_at DESC, id DESC
+                ) AS position
+                FROM {quote(post.db_table)}
+            ) p ON p.poster_user_id = f.followee_id AND p.position <= %s
+            WHERE f.id > %s AND f.followee_id IN (
+                SELECT followee_id FROM {quote(follow.db_table)}
+                GROUP BY followee_id HAVING COUNT(*) <= %s
+            )
+        """
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                sql,
+                [
+                    settings.FEED_TIMELINE_BACKFILL,
+                    max_follow_id,
+                    settings.FEED_FANOUT_MAX_FOLLOWERS,
+                ],
+            )
+            count = cursor.rowcount
+        self.progress(timeline.db_table, count, count, time.perf_counter() - started)
+        return count
+
+    def count_likes(self, max_post_id):
+        PostModel.objects.filter(id__gt=max_post_id).update(
+            likes_counter=Coalesce(
+                Subquery(
+                    Like.objects.filter(postmodel=OuterRef("pk"))
+                    .values("postmodel")
+                    .annotate(count=Count("pk"))
+                    .values("count")
+                ),
+                0,
+            )
+        )
+
+
+def get_field_value(field, instance):
+    return field.get_prep_value(getattr(instance, field.attname))
+
+
+def to_copy_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        value = value.isoformat()
+    elif isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
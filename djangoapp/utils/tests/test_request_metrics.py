@@ -0,0 +1,151 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from feed.timeline import is_pull_author
+from tests_base.base_test import BaseTest
+from users.models import Profile
+from utils.instrumentation import get_query_budget
+
+
+# The query budgets hold however many rows a page has, so an N+1 in a view or
+# serializer fails here before it reaches production
+class RequestMetricsTests(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.follow(self.user_a, self.user_b)
+        self.follow(self.user_a, self.user_c)
+        self.follow(self.user_c, self.user_a)
+        for i in range(10):
+            post = self.create_post(self.user_b, f"post {i}")
+            post.liked_by.add(self.user_a, self.user_c)
+
+    def get(self, url):
+        return self.client.get(
+            url, HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}"
+        )
+
+    def test_read_endpoints_within_query_budget(self):
+        urls = [
+            reverse("feed:user-feed"),
+            reverse("async:user-feed"),
+            reverse("posts:posts-api-list"),
+            reverse("posts:posts-api-detail", args=[self.post_a.id]),
+            reverse("posts:posts-api-likers", args=[self.post_b.id]),
+            reverse("users:users-api-list"),
+            reverse("users:users-api-detail", args=[self.user_a.id]),
+            reverse("users:users-api-followers", args=[self.user_a.id]),
+            reverse("users:users-api-following", args=[self.user_a.id]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.get(url)
+
+                self.assertEqual(200, response.status_code)
+                self.assertWithinQueryBudget(response)
+
+    def test_like_within_query_budget(self):
+        response = self.client.post(
+            reverse("posts:posts-api-like-post"),
+            data={"post_id": self.post_c.id},
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        self.assertEqual(200, response.status_code)
+        self.assertWithinQueryBudget(response)
+
+    # Pull authors' posts are merged into the page with their own queries
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=1)
+    def test_feed_with_pull_authors_within_query_budget(self):
+        self.follow(self.user_c, self.user_b)
+        self.assertTrue(is_pull_author(self.user_b.id))
+
+        for name in ("feed:user-feed", "async:user-feed"):
+            with self.subTest(name=name):
+                cache.clear()
+                first_page = self.get(reverse(name))
+                next_page = self.get(first_page.json()["next"])
+
+                self.assertEqual(200, next_page.status_code)
+                self.assertWithinQueryBudget(first_page)
+                self.assertWithinQueryBudget(next_page)
+
+    # Outside of tests the on-commit callbacks run inside the request, so they
+    # are counted against the budget too
+    def test_follow_and_unfollow_within_query_budget(self):
+        actions = [
+            ("users:users-api-unfollow", "id_user_to_unfollow"),
+            ("users:users-api-follow", "id_user_to_follow"),
+        ]
+        for pull_author in (False, True):
+            Profile.objects.filter(user=self.user_b).update(pull_author=pull_author)
+            for endpoint, field in actions:
+                with self.subTest(pull_author=pull_author, endpoint=endpoint):
+                    with CaptureQueriesContext(connection) as queries:
+                        with self.captureOnCommitCallbacks(execute=True):
+                            response = self.client.post(
+                                reverse(endpoint),
+                                data={field: self.user_b.id},
+                                HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+                            )
+
+                    self.assertEqual(204, response.status_code)
+                    self.assertLessEqual(
+                        len(queries), get_query_budget("POST", endpoint)
+                    )
+
+    def test_server_timing_header_reports_queries_and_timings(self):
+        response = self.get(reverse("feed:user-feed"))
+
+        metrics = response.metrics
+        self.assertEqual("feed:user-feed", metrics.endpoint)
+        self.assertGreater(metrics.queries, 0)
+        self.assertGreater(metrics.serializer_time, 0)
+        self.assertGreaterEqual(metrics.view_time, metrics.serializer_time)
+        self.assertGreaterEqual(metrics.total_time, metrics.view_time)
+
+        server_timing = response["Server-Timing"]
+        self.assertIn(f'desc="{metrics.queries} queries"', server_timing)
+        for name in ("db;dur=", "serializer;dur=", "view;dur=", "total;dur="):
+            self.assertIn(name, server_timing)
+
+    def test_serializer_time_counts_output_serializers_only(self):
+        detail = self.get(reverse("users:users-api-detail", args=[self.user_a.id]))
+        like = self.client.post(
+            reverse("posts:posts-api-like-post"),
+            data={"post_id": self.post_c.id},
+            HTTP_AUTHORIZATION=f"Bearer {self.token_user_a}",
+        )
+
+        self.assertGreater(detail.metrics.serializer_time, 0)
+        # The like serializer only validates the input
+        self.assertEqual(0, like.metrics.serializer_time)
+
+    def test_log_line_per_request(self):
+        with self.assertLogs("utils.instrumentation", "INFO") as logs:
+            response = self.get(reverse("posts:posts-api-list"))
+
+        self.assertEqual(1, len(logs.records))
+        self.assertIn('"endpoint": "posts:posts-api-list"', logs.output[0])
+        self.assertIn(f'"queries": {response.metrics.queries}', logs.output[0])
+
+    @override_settings(REQUEST_QUERY_BUDGETS={"posts:posts-api-list": 1})
+    def test_warning_when_over_query_budget(self):
+        with self.assertLogs("utils.instrumentation", "WARNING") as logs:
+            response = self.get(reverse("posts:posts-api-list"))
+
+        self.assertIn(
+            "GET posts:posts-api-list ran "
+            f"{response.metrics.queries} SQL queries, over its budget of 1",
+            logs.output[0],
+        )
+        with self.assertRaises(AssertionError):
+            self.assertWithinQueryBudget(response)
+
+    @override_settings(REQUEST_SERVER_TIMING=False)
+    def test_no_server_timing_header_when_disabled(self):
+        response = self.get(reverse("feed:user-feed"))
+
+        self.assertNotIn("Server-Timing", response)
+        self.assertGreater(response.metrics.queries, 0)
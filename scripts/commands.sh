@@ -13,4 +13,19 @@ echo "✅ Postgres Database Started Successfully ($POSTGRES_HOST:$POSTGRES_PORT)
 python manage.py collectstatic --noinput
 python manage.py makemigrations --noinput
 python manage.py migrate --noinput
-python manage.py runserver 0.0.0.0:8000
\ No newline at end of file
+
+# SERVER_MODE: dev (runserver), wsgi (gunicorn threads) or asgi (gunicorn + uvicorn)
+# asgi turns persistent DB connections off (DB_CONN_MAX_AGE is ignored, see
+# minitwitter/settings.py); set DB_POOL=1 to reuse connections there
+# wsgi and asgi run several workers and need a shared cache (CACHE_BACKEND=redis)
+case "${SERVER_MODE:-dev}" in
+  wsgi)
+    exec gunicorn minitwitter.wsgi:application
+    ;;
+  asgi)
+    exec gunicorn minitwitter.asgi:application
+    ;;
+  *)
+    exec python manage.py runserver 0.0.0.0:8000
+    ;;
+esac